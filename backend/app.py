@@ -1,43 +1,159 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
-import joblib
 import os
+import shlex
+import subprocess
+import threading
+import time
 from datetime import datetime, timedelta
-import yfinance as yf
-from newsapi import NewsApiClient
 from dotenv import load_dotenv
 import warnings
 warnings.filterwarnings('ignore')
 
-from database import save_model_to_db, load_model_from_db, get_db_model_metadata
-
-# Load environment variables
+# Load environment variables before local modules read their config
 load_dotenv()
 
+# Heavy modules are imported on first use to keep worker boot fast
+from lazy_imports import lazy_import, preload
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+joblib = lazy_import('joblib')
+yf = lazy_import('yfinance')
+
+from cache import TTLCache
+from metrics import (
+    registry, CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    REQUEST_LATENCY, STAGE_LATENCY, PREDICTION_FALLBACKS, PREDICTIONS, MODEL_ROUTES, STALE_RESPONSES
+)
+from database import ModelDB, save_model_to_db, load_active_model, load_model_version, get_db_model_metadata
+from model_router import ModelRouter, BASE_MODEL_TYPE, filesystem_shards, parse_shard_key, shard_dir
+from model_events import ModelEventListener
+from http_cache import cached_route, data_versions, last_bar_version
+from response_encoding import FastJSONProvider, install_compression
+from shadow import ShadowEvaluator
+from drift import DriftMonitor, DRIFT_RETRAIN_COOLDOWN_SECONDS
+from prediction_cache import PredictionCache, prediction_key
+from feature_store import FeatureStore, compute_indicators, INDICATOR_COLUMNS
+from quotes import quote_service
+from upstream import upstream_request, cached_fetch, background, reset_stale, served_stale
+from streaming import QuoteStreamHub, StreamLimitError, format_sse, STREAM_HEARTBEAT_SECONDS
+from comparison import (
+    compare_symbols, fetch_close_prices, parse_symbols, BenchmarkError, DEFAULT_WINDOW, MAX_COMPARE_SYMBOLS
+)
+
+class TimedJSONProvider(FastJSONProvider):
+    """JSON provider that records serialization time per response"""
+
+    def response(self, *args, **kwargs):
+        with STAGE_LATENCY.time(stage='serialize'):
+            return super().response(*args, **kwargs)
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 CORS(app)
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    reset_stale()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method, route=route, status=response.status_code
+        )
+    return response
+
+# After-request hooks run in reverse order of registration, so these run
+# before the latency hook above and are included in the request time
+install_compression(app)
+
+@app.after_request
+def mark_stale_response(response):
+    """Flag responses built from last-known-good data while an upstream was failing"""
+    if served_stale():
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        STALE_RESPONSES.inc(route=route)
+        response.headers['X-Data-Stale'] = 'true'
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 # Configuration
 MODEL_DIR = "model_artifacts"
 MODEL_PATH = os.path.join(MODEL_DIR, "stock_model_pipeline.pkl")
 METADATA_PATH = os.path.join(MODEL_DIR, "metadata.pkl")
+MAX_BULK_SYMBOLS = int(os.getenv('MAX_BULK_SYMBOLS', '100'))
+
+# Shared quote/prediction stream (one upstream poll per symbol, not per client);
+# its polls queue behind interactive requests for the upstream budget
+stream_hub = QuoteStreamHub(background(quote_service.get_quotes))
+
+# Finished ML predictions per (model version, symbol, last bar); see prediction_cache.py
+prediction_cache = PredictionCache()
 
-# Initialize NewsAPI (you'll need to set your API key)
+# Materialized feature rows (see feature_store.py); symbols that are not
+# materialized get their features computed from the fetched bars
+feature_store = FeatureStore()
+
+# NewsAPI (you'll need to set your API key)
 # Get free API key from: https://newsapi.org/
 NEWS_API_KEY = os.getenv('NEWS_API_KEY', 'your_api_key_here')
-print(f"NewsAPI Key loaded: {NEWS_API_KEY[:10]}..." if NEWS_API_KEY != 'your_api_key_here' else "NewsAPI Key not configured")
-try:
-    newsapi = NewsApiClient(api_key=NEWS_API_KEY) if NEWS_API_KEY != 'your_api_key_here' else None
-    if newsapi:
-        print("✅ NewsAPI initialized successfully")
-    else:
-        print("⚠️ NewsAPI not initialized - using demo news")
-except Exception as e:
-    print(f"❌ Error initializing NewsAPI: {e}")
-    newsapi = None
+NEWS_API_CONFIGURED = NEWS_API_KEY != 'your_api_key_here'
+
+# Load model artifacts and heavy imports in a background thread at startup
+PREWARM = os.getenv('STOCKSIGHT_PREWARM', '0') == '1'
+MODEL_CACHE_TTL_SECONDS = float(os.getenv('MODEL_CACHE_TTL_SECONDS', '300'))
+# Loaded models (global + shards) are evicted LRU beyond these bounds
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv('MODEL_CACHE_MAX_ENTRIES', '64'))
+MODEL_CACHE_MAX_MB = float(os.getenv('MODEL_CACHE_MAX_MB', '1024'))
+# Daily bars and news are reused for this long; after expiry they are still
+# served for *_STALE_SECONDS when upstream fails or its budget is exhausted
+HISTORY_TTL_SECONDS = float(os.getenv('HISTORY_TTL_SECONDS', '60'))
+HISTORY_STALE_SECONDS = float(os.getenv('HISTORY_STALE_SECONDS', str(24 * 60 * 60)))
+NEWS_TTL_SECONDS = float(os.getenv('NEWS_TTL_SECONDS', '300'))
+NEWS_STALE_SECONDS = float(os.getenv('NEWS_STALE_SECONDS', str(24 * 60 * 60)))
+# Hot-reload models when ModelDB sends activation events (needs PostgreSQL)
+MODEL_EVENTS_LISTEN = os.getenv('MODEL_EVENTS_LISTEN', '1' if os.getenv('DATABASE_URL') else '0') == '1'
+# Candidate model scored in the background on live traffic (see shadow.py)
+SHADOW_MODEL_ID = os.getenv('SHADOW_MODEL_ID')
+SHADOW_MODEL_TYPE = os.getenv('SHADOW_MODEL_TYPE', BASE_MODEL_TYPE)
+# Command started when a served model version drifts (see drift.py), e.g. "python train_model.py"
+DRIFT_RETRAIN_COMMAND = os.getenv('DRIFT_RETRAIN_COMMAND')
+# Only one worker starts it per drifting version: the claim is a row in PostgreSQL
+DRIFT_RETRAIN_CLAIM = os.getenv('DRIFT_RETRAIN_CLAIM', '1' if os.getenv('DATABASE_URL') else '0') == '1'
+# Client/CDN caching per route family: (max-age, stale-while-revalidate) in seconds
+QUOTE_CACHE_POLICY = (int(os.getenv('QUOTE_MAX_AGE', '15')), 30)
+HISTORY_CACHE_POLICY = (int(os.getenv('HISTORY_MAX_AGE', '300')), 3600)
+PREDICTION_CACHE_POLICY = (int(os.getenv('PREDICTION_MAX_AGE', '300')), 900)
+NEWS_CACHE_POLICY = (int(os.getenv('NEWS_MAX_AGE', '300')), 900)
+COMPARE_CACHE_POLICY = (int(os.getenv('COMPARE_MAX_AGE', '60')), 300)
+
+_newsapi = None
+_newsapi_lock = threading.Lock()
+# Entries are (pipeline, metadata, source, version, artifact_bytes), weighed by artifact size
+_model_cache = TTLCache(MODEL_CACHE_TTL_SECONDS, maxsize=MODEL_CACHE_MAX_ENTRIES, name='models',
+                        max_weight=MODEL_CACHE_MAX_MB * 1024 ** 2, weigher=lambda entry: entry[4])
+_history_cache = TTLCache(HISTORY_TTL_SECONDS, maxsize=1024, name='history', stale_ttl=HISTORY_STALE_SECONDS)
+_news_cache = TTLCache(NEWS_TTL_SECONDS, maxsize=1024, name='news', stale_ttl=NEWS_STALE_SECONDS)
+
+def get_newsapi():
+    """Create the NewsAPI client on first use"""
+    global _newsapi
+    if _newsapi is None and NEWS_API_CONFIGURED:
+        with _newsapi_lock:
+            if _newsapi is None:
+                try:
+                    from newsapi import NewsApiClient
+                    _newsapi = NewsApiClient(api_key=NEWS_API_KEY)
+                    print("✅ NewsAPI initialized successfully")
+                except Exception as e:
+                    print(f"❌ Error initializing NewsAPI: {e}")
+    return _newsapi
 
 # =============================
 # HELPER FUNCTIONS
@@ -45,41 +161,18 @@ except Exception as e:
 
 def get_stock_data(symbol):
     """Fetch real-time stock data from Yahoo Finance"""
-    try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        hist = ticker.history(period="1d")
-        
-        if hist.empty:
-            return None
-        
-        current_price = hist['Close'].iloc[-1]
-        open_price = hist['Open'].iloc[-1]
-        high_price = hist['High'].iloc[-1]
-        low_price = hist['Low'].iloc[-1]
-        volume = int(hist['Volume'].iloc[-1])
-        
-        prev_close = info.get('previousClose', current_price)
-        change = current_price - prev_close
-        change_percent = (change / prev_close) * 100
-        
-        return {
-            'symbol': symbol.upper(),
-            'name': info.get('longName', symbol.upper()),
-            'price': round(float(current_price), 2),
-            'open': round(float(open_price), 2),
-            'close': round(float(current_price), 2),
-            'high': round(float(high_price), 2),
-            'low': round(float(low_price), 2),
-            'volume': volume,
-            'marketCap': info.get('marketCap', 0),
-            'change': round(float(change), 2),
-            'changePercent': round(float(change_percent), 2),
-            'lastUpdated': datetime.now().isoformat()
-        }
-    except Exception as e:
-        print(f"Error fetching stock data for {symbol}: {e}")
-        return None
+    return quote_service.get_quote(symbol)
+
+def fetch_history(symbol, period):
+    """Daily bars for `symbol` (cached); last-known-good bars when upstream fails or is throttled"""
+    symbol = symbol.upper()
+    bars = cached_fetch(
+        _history_cache, (symbol, period),
+        lambda: upstream_request('history', lambda: yf.Ticker(symbol).history(period=period)),
+        is_empty=lambda frame: frame.empty
+    )
+    # Callers add columns; keep the cached frame untouched
+    return bars.copy(deep=False)
 
 def get_stock_history(symbol, range_str='1M'):
     """Fetch historical stock data with moving averages"""
@@ -93,30 +186,29 @@ def get_stock_history(symbol, range_str='1M'):
         }
         period = period_map.get(range_str, '1mo')
         
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period)
+        hist = fetch_history(symbol, period)
         
         if hist.empty:
             return []
+        data_versions.record(('history', symbol.upper(), range_str), last_bar_version(hist))
         
         # Calculate moving averages
         hist['MA10'] = hist['Close'].rolling(window=10).mean()
         hist['MA50'] = hist['Close'].rolling(window=50).mean()
         hist['MA200'] = hist['Close'].rolling(window=200).mean()
         
-        # Format data
+        # Format data: round whole columns once; tolist() yields Python floats (NaN for missing MAs)
+        dates = hist.index.strftime('%Y-%m-%d').tolist()
+        rounded = np.round(hist[['Close', 'MA10', 'MA50', 'MA200']].to_numpy(dtype=float), 2)
         chart_data = []
-        for date, row in hist.iterrows():
-            data_point = {
-                'date': date.strftime('%Y-%m-%d'),
-                'price': round(float(row['Close']), 2)
-            }
-            if not pd.isna(row['MA10']):
-                data_point['ma10'] = round(float(row['MA10']), 2)
-            if not pd.isna(row['MA50']):
-                data_point['ma50'] = round(float(row['MA50']), 2)
-            if not pd.isna(row['MA200']):
-                data_point['ma200'] = round(float(row['MA200']), 2)
+        for date, (price, ma10, ma50, ma200) in zip(dates, rounded.tolist()):
+            data_point = {'date': date, 'price': price}
+            if ma10 == ma10:
+                data_point['ma10'] = ma10
+            if ma50 == ma50:
+                data_point['ma50'] = ma50
+            if ma200 == ma200:
+                data_point['ma200'] = ma200
             chart_data.append(data_point)
         
         return chart_data
@@ -125,70 +217,210 @@ def get_stock_history(symbol, range_str='1M'):
         return []
 
 def calculate_technical_indicators(hist_data):
-    """Calculate technical indicators for prediction"""
+    """Calculate technical indicators for prediction (feature_store.compute_indicators)"""
     df = pd.DataFrame(hist_data)
-    
-    # RSI
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI_14'] = 100 - (100 / (1 + rs))
-    
-    # MACD
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = exp1 - exp2
-    df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    
-    # Bollinger Bands
-    df['MA20'] = df['Close'].rolling(window=20).mean()
-    df['STD20'] = df['Close'].rolling(window=20).std()
-    df['Bollinger_Upper'] = df['MA20'] + (df['STD20'] * 2)
-    df['Bollinger_Lower'] = df['MA20'] - (df['STD20'] * 2)
-    
-    # Volume indicators
-    df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-    
+    indicators = compute_indicators(df)
+    for col in INDICATOR_COLUMNS:
+        df[col] = indicators[col]
     return df
 
-def generate_prediction(symbol):
-    """Generate ML prediction for stock"""
-    try:
+def model_files(model_type):
+    """(pipeline path, metadata path) of a model on disk"""
+    if parse_shard_key(model_type):
+        directory = shard_dir(model_type)
+        return os.path.join(directory, "stock_model_pipeline.pkl"), os.path.join(directory, "metadata.pkl")
+    return MODEL_PATH, METADATA_PATH
+
+def load_prediction_model(model_type='stock_prediction'):
+    """Load (pipeline, metadata, source, version), cached for MODEL_CACHE_TTL_SECONDS"""
+    cached = _model_cache.get(model_type)
+    if cached is not None:
+        return cached[:4]
+
+    with STAGE_LATENCY.time(stage='model_load'):
         # Try to load model from database first
         try:
-            pipeline = load_model_from_db('stock_prediction')
-            metadata = get_db_model_metadata('stock_prediction')
-            model_source = 'database'
+            record = load_active_model(model_type)
+            if record is None:
+                raise FileNotFoundError(f"No active {model_type} model found in database")
+            pipeline, metadata, size = record['model'], record['metadata'], record['size_bytes']
+            model_source, version = 'database', str(record['id'])
         except:
             # Fall back to filesystem
-            if not os.path.exists(MODEL_PATH):
-                return generate_simple_prediction(symbol)
+            model_path, metadata_path = model_files(model_type)
+            if not os.path.exists(model_path):
+                return None
 
-            pipeline = joblib.load(MODEL_PATH)
-            metadata = joblib.load(METADATA_PATH)
-            model_source = 'filesystem'
+            pipeline = joblib.load(model_path)
+            metadata = joblib.load(metadata_path)
+            size = os.path.getsize(model_path)
+            model_source, version = 'filesystem', f"file:{os.path.getmtime(model_path):.0f}"
+
+    entry = (pipeline, metadata, model_source, version, size)
+    _model_cache.set(model_type, entry)
+    return entry[:4]
+
+def list_model_shards():
+    """Shard model_type -> metadata from the shards directory and the database"""
+    shards = filesystem_shards(load_metadata=joblib.load)
+    try:
+        for row in ModelDB().list_active_models(BASE_MODEL_TYPE + ':'):
+            shards[row['model_type']] = row.get('metadata') or {}
+    except Exception as e:
+        print(f"⚠️ Could not list model shards from database: {e}")
+    return shards
+
+model_router = ModelRouter(list_model_shards)
+
+def route_prediction_model(symbol):
+    """(model_type, (pipeline, metadata, source, version)) of the most specific available model"""
+    for model_type in model_router.candidates(symbol):
+        loaded = load_prediction_model(model_type)
+        if loaded is not None:
+            return model_type, loaded
+    return None, None
+
+def handle_model_event(event):
+    """Drop cached models after an activation/status change in any worker"""
+    model_type = event.get('model_type')
+    if model_type:
+        _model_cache.delete(model_type)
+    else:
+        _model_cache.clear()
+    model_router.invalidate()
+    # Prediction ETags embed the model version
+    data_versions.clear()
+    if event.get('event') != 'reconnect':
+        print(f"🔄 Model event '{event.get('event')}' for {model_type} ({event.get('model_id')}), cache invalidated")
+
+_shadow = None
+_shadow_lock = threading.Lock()
+
+def start_shadow(candidate_id, model_type=BASE_MODEL_TYPE):
+    """Score `candidate_id` alongside every prediction served by `model_type`"""
+    global _shadow
+    with _shadow_lock:
+        if _shadow is not None:
+            _shadow.stop()
+        _shadow = ShadowEvaluator(model_type, candidate_id, load_model_version)
+        return _shadow
+
+def stop_shadow():
+    global _shadow
+    with _shadow_lock:
+        stopped, _shadow = _shadow, None
+    if stopped is not None:
+        stopped.stop()
+    return stopped
+
+def trigger_retraining(summary):
+    """Start DRIFT_RETRAIN_COMMAND for a drifting model, so retraining follows the data instead of a schedule"""
+    if not DRIFT_RETRAIN_COMMAND:
+        return
+    if DRIFT_RETRAIN_CLAIM:
+        try:
+            claimed = ModelDB().claim_retrain(summary['model_type'], summary['model_version'],
+                                              DRIFT_RETRAIN_COOLDOWN_SECONDS)
+        except Exception as e:
+            print(f"⚠️ Could not claim retraining, not started: {e}")
+            return
+        if not claimed:
+            print(f"🔁 Retraining of {summary['model_type']} ({summary['model_version']}) already claimed by another worker")
+            return
+    env = {
+        **os.environ,
+        'DRIFT_MODEL_TYPE': summary['model_type'],
+        'DRIFT_MODEL_VERSION': summary['model_version'],
+        'DRIFT_REASONS': ','.join(summary['drift']['reasons'])
+    }
+    try:
+        process = subprocess.Popen(shlex.split(DRIFT_RETRAIN_COMMAND), env=env, start_new_session=True)
+        print(f"🔁 Retraining started for {summary['model_type']} (pid {process.pid}): {DRIFT_RETRAIN_COMMAND}")
+    except Exception as e:
+        print(f"⚠️ Could not start retraining: {e}")
+
+# Streaming prediction/input statistics per served model version
+drift_monitor = DriftMonitor(on_drift=trigger_retraining)
+
+def prewarm():
+    """Import heavy modules and load the model before the first request"""
+    try:
+        preload(pd, np, joblib, yf)
+        get_newsapi()
+        loaded = load_prediction_model()
+        print(f"🔥 Pre-warm complete (model source: {loaded[2] if loaded else 'None'})")
+    except Exception as e:
+        print(f"⚠️ Pre-warm failed: {e}")
+
+def record_prediction_route(symbol, model_type, model_version, hist):
+    """Count the model route and record the prediction's data version (its ETag)"""
+    shard = parse_shard_key(model_type)
+    MODEL_ROUTES.inc(shard=shard[1] if shard else 'global')
+    data_versions.record(('prediction', symbol.upper()), f"{model_type}:{model_version}:{last_bar_version(hist)}")
+
+def serving_row(symbol, hist):
+    """Same feature row training sees: stored, or extended from the stored state"""
+    with STAGE_LATENCY.time(stage='feature_build'):
+        return feature_store.online_row(symbol, hist)
+
+def model_features(latest_data, metadata):
+    """The model's input columns of a serving row, at the precision it was trained with"""
+    features = latest_data[metadata.get('numeric_features', [])]
+    if metadata.get('precision') == 'float32':
+        features = features.astype(np.float32)
+    return features
+
+def observe_prediction(symbol, model_type, model_version, metadata, hist, latest_data, prediction,
+                       predict_seconds, features=None):
+    """Queue a served prediction for the shadow model and the drift monitor (both non-blocking)"""
+    shadow = _shadow
+    if shadow is not None and shadow.model_type == model_type:
+        shadow.submit(symbol, latest_data, hist['Close'], prediction, predict_seconds)
+    if features is None:
+        features = model_features(latest_data, metadata)
+    drift_monitor.observe(model_type, model_version, metadata, features, prediction)
+
+def generate_prediction(symbol):
+    """Generate ML prediction for stock"""
+    try:
+        model_type, loaded = route_prediction_model(symbol)
+        if loaded is None:
+            PREDICTION_FALLBACKS.inc(reason='no_model')
+            return generate_simple_prediction(symbol)
+        pipeline, metadata, model_source, model_version = loaded
 
         # Get historical data
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period='3mo')
+        hist = fetch_history(symbol, '3mo')
 
         if hist.empty:
             return None
 
-        # Calculate technical indicators
-        df = calculate_technical_indicators(hist)
-
-        # Get latest features (simplified - in production, match training features)
-        latest_data = df.iloc[-1:].copy()
+        # Same model and bars give the same prediction: serve it without predicting again
+        cache_key = prediction_key(model_type, model_version, symbol, hist)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            # Hits are served predictions too: drift and shadow see the same row and value
+            latest_data = cached.row if cached.row is not None else serving_row(symbol, hist)
+            observe_prediction(symbol, model_type, model_version, metadata, hist, latest_data,
+                               cached.prediction, cached.predict_seconds)
+            record_prediction_route(symbol, model_type, model_version, hist)
+            return cached.payload
 
-        # Create feature dict matching training data
-        feature_cols = metadata.get('numeric_features', [])
+        latest_data = serving_row(symbol, hist)
+        features = model_features(latest_data, metadata)
 
         # For demo, create a simplified prediction using the trained model
         try:
             # Use the trained model for prediction
-            prediction = pipeline.predict(latest_data[feature_cols])
+            predict_start = time.perf_counter()
+            with STAGE_LATENCY.time(stage='predict'):
+                prediction = pipeline.predict(features)
+            predict_seconds = time.perf_counter() - predict_start
+
+            if len(prediction) > 0:
+                observe_prediction(symbol, model_type, model_version, metadata, hist, latest_data,
+                                   prediction[0], predict_seconds, features)
+
             confidence_score = 0.85  # Default confidence
 
             # Generate forecast data using the model prediction
@@ -223,7 +455,8 @@ def generate_prediction(symbol):
                     # Gradual convergence to model prediction
                     predicted_price = last_price * (1 + (prediction[0] - current_price) / current_price * 0.1)
 
-                future_date = datetime.now() + timedelta(days=i)
+                # Dated from the last bar, not the clock, so the result only depends on the bars
+                future_date = hist.index[-1] + timedelta(days=i)
 
                 predicted_data.append({
                     'date': future_date.strftime('%Y-%m-%d'),
@@ -250,9 +483,11 @@ def generate_prediction(symbol):
             trend = "rise" if expected_growth > 0 else "fall"
             volatility_level = "moderate"
 
+            record_prediction_route(symbol, model_type, model_version, hist)
+
             insight = f"ML model predicts {symbol} may {trend} {abs(expected_growth):.1f}% over the next 7 days with {confidence_score*100:.0f}% confidence."
 
-            return {
+            result = {
                 'symbol': symbol.upper(),
                 'actual': actual_data,
                 'predicted': predicted_data,
@@ -261,22 +496,27 @@ def generate_prediction(symbol):
                 'expectedGrowth': round(float(expected_growth), 2),
                 'volatility': round(float(volatility * 100), 2),
                 'modelUsed': 'ML_Model',
-                'modelSource': model_source
+                'modelSource': model_source,
+                'modelType': model_type
             }
+            if len(prediction) > 0:
+                prediction_cache.set(cache_key, result, prediction[0], predict_seconds, latest_data)
+            return result
 
         except Exception as e:
             print(f"Error using ML model: {e}")
+            PREDICTION_FALLBACKS.inc(reason='model_error')
             return generate_simple_prediction(symbol)
 
     except Exception as e:
         print(f"Error generating prediction: {e}")
+        PREDICTION_FALLBACKS.inc(reason='pipeline_error')
         return generate_simple_prediction(symbol)
 
 def generate_simple_prediction(symbol):
     """Generate simple statistical prediction when ML model unavailable"""
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period='3mo')
+        hist = fetch_history(symbol, '3mo')
         
         if hist.empty:
             return None
@@ -360,11 +600,12 @@ def get_news_for_stock(symbol):
     try:
         # Fetch news directly from Yahoo Finance
         ticker = yf.Ticker(symbol)
-        company_name = ticker.info.get('longName', symbol)
+        company_name = quote_service.get_profiles([symbol.upper()])[symbol.upper()]['name']
         
         # Get news from yfinance
         try:
-            news = ticker.news
+            news = cached_fetch(_news_cache, symbol.upper(), lambda: upstream_request('news', lambda: ticker.news),
+                                is_empty=lambda articles: not articles)
         except:
             news = []
         
@@ -474,11 +715,30 @@ def get_news_for_stock(symbol):
             }
         ]
 
+if PREWARM:
+    threading.Thread(target=prewarm, name='prewarm', daemon=True).start()
+
+if MODEL_EVENTS_LISTEN:
+    model_events = ModelEventListener(handle_model_event).start()
+
+if SHADOW_MODEL_ID:
+    start_shadow(SHADOW_MODEL_ID, SHADOW_MODEL_TYPE)
+
 # =============================
 # API ROUTES
 # =============================
 
+def history_version(symbol):
+    return data_versions.get(('history', symbol.upper(), request.args.get('range', '1M')))
+
+def prediction_version(symbol):
+    return data_versions.get(('prediction', symbol.upper()))
+
+def bulk_quote_version():
+    return quote_service.version(parse_symbols(request.args.get('symbols'))) or None
+
 @app.route('/api/stock/<symbol>', methods=['GET'])
+@cached_route(*QUOTE_CACHE_POLICY, version=lambda symbol: quote_service.version([symbol]))
 def get_stock(symbol):
     """Get current stock data"""
     data = get_stock_data(symbol)
@@ -486,7 +746,24 @@ def get_stock(symbol):
         return jsonify(data)
     return jsonify({'error': 'Stock not found'}), 404
 
+@app.route('/api/stocks', methods=['GET'])
+@cached_route(*QUOTE_CACHE_POLICY, version=bulk_quote_version)
+def get_stocks():
+    """Get current stock data for many symbols in one request"""
+    symbols = parse_symbols(request.args.get('symbols'))
+    if not symbols:
+        return jsonify({'error': 'symbols parameter required'}), 400
+    if len(symbols) > MAX_BULK_SYMBOLS:
+        return jsonify({'error': f'At most {MAX_BULK_SYMBOLS} symbols per request'}), 400
+
+    quotes, errors = quote_service.get_quotes(symbols)
+    return jsonify({
+        'quotes': [quotes[s] for s in symbols if s in quotes],
+        'errors': errors
+    })
+
 @app.route('/api/stock/<symbol>/history', methods=['GET'])
+@cached_route(*HISTORY_CACHE_POLICY, version=history_version)
 def get_history(symbol):
     """Get historical stock data"""
     range_str = request.args.get('range', '1M')
@@ -494,20 +771,57 @@ def get_history(symbol):
     return jsonify(data)
 
 @app.route('/api/predict/<symbol>', methods=['GET'])
+@cached_route(*PREDICTION_CACHE_POLICY, version=prediction_version)
 def predict(symbol):
     """Get stock prediction"""
     prediction = generate_prediction(symbol)
     if prediction:
+        if served_stale():
+            prediction['stale'] = True
+        PREDICTIONS.inc(model=prediction.get('modelUsed', 'unknown'))
+        stream_hub.publish(symbol, 'prediction', prediction)
         return jsonify(prediction)
     return jsonify({'error': 'Unable to generate prediction'}), 500
 
+@app.route('/api/stream', methods=['GET'])
+def stream_quotes():
+    """Stream quote and prediction updates as Server-Sent Events"""
+    symbols = parse_symbols(request.args.get('symbols'))
+    if not symbols:
+        return jsonify({'error': 'symbols parameter required'}), 400
+
+    try:
+        subscription = stream_hub.subscribe(symbols)
+    except StreamLimitError as e:
+        return jsonify({'error': str(e)}), 503
+
+    def event_stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while not subscription.closed:
+                event = subscription.next_event(timeout=STREAM_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                else:
+                    yield format_sse(event)
+        finally:
+            stream_hub.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/news/<symbol>', methods=['GET'])
+@cached_route(*NEWS_CACHE_POLICY)
 def get_news(symbol):
     """Get news for stock"""
     news = get_news_for_stock(symbol)
     return jsonify(news)
 
 @app.route('/api/compare', methods=['GET'])
+@cached_route(*COMPARE_CACHE_POLICY)
 def compare_stocks():
     """Compare two stocks"""
     symbol1 = request.args.get('symbol1')
@@ -523,23 +837,23 @@ def compare_stocks():
     if not stock1_data or not stock2_data:
         return jsonify({'error': 'One or both stocks not found'}), 404
     
-    # Get historical data for comparison
-    hist1 = get_stock_history(symbol1, '1M')
-    hist2 = get_stock_history(symbol2, '1M')
+    # Get aligned historical data for comparison
+    prices = fetch_close_prices([symbol1.upper(), symbol2.upper()], '1M')
+    aligned = prices.ffill().dropna()
     
     # Combine chart data
     chart_data = []
-    for i in range(min(len(hist1), len(hist2))):
+    for date, price1, price2 in zip(aligned.index, aligned.iloc[:, 0], aligned.iloc[:, 1]):
         chart_data.append({
-            'date': hist1[i]['date'],
-            'price1': hist1[i]['price'],
-            'price2': hist2[i]['price']
+            'date': date.strftime('%Y-%m-%d'),
+            'price1': round(float(price1), 2),
+            'price2': round(float(price2), 2)
         })
     
     # Calculate comparison metrics
-    if len(hist1) >= 7 and len(hist2) >= 7:
-        seven_day_change1 = ((hist1[-1]['price'] - hist1[-7]['price']) / hist1[-7]['price']) * 100
-        seven_day_change2 = ((hist2[-1]['price'] - hist2[-7]['price']) / hist2[-7]['price']) * 100
+    if len(aligned) >= 7:
+        seven_day_change1 = ((aligned.iloc[-1, 0] - aligned.iloc[-7, 0]) / aligned.iloc[-7, 0]) * 100
+        seven_day_change2 = ((aligned.iloc[-1, 1] - aligned.iloc[-7, 1]) / aligned.iloc[-7, 1]) * 100
     else:
         seven_day_change1 = stock1_data['changePercent']
         seven_day_change2 = stock2_data['changePercent']
@@ -554,14 +868,49 @@ def compare_stocks():
         'symbol2': stock2_data,
         'chartData': chart_data,
         'comparison': {
-            'sevenDayChange1': round(seven_day_change1, 2),
-            'sevenDayChange2': round(seven_day_change2, 2),
+            'sevenDayChange1': round(float(seven_day_change1), 2),
+            'sevenDayChange2': round(float(seven_day_change2), 2),
             'oneMonthTrend1': one_month_trend1,
             'oneMonthTrend2': one_month_trend2,
             'marketCapDiff': market_cap_diff
-        }
+        },
+        **({'stale': True} if served_stale() else {})
     })
 
+@app.route('/api/compare/multi', methods=['GET'])
+@cached_route(*COMPARE_CACHE_POLICY)
+def compare_many():
+    """Compare N stocks on a date-aligned index"""
+    symbols = parse_symbols(request.args.get('symbols'))
+    range_str = request.args.get('range', '1M')
+    benchmark = request.args.get('benchmark', '').upper() or None
+
+    try:
+        window = int(request.args.get('window', DEFAULT_WINDOW))
+    except ValueError:
+        return jsonify({'error': 'window must be an integer'}), 400
+
+    if len(symbols) < 2:
+        return jsonify({'error': 'At least two symbols required'}), 400
+    if len(symbols) > MAX_COMPARE_SYMBOLS:
+        return jsonify({'error': f'At most {MAX_COMPARE_SYMBOLS} symbols can be compared'}), 400
+    if window < 2:
+        return jsonify({'error': 'window must be at least 2'}), 400
+
+    try:
+        payload, missing = compare_symbols(symbols, range_str, window=window, benchmark=benchmark)
+    except BenchmarkError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error comparing {symbols}: {e}")
+        return jsonify({'error': 'Unable to compare stocks'}), 500
+
+    if payload is None:
+        return jsonify({'error': 'No data found for requested symbols', 'missing': missing}), 404
+    if served_stale():
+        payload['stale'] = True
+    return jsonify(payload)
+
 @app.route('/api/models/save', methods=['POST'])
 def save_model():
     """Save trained model to database"""
@@ -572,6 +921,7 @@ def save_model():
         name = data.get('name', 'Stock Prediction Model')
         version = data.get('version', '1.0.0')
         description = data.get('description', 'Auto-generated model')
+        activate = bool(data.get('activate', True))
 
         if not os.path.exists(model_path):
             return jsonify({'error': 'Model file not found'}), 404
@@ -582,23 +932,70 @@ def save_model():
             model_type=model_type,
             name=name,
             version=version,
-            description=description
+            description=description,
+            activate=activate
         )
 
+        # Serve the new model (and any new shard) without waiting for the TTLs
+        _model_cache.delete(model_type)
+        model_router.invalidate()
+
         return jsonify({
             'success': True,
             'model_id': model_id,
+            'active': activate,
             'message': 'Model saved to database successfully'
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/models/<model_id>/activate', methods=['POST'])
+def activate_model(model_id):
+    """Atomically make a model version the active one of its type"""
+    try:
+        result = ModelDB().activate_model(model_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if result is None:
+        return jsonify({'error': 'Model not found'}), 404
+
+    # Other workers reload on the NOTIFY; this one reloads right away
+    handle_model_event({'event': 'activated', 'model_type': result['model_type'], 'model_id': model_id})
+    return jsonify({'success': True, **result})
+
+@app.route('/api/models/shadow', methods=['GET', 'POST', 'DELETE'])
+def shadow_model():
+    """Show, start or stop shadow evaluation of a candidate model"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        candidate_id = data.get('model_id')
+        if not candidate_id:
+            return jsonify({'error': 'model_id required'}), 400
+        shadow = start_shadow(candidate_id, data.get('model_type', BASE_MODEL_TYPE))
+        return jsonify(shadow.summary())
+
+    if request.method == 'DELETE':
+        stopped = stop_shadow()
+        if stopped is None:
+            return jsonify({'error': 'No shadow model running'}), 404
+        return jsonify(stopped.summary())
+
+    shadow = _shadow
+    if shadow is None:
+        return jsonify({'active': False})
+    return jsonify({'active': True, **shadow.summary()})
+
+@app.route('/api/models/drift', methods=['GET'])
+def model_drift():
+    """Running drift statistics of the model versions this worker has served"""
+    include_features = request.args.get('features', '1') != '0'
+    return jsonify(drift_monitor.summary(request.args.get('type'), include_features=include_features))
+
 @app.route('/api/models/list', methods=['GET'])
 def list_models():
     """List all models in database"""
     try:
-        from database import ModelDB
         db = ModelDB()
         model_type = request.args.get('type')
 
@@ -608,6 +1005,11 @@ def list_models():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(registry.render(), mimetype=None, content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -647,7 +1049,7 @@ def health_check():
         'model_status': model_status,
         'model_type': model_type,
         'model_source': model_source,
-        'news_api_configured': newsapi is not None
+        'news_api_configured': NEWS_API_CONFIGURED
     })
 
 if __name__ == '__main__':
@@ -667,7 +1069,8 @@ if __name__ == '__main__':
             print("Model type: Statistical_Model")
     else:
         print("Model type: Statistical_Model")
-    print(f"NewsAPI configured: {newsapi is not None}")
+    print(f"NewsAPI configured: {NEWS_API_CONFIGURED}")
+    print(f"Pre-warm: {PREWARM}")
     print("=" * 50)
 
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Backfill daily price history for a universe of symbols
+
+Reads a universe file (one symbol per line, '#' comments allowed, or a
+.csv with a Symbol/Ticker column), splits it into chunks and downloads
+each chunk with one bulk `yf.download` call. At most --workers chunks are
+in flight, and every call still goes through the upstream rate budget and
+circuit breaker (upstream.py). Bars are merged into the local Parquet
+price store (price_store.py), and the feature rows of the new bars are
+materialized (feature_store.py). After each chunk, progress is written to a
+checkpoint file, so an interrupted run resumes where it stopped. Symbols
+that failed are retried on the next run.
+
+Usage (from backend/):
+    python backfill.py universe.txt --period max --chunk-size 50 --workers 4
+    python backfill.py universe.csv --start 2015-01-01 --store data/prices
+    python backfill.py universe.txt --restart        # ignore the checkpoint
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+import yfinance as yf
+
+import upstream
+from feature_store import FeatureStore, FEATURE_STORE_DIR
+from price_store import PriceStore, PRICE_STORE_DIR
+from quotes import bars_for_symbol
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_WORKERS = 4
+# Bulk downloads of long histories take far longer than the API's per-call timeout
+DEFAULT_TIMEOUT_SECONDS = 120
+CHECKPOINT_FILE = '_backfill_checkpoint.json'
+
+
+# =============================
+# UNIVERSE
+# =============================
+def load_universe(path):
+    """Unique upper-case symbols from a text or CSV universe file, in file order"""
+    if path.endswith('.csv'):
+        df = pd.read_csv(path)
+        column = next((c for c in df.columns if c.strip().lower() in ('symbol', 'ticker')), df.columns[0])
+        raw = df[column].dropna().astype(str).tolist()
+    else:
+        raw = []
+        with open(path) as f:
+            for line in f:
+                line = line.split('#', 1)[0]
+                raw.extend(part for part in line.replace(',', ' ').split())
+
+    symbols = []
+    seen = set()
+    for symbol in raw:
+        symbol = symbol.strip().upper()
+        if symbol and symbol not in seen:
+            seen.add(symbol)
+            symbols.append(symbol)
+    return symbols
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# =============================
+# CHECKPOINT
+# =============================
+class Checkpoint:
+    """
+    Completed and failed symbols of a backfill, saved as JSON after every chunk
+
+    A checkpoint only applies to the run that wrote it: one made with a
+    different period/start/end is ignored, so those symbols are downloaded again.
+    """
+
+    def __init__(self, path, request):
+        self.path = path
+        self.request = request
+        self.completed = {}
+        self.failed = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            state = json.load(f)
+        if state.get('request') != self.request:
+            print(f"⚠️ Checkpoint {self.path} is for {state.get('request')}, starting over")
+            return False
+        self.completed = state.get('completed', {})
+        self.failed = state.get('failed', {})
+        return True
+
+    def record(self, completed, failed):
+        """Mark symbols done ({symbol: stored bars}) or failed ({symbol: error}) and save"""
+        with self._lock:
+            self.completed.update(completed)
+            for symbol in completed:
+                self.failed.pop(symbol, None)
+            self.failed.update(failed)
+            state = {
+                'request': self.request,
+                'updated_at': datetime.now().isoformat(),
+                'completed': self.completed,
+                'failed': self.failed
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+
+
+# =============================
+# DOWNLOAD
+# =============================
+def download_chunk(symbols, store, history_kwargs, features=None):
+    """
+    Download one chunk of symbols in a single request and store their bars
+
+    With a feature store, feature rows are then added for the new bars.
+
+    Returns:
+        Tuple of ({symbol: stored bars}, {symbol: error}, bars downloaded)
+    """
+    try:
+        with upstream.priority(upstream.BACKGROUND):
+            data = upstream.upstream_request('download', lambda: yf.download(
+                symbols,
+                group_by='ticker',
+                auto_adjust=False,
+                progress=False,
+                threads=False,
+                **history_kwargs
+            ))
+    except Exception as e:
+        return {}, {symbol: str(e) or type(e).__name__ for symbol in symbols}, 0
+
+    completed, failed, downloaded = {}, {}, 0
+    for symbol in symbols:
+        bars = bars_for_symbol(data, symbol, len(symbols))
+        if bars is None or bars.empty:
+            failed[symbol] = 'No data returned'
+            continue
+        try:
+            completed[symbol] = store.write(symbol, bars)
+            downloaded += len(bars)
+        except Exception as e:
+            failed[symbol] = f'Write failed: {e}'
+
+    if features is not None and completed:
+        try:
+            features.materialize(list(completed))
+        except Exception as e:
+            print(f"⚠️ Could not materialize features for {list(completed)}: {e}")
+    return completed, failed, downloaded
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+# =============================
+# MAIN
+# =============================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('universe', help='Symbols file (.txt one per line, or .csv with a Symbol column)')
+    parser.add_argument('--store', default=PRICE_STORE_DIR, help='Price store directory')
+    parser.add_argument('--features', default=FEATURE_STORE_DIR, help='Feature store directory')
+    parser.add_argument('--skip-features', action='store_true', help='Only store bars, do not materialize features')
+    parser.add_argument('--period', default='max', help='yfinance period when --start is not given')
+    parser.add_argument('--start', help='First date to download (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last date to download (YYYY-MM-DD, exclusive)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Symbols per bulk request')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Bulk requests in flight')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT_SECONDS, help='Seconds per bulk request')
+    parser.add_argument('--checkpoint', help=f'Checkpoint path (default: <store>/{CHECKPOINT_FILE})')
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+    args = parser.parse_args()
+
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error('--chunk-size and --workers must be at least 1')
+
+    symbols = load_universe(args.universe)
+    if not symbols:
+        parser.error(f"No symbols found in {args.universe}")
+
+    history_kwargs = {'start': args.start} if args.start else {'period': args.period}
+    if args.end:
+        history_kwargs['end'] = args.end
+    upstream.timeouts['yahoo'] = args.timeout
+
+    store = PriceStore(args.store)
+    features = None if args.skip_features else FeatureStore(args.features, prices=store)
+    checkpoint = Checkpoint(args.checkpoint or os.path.join(args.store, CHECKPOINT_FILE), history_kwargs)
+    if not args.restart and checkpoint.load():
+        print(f"♻️ Resuming: {len(checkpoint.completed)} symbols already done, "
+              f"{len(checkpoint.failed)} failed last time will be retried")
+    pending = [s for s in symbols if s not in checkpoint.completed]
+    chunks = chunked(pending, args.chunk_size)
+
+    print("=" * 72)
+    print(f"📥 Backfilling {len(pending)} of {len(symbols)} symbols ({history_kwargs}) into {args.store}")
+    print(f"   {len(chunks)} chunks of ≤{args.chunk_size}, {args.workers} workers")
+    print("=" * 72)
+
+    start = time.perf_counter()
+    done = failed = bars_total = 0
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='backfill') as pool:
+        futures = [pool.submit(download_chunk, chunk, store, history_kwargs, features) for chunk in chunks]
+        for future in as_completed(futures):
+            completed, errors, downloaded = future.result()
+            checkpoint.record(completed, errors)
+            done += len(completed) + len(errors)
+            failed += len(errors)
+            bars_total += downloaded
+
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed else 0.0
+            eta = (len(pending) - done) / rate if rate else 0.0
+            print(f"  [{done}/{len(pending)}] +{len(completed)} ok, +{len(errors)} failed | "
+                  f"{rate:.1f} symbols/s, {bars_total / elapsed if elapsed else 0:,.0f} bars/s | "
+                  f"ETA {format_duration(eta)}")
+            for symbol, error in list(errors.items())[:3]:
+                print(f"     ⚠️ {symbol}: {error}")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ {done - failed} symbols stored, {failed} failed, {bars_total:,} bars "
+          f"in {format_duration(elapsed)} ({bars_total / elapsed if elapsed else 0:,.0f} bars/s)")
+    print(f"📁 Price store: {args.store}/ ({len(store.symbols())} symbols)")
+    if checkpoint.failed:
+        print(f"♻️ Re-run the same command to retry {len(checkpoint.failed)} failed symbols")
+
+
+if __name__ == '__main__':
+    main()
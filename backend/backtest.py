@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Walk-forward backtest of the prediction model across many symbols
+
+Replays what /api/predict would have answered on every past date. The
+inputs are the feature rows serving reads (feature_store.py), and the
+prediction is scored against the close 7 bars later (Target_Close_7d).
+The interval is the one generate_prediction serves: ±2 standard
+deviations of the daily returns over the last 3 months of bars.
+
+  --mode retrain  for each window of --test-bars dates, fit a fresh model
+                  on the symbol's rows before it (expanding, or the last
+                  --train-bars), leaving out the last --horizon rows whose
+                  target was not known yet, then predict the whole window
+                  in one call
+  --mode reuse    load the deployed model (--model-dir) once and predict
+                  every date of the symbol in one call
+
+Symbols run in parallel worker processes. For each symbol, the report
+gives MAE, MAPE, the MAE of the naive "no change" forecast, the direction
+hit-rate and the interval coverage.
+
+Usage (from backend/):
+    python backtest.py --mode retrain --test-bars 63 --train-bars 756 --workers 8
+    python backtest.py --mode reuse --model-dir model_artifacts --start 2022-01-01
+    python backtest.py --symbols AAPL,MSFT --predictions data/backtests/preds.parquet
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from feature_store import FeatureStore, FEATURE_STORE_DIR, INDICATOR_COLUMNS, EMA_STATE_COLUMNS
+from ml_pipeline import build_pipeline, TARGET_COL, DEFAULT_ESTIMATOR
+
+RESULTS_DIR = os.path.join('data', 'backtests')
+MODEL_DIR = "model_artifacts"
+TARGET_HORIZON = 7
+# generate_prediction's interval: ±2σ of daily returns over 3 months of bars
+VOLATILITY_BARS = 63
+INTERVAL_WIDTH = 2
+DEFAULT_TEST_BARS = 63
+DEFAULT_MIN_TRAIN_BARS = 252
+
+
+# =============================
+# DATA
+# =============================
+def load_symbol_rows(features, symbol, horizon=TARGET_HORIZON):
+    """Feature rows of a symbol with the realized target and the serving-time volatility"""
+    rows = features.read(symbol)
+    if rows is None or rows.empty:
+        return None
+    rows[TARGET_COL] = rows['Close'].shift(-horizon)
+    rows['Volatility'] = rows['Close'].pct_change().rolling(window=VOLATILITY_BARS - 1).std()
+    return rows.dropna(subset=INDICATOR_COLUMNS + ['Volatility'])
+
+
+def feature_columns(rows):
+    return [c for c in rows.select_dtypes(include=[np.number]).columns
+            if c not in (TARGET_COL, 'Volatility') and c not in EMA_STATE_COLUMNS]
+
+
+# =============================
+# SCORING
+# =============================
+def score(rows, predictions):
+    """Per-row outcome of predictions made on `rows` (only rows whose target is known)"""
+    scored = pd.DataFrame({
+        'Close': rows['Close'],
+        'Predicted': predictions,
+        'Actual': rows[TARGET_COL],
+        'Lower': predictions * (1 - INTERVAL_WIDTH * rows['Volatility']),
+        'Upper': predictions * (1 + INTERVAL_WIDTH * rows['Volatility'])
+    }, index=rows.index)
+    return scored.dropna(subset=['Actual'])
+
+
+def summarize(scored):
+    """MAE, MAPE, naive MAE, direction hit-rate and interval coverage of scored rows"""
+    if scored.empty:
+        return {'n': 0}
+    predicted, actual, close = (scored[c].to_numpy() for c in ('Predicted', 'Actual', 'Close'))
+    error = np.abs(predicted - actual)
+    moved = actual != close
+    return {
+        'n': len(scored),
+        'mae': float(error.mean()),
+        'mape': float((error / np.abs(actual)).mean() * 100),
+        'naive_mae': float(np.abs(close - actual).mean()),
+        'hit_rate': float((np.sign(predicted - close) == np.sign(actual - close))[moved].mean()) if moved.any() else None,
+        'coverage': float(((actual >= scored['Lower'].to_numpy()) & (actual <= scored['Upper'].to_numpy())).mean()),
+        'start': scored.index[0].strftime('%Y-%m-%d'),
+        'end': scored.index[-1].strftime('%Y-%m-%d')
+    }
+
+
+# =============================
+# WALK-FORWARD
+# =============================
+def walk_forward(rows, test_bars, train_bars, min_train_bars, horizon, estimator, params, start=None):
+    """
+    Retrain on the past, predict the next window, slide forward
+
+    Returns:
+        (scored rows, number of models fitted)
+    """
+    features = feature_columns(rows)
+    X, y = rows[features], rows[TARGET_COL]
+    first = max(min_train_bars + horizon, rows.index.searchsorted(pd.Timestamp(start)) if start else 0)
+
+    outcomes, fits = [], 0
+    for window_start in range(first, len(rows), test_bars):
+        # Targets of the last `horizon` rows were not realized yet on the window's first date
+        train_end = window_start - horizon
+        train_start = max(0, train_end - train_bars) if train_bars else 0
+        train_y = y.iloc[train_start:train_end]
+        known = train_y.notna().to_numpy()
+        if known.sum() < min_train_bars:
+            continue
+
+        pipeline = build_pipeline(features, [], estimator=estimator, **params)
+        pipeline.fit(X.iloc[train_start:train_end][known], train_y[known])
+        fits += 1
+
+        window = rows.iloc[window_start:window_start + test_bars]
+        outcomes.append(score(window, pipeline.predict(X.iloc[window_start:window_start + test_bars])))
+
+    return (pd.concat(outcomes) if outcomes else pd.DataFrame()), fits
+
+
+def reuse_model(rows, pipeline, metadata, start=None):
+    """Predict every date with one deployed model in a single call"""
+    if start:
+        rows = rows[rows.index >= pd.Timestamp(start)]
+    features = metadata.get('numeric_features', []) + metadata.get('categorical_features', [])
+    missing = [c for c in features if c not in rows.columns]
+    if missing:
+        raise KeyError(f"Model features not in the feature store: {missing}")
+    X = rows[features]
+    if metadata.get('precision') == 'float32':
+        X = X.astype(np.float32)
+    return score(rows, pipeline.predict(X))
+
+
+def model_artifacts(model_dir):
+    """(pipeline path, metadata path) of a trained model directory"""
+    return os.path.join(model_dir, 'stock_model_pipeline.pkl'), os.path.join(model_dir, 'metadata.pkl')
+
+
+def backtest_symbols(symbols, features_dir, options):
+    """Backtest a batch of symbols; runs in a worker process"""
+    features = FeatureStore(features_dir)
+    pipeline = metadata = None
+    if options['mode'] == 'reuse':
+        pipeline_path, metadata_path = model_artifacts(options['model_dir'])
+        pipeline, metadata = joblib.load(pipeline_path), joblib.load(metadata_path)
+
+    results = []
+    for symbol in symbols:
+        started = time.perf_counter()
+        try:
+            rows = load_symbol_rows(features, symbol, options['horizon'])
+            if rows is None:
+                raise LookupError('No materialized feature rows')
+            if options['mode'] == 'reuse':
+                scored, fits = reuse_model(rows, pipeline, metadata, options['start']), 0
+            else:
+                scored, fits = walk_forward(rows, options['test_bars'], options['train_bars'],
+                                            options['min_train_bars'], options['horizon'],
+                                            options['estimator'], options['params'], options['start'])
+        except Exception as e:
+            results.append({'symbol': symbol, 'error': str(e)})
+            continue
+        results.append({
+            'symbol': symbol,
+            'fits': fits,
+            'seconds': round(time.perf_counter() - started, 2),
+            **summarize(scored),
+            'predictions': scored.assign(Ticker=symbol) if options['keep_predictions'] else None
+        })
+    return results
+
+
+# =============================
+# MAIN
+# =============================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--features', default=FEATURE_STORE_DIR, help='Feature store directory')
+    parser.add_argument('--symbols', help='Comma separated subset of materialized symbols')
+    parser.add_argument('--mode', choices=['retrain', 'reuse'], default='retrain')
+    parser.add_argument('--model-dir', default=MODEL_DIR, help='Deployed model for --mode reuse')
+    parser.add_argument('--start', help='First as-of date to score (YYYY-MM-DD)')
+    parser.add_argument('--test-bars', type=int, default=DEFAULT_TEST_BARS, help='Dates per walk-forward window')
+    parser.add_argument('--train-bars', type=int, default=0, help='Rolling training window (0 = expanding)')
+    parser.add_argument('--min-train-bars', type=int, default=DEFAULT_MIN_TRAIN_BARS,
+                        help='Rows with a known target needed before the first window')
+    parser.add_argument('--horizon', type=int, default=TARGET_HORIZON, help='Bars between a date and its target')
+    parser.add_argument('--estimator', default=DEFAULT_ESTIMATOR, help='Name from ml_pipeline.ESTIMATORS')
+    parser.add_argument('--n-estimators', type=int, default=50, help='Trees per forest (random_forest)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel worker processes')
+    parser.add_argument('--batch-symbols', type=int, default=4, help='Symbols per worker task')
+    parser.add_argument('--output', help='Report JSON path (default: data/backtests/backtest-<timestamp>.json)')
+    parser.add_argument('--predictions', help='Also write every scored prediction to this Parquet file')
+    args = parser.parse_args()
+
+    symbols = FeatureStore(args.features).symbols()
+    if args.symbols:
+        wanted = {s.strip().upper() for s in args.symbols.split(',') if s.strip()}
+        symbols = [s for s in symbols if s in wanted]
+    if not symbols:
+        parser.error(f"No materialized symbols in {args.features} (run backfill.py or build_dataset.py first)")
+    if args.mode == 'reuse':
+        missing = [path for path in model_artifacts(args.model_dir) if not os.path.exists(path)]
+        if missing:
+            parser.error(f"--mode reuse needs a trained model in {args.model_dir} (missing {', '.join(missing)})")
+
+    params = {'n_estimators': args.n_estimators, 'n_jobs': 1} if args.estimator == 'random_forest' else {}
+    options = {
+        'mode': args.mode, 'model_dir': args.model_dir, 'start': args.start, 'horizon': args.horizon,
+        'test_bars': args.test_bars, 'train_bars': args.train_bars, 'min_train_bars': args.min_train_bars,
+        'estimator': args.estimator, 'params': params, 'keep_predictions': bool(args.predictions)
+    }
+    batches = [symbols[i:i + args.batch_symbols] for i in range(0, len(symbols), args.batch_symbols)]
+    print(f"🔁 Backtesting {len(symbols)} symbols ({args.mode}, {args.estimator}) with {args.workers} workers")
+
+    start = time.perf_counter()
+    results, predictions = [], []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(backtest_symbols, batch, args.features, options) for batch in batches]
+        for future in as_completed(futures):
+            for result in future.result():
+                scored = result.pop('predictions', None)
+                if scored is not None:
+                    predictions.append(scored)
+                results.append(result)
+                if 'error' in result:
+                    print(f"  ❌ {result['symbol']}: {result['error']}")
+                elif result['n']:
+                    print(f"  ✅ {result['symbol']:<8} n={result['n']:<6} MAE {result['mae']:.3f} "
+                          f"(naive {result['naive_mae']:.3f})  hit {result['hit_rate'] or 0:.1%}  "
+                          f"coverage {result['coverage']:.1%}  {result['fits']} fits, {result['seconds']}s")
+    elapsed = time.perf_counter() - start
+
+    scored_results = [r for r in results if r.get('n')]
+    total = sum(r['n'] for r in scored_results)
+    overall = {'symbols': len(scored_results), 'predictions': total, 'seconds': round(elapsed, 2)}
+    if total:
+        for key in ('mae', 'mape', 'naive_mae', 'coverage'):
+            overall[key] = sum(r[key] * r['n'] for r in scored_results) / total
+        hit = [r for r in scored_results if r['hit_rate'] is not None]
+        overall['hit_rate'] = sum(r['hit_rate'] * r['n'] for r in hit) / sum(r['n'] for r in hit) if hit else None
+
+    print("\n" + "=" * 72)
+    if total:
+        print(f"📊 {total:,} predictions over {len(scored_results)} symbols in {elapsed:.1f}s "
+              f"({total / elapsed:,.0f} predictions/s)")
+        print(f"   MAE {overall['mae']:.3f} (naive {overall['naive_mae']:.3f}), MAPE {overall['mape']:.2f}%, "
+              f"hit-rate {overall['hit_rate'] or 0:.1%}, coverage {overall['coverage']:.1%}")
+    else:
+        print("⚠️ Nothing was scored")
+
+    report = {
+        'run_at': datetime.now().isoformat(),
+        'config': {k: v for k, v in options.items() if k != 'keep_predictions'},
+        'overall': overall,
+        'symbols': sorted(results, key=lambda r: r['symbol'])
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"backtest-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Saved report to: {output}")
+
+    if predictions:
+        os.makedirs(os.path.dirname(os.path.abspath(args.predictions)), exist_ok=True)
+        pd.concat(predictions).rename_axis('Date').reset_index().to_parquet(args.predictions, index=False)
+        print(f"💾 Saved predictions to: {args.predictions}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for the Flask API
+
+Drives the real app through Flask's test client with Yahoo Finance and the
+model database replaced by offline stand-ins (see market_stub.py). Each
+route is hit at the configured concurrency and throughput plus p50/p95/p99
+latency are reported. Results are written as JSON; pass --compare to diff
+against an earlier run and flag regressions.
+
+Usage (from backend/):
+    python benchmarks/api_bench.py --requests 200 --concurrency 8
+    python benchmarks/api_bench.py --compare benchmarks/results/<previous>.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import market_stub
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_SYMBOLS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA', 'JPM']
+
+
+def build_scenarios(symbols):
+    """Route name -> function(i) returning the i-th request path"""
+    def rotate(fmt):
+        return lambda i: fmt.format(s=symbols[i % len(symbols)], t=symbols[(i + 1) % len(symbols)])
+
+    scenarios = {
+        'stock': rotate('/api/stock/{s}'),
+        'stocks_bulk': lambda i: '/api/stocks?symbols=' + ','.join(symbols),
+        'predict': rotate('/api/predict/{s}'),
+        'news': rotate('/api/news/{s}'),
+        'compare': rotate('/api/compare?symbol1={s}&symbol2={t}'),
+        'compare_multi': lambda i: '/api/compare/multi?symbols=' + ','.join(symbols) + '&range=1Y',
+        'models_list': lambda i: '/api/models/list',
+        'health': lambda i: '/api/health',
+    }
+    for range_str in ('1M', '6M', '1Y', '5Y'):
+        scenarios[f'history_{range_str}'] = rotate('/api/stock/{s}/history?range=' + range_str)
+    return scenarios
+
+
+def run_scenario(app, path_for, n_requests, concurrency, warmup):
+    """Issue `n_requests` requests with `concurrency` worker threads"""
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client
+
+    def one(i):
+        path = path_for(i)
+        start = time.perf_counter()
+        response = client().get(path)
+        response.get_data()
+        elapsed = time.perf_counter() - start
+        return elapsed, response.status_code, len(response.get_data())
+
+    for i in range(warmup):
+        one(i)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(n_requests)))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([s[0] for s in samples]) * 1000
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    return {
+        'requests': n_requests,
+        'concurrency': concurrency,
+        'wall_time_s': round(wall, 4),
+        'throughput_rps': round(n_requests / wall, 2) if wall > 0 else None,
+        'latency_ms': {
+            'mean': round(float(latencies.mean()), 3),
+            'p50': round(float(np.percentile(latencies, 50)), 3),
+            'p95': round(float(np.percentile(latencies, 95)), 3),
+            'p99': round(float(np.percentile(latencies, 99)), 3),
+            'max': round(float(latencies.max()), 3)
+        },
+        'status_codes': statuses,
+        'mean_response_bytes': int(np.mean([s[2] for s in samples]))
+    }
+
+
+def compare_runs(previous, current, threshold):
+    """Print p95/throughput deltas and return the names of regressed routes"""
+    regressions = []
+    print(f"\n📊 Comparison with previous run ({previous.get('run_at', 'unknown')}):")
+    for name, result in current['results'].items():
+        old = previous.get('results', {}).get(name)
+        if not old:
+            print(f"  {name:<16} (new)")
+            continue
+        p95_delta = (result['latency_ms']['p95'] - old['latency_ms']['p95']) / old['latency_ms']['p95'] * 100
+        rps_delta = (result['throughput_rps'] - old['throughput_rps']) / old['throughput_rps'] * 100
+        flag = ''
+        if p95_delta > threshold:
+            flag = '  ⚠️ REGRESSION'
+            regressions.append(name)
+        print(f"  {name:<16} p95 {p95_delta:+7.1f}%   throughput {rps_delta:+7.1f}%{flag}")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=market_stub.BACKEND_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per route')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent client threads')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per route')
+    parser.add_argument('--routes', help='Comma separated subset of routes to run')
+    parser.add_argument('--symbols', default=','.join(DEFAULT_SYMBOLS), help='Symbols to rotate through')
+    parser.add_argument('--fixtures', help='Directory of <SYMBOL>.csv price fixtures')
+    parser.add_argument('--cold', action='store_true', help='Disable in-process caches (every request goes upstream)')
+    parser.add_argument('--no-model', action='store_true', help='Benchmark predictions without an ML model')
+    parser.add_argument('--upstream-limits', default='',
+                        help="Upstream budget spec like 'yahoo=5/20' (default: unlimited, the stub has no quota)")
+    parser.add_argument('--output', help='Result JSON path (default: benchmarks/results/api-<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous result JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0, help='p95 regression threshold in percent')
+    args = parser.parse_args()
+
+    os.environ['UPSTREAM_LIMITS'] = args.upstream_limits
+    market = market_stub.install(args.fixtures)
+
+    import app
+    from cache import all_caches
+
+    if not args.no_model:
+        market_stub.register_benchmark_model(market)
+    if args.cold:
+        for cache in all_caches():
+            if cache.name != 'models':
+                cache.ttl = 0
+
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    scenarios = build_scenarios(symbols)
+    if args.routes:
+        wanted = [r.strip() for r in args.routes.split(',')]
+        unknown = [r for r in wanted if r not in scenarios]
+        if unknown:
+            parser.error(f"Unknown routes: {unknown}. Available: {sorted(scenarios)}")
+        scenarios = {name: scenarios[name] for name in wanted}
+
+    print("=" * 60)
+    print(f"API benchmark: {args.requests} requests/route, concurrency {args.concurrency}"
+          f"{', cold caches' if args.cold else ''}")
+    print("=" * 60)
+    print(f"{'route':<16}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  status")
+
+    results = {}
+    for name, path_for in scenarios.items():
+        result = run_scenario(app.app, path_for, args.requests, args.concurrency, args.warmup)
+        results[name] = result
+        lat = result['latency_ms']
+        print(f"{name:<16}{result['throughput_rps']:>10.1f}{lat['p50']:>10.2f}{lat['p95']:>10.2f}{lat['p99']:>10.2f}  {result['status_codes']}")
+
+    report = {
+        'run_at': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'symbols': symbols,
+            'cold': args.cold,
+            'model': not args.no_model,
+            'fixtures': args.fixtures
+        },
+        'results': results
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"api-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved results to: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        regressions = compare_runs(previous, report, args.threshold)
+        if regressions:
+            raise SystemExit(f"Regressions detected in: {', '.join(regressions)}")
+
+
+if __name__ == '__main__':
+    main()
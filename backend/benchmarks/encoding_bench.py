@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+JSON encoding and compression benchmark per route
+
+Builds each route's real payload through the Flask app with the offline
+stubs (see market_stub.py), then times every registered JSON encoder
+(response_encoding.JSON_ENCODERS) on it and every available content
+encoding on the encoded bytes. Reports best-of-N encode/compress time and
+bytes on the wire per route. Results are written as JSON.
+
+Usage (from backend/):
+    python benchmarks/encoding_bench.py
+    python benchmarks/encoding_bench.py --routes history_5Y,compare_multi --repeat 50
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import market_stub
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+ROUTES = {
+    'stock': '/api/stock/AAPL',
+    'stocks_bulk': '/api/stocks?symbols=AAPL,MSFT,GOOGL,AMZN,NVDA,META,TSLA,JPM',
+    'history_1M': '/api/stock/AAPL/history?range=1M',
+    'history_1Y': '/api/stock/AAPL/history?range=1Y',
+    'history_5Y': '/api/stock/AAPL/history?range=5Y',
+    'predict': '/api/predict/AAPL',
+    'compare': '/api/compare?symbol1=AAPL&symbol2=MSFT',
+    'compare_multi': '/api/compare/multi?symbols=AAPL,MSFT,GOOGL,AMZN,NVDA,META,TSLA,JPM&range=5Y'
+}
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--routes', help=f'Comma separated subset of: {", ".join(ROUTES)}')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed repetitions (best is reported)')
+    parser.add_argument('--output', help='Result JSON path (default: benchmarks/results/encoding-<timestamp>.json)')
+    args = parser.parse_args()
+
+    routes = [r.strip() for r in args.routes.split(',')] if args.routes else list(ROUTES)
+    unknown = [r for r in routes if r not in ROUTES]
+    if unknown:
+        parser.error(f"Unknown routes: {unknown}")
+
+    market = market_stub.install()
+    import app
+    from response_encoding import JSON_ENCODERS, compress, brotli
+
+    market_stub.register_benchmark_model(market)
+    client = app.app.test_client()
+    encodings = ['gzip'] + (['br'] if brotli is not None else [])
+
+    print("=" * 96)
+    print(f"Encoding benchmark: encoders {sorted(JSON_ENCODERS)}, content encodings {encodings}, best of {args.repeat}")
+    print("=" * 96)
+    header = f"{'route':<15}{'raw KB':>9}" + ''.join(f"{name + ' ms':>13}" for name in JSON_ENCODERS)
+    header += ''.join(f"{enc + ' KB':>10}{enc + ' ms':>10}" for enc in encodings)
+    print(header)
+
+    results = {}
+    for name in routes:
+        response = client.get(ROUTES[name], headers={'Accept-Encoding': 'identity'})
+        if response.status_code != 200:
+            print(f"{name:<15} skipped (HTTP {response.status_code})")
+            continue
+        payload = response.get_json()
+
+        encoders = {}
+        for encoder, encode in JSON_ENCODERS.items():
+            seconds, body = best_of(lambda: encode(payload), args.repeat)
+            encoders[encoder] = {'encode_ms': round(seconds * 1000, 4), 'bytes': len(body)}
+        body = JSON_ENCODERS[app.app.json.encoder](payload)
+
+        compressed = {'identity': {'bytes': len(body), 'compress_ms': 0.0}}
+        for encoding in encodings:
+            seconds, data = best_of(lambda: compress(body, encoding), args.repeat)
+            compressed[encoding] = {
+                'bytes': len(data),
+                'compress_ms': round(seconds * 1000, 4),
+                'ratio': round(len(data) / len(body), 4)
+            }
+
+        results[name] = {'path': ROUTES[name], 'encoders': encoders, 'wire': compressed}
+        line = f"{name:<15}{len(body) / 1024:>9.1f}"
+        line += ''.join(f"{encoders[e]['encode_ms']:>13.3f}" for e in JSON_ENCODERS)
+        line += ''.join(f"{compressed[e]['bytes'] / 1024:>10.1f}{compressed[e]['compress_ms']:>10.3f}" for e in encodings)
+        print(line)
+
+    report = {
+        'run_at': datetime.now().isoformat(),
+        'config': {'repeat': args.repeat, 'default_encoder': app.app.json.encoder, 'encodings': encodings},
+        'results': results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"encoding-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved results to: {output}")
+
+
+if __name__ == '__main__':
+    main()
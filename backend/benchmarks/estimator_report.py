@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Side-by-side comparison of the registered estimators
+
+Every estimator in ml_pipeline.ESTIMATORS is trained inside the same
+Pipeline on the same synthetic data (ml_pipeline.make_sample_dataset),
+with a chronological hold-out split like train_model.py. For each one it
+reports fit time, single-row and batch predict latency, joblib artifact
+size, hold-out accuracy and 90% interval coverage/width. Results are
+printed and written as JSON.
+
+Usage (from backend/):
+    python benchmarks/estimator_report.py
+    python benchmarks/estimator_report.py --rows 200000 --estimators random_forest,hist_gradient_boosting
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from ml_pipeline import (
+    make_sample_dataset, create_features, build_pipeline, prediction_intervals,
+    ESTIMATORS, TARGET_COL
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def estimator_params(name, args):
+    if name == 'random_forest':
+        return {'n_estimators': args.n_estimators}
+    if name == 'hist_gradient_boosting':
+        return {'max_iter': args.max_iter}
+    return {}
+
+
+def evaluate(name, params, X_train, y_train, X_test, y_test, single_row_calls):
+    pipeline = build_pipeline(X_train.columns.tolist(), [], estimator=name, **params)
+
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = pipeline.predict(X_test)
+    batch_s = time.perf_counter() - start
+
+    row = X_test.iloc[-1:]
+    latencies = []
+    for _ in range(single_row_calls):
+        start = time.perf_counter()
+        pipeline.predict(row)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+
+    lower, upper = prediction_intervals(pipeline, X_test, (5, 95))
+    coverage = float(((y_test >= lower) & (y_test <= upper)).mean() * 100)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'pipeline.pkl')
+        joblib.dump(pipeline, path)
+        artifact_bytes = os.path.getsize(path)
+
+    return {
+        'params': params,
+        'fit_s': round(fit_s, 4),
+        'batch_predict_s': round(batch_s, 4),
+        'batch_rows_per_s': round(len(X_test) / batch_s, 1) if batch_s > 0 else None,
+        'single_row_ms': {
+            'p50': round(float(np.percentile(latencies, 50)), 3),
+            'p95': round(float(np.percentile(latencies, 95)), 3)
+        },
+        'artifact_mb': round(artifact_bytes / 1024 ** 2, 3),
+        'mae': float(mean_absolute_error(y_test, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        'r2': float(r2_score(y_test, y_pred)),
+        'interval_90_coverage_pct': round(coverage, 2),
+        'interval_90_mean_width': float(np.mean(upper - lower))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000, help='Synthetic training rows')
+    parser.add_argument('--estimators', help=f'Comma separated subset of: {", ".join(ESTIMATORS)}')
+    parser.add_argument('--n-estimators', type=int, default=200, help='RandomForest trees')
+    parser.add_argument('--max-iter', type=int, default=300, help='Boosting iterations')
+    parser.add_argument('--test-fraction', type=float, default=0.15)
+    parser.add_argument('--single-row-calls', type=int, default=50, help='Timed single-row predictions')
+    parser.add_argument('--output', help='Result JSON path (default: benchmarks/results/estimators-<timestamp>.json)')
+    args = parser.parse_args()
+
+    names = [e.strip() for e in args.estimators.split(',')] if args.estimators else list(ESTIMATORS)
+    unknown = [e for e in names if e not in ESTIMATORS]
+    if unknown:
+        parser.error(f"Unknown estimators: {unknown}")
+
+    df = create_features(make_sample_dataset(args.rows + 7)).dropna()
+    feature_cols = [c for c in df.columns if c != TARGET_COL]
+    split = int(len(df) * (1 - args.test_fraction))
+    X_train, X_test = df[feature_cols].iloc[:split], df[feature_cols].iloc[split:]
+    y_train, y_test = df[TARGET_COL].iloc[:split], df[TARGET_COL].iloc[split:]
+
+    print("=" * 96)
+    print(f"Estimator report: {len(X_train)} train / {len(X_test)} test rows")
+    print("=" * 96)
+    print(f"{'estimator':<24}{'fit s':>9}{'1-row p50 ms':>14}{'batch rows/s':>14}"
+          f"{'artifact MB':>13}{'R²':>8}{'MAE':>10}{'cov90 %':>9}")
+
+    results = {}
+    for name in names:
+        result = evaluate(name, estimator_params(name, args), X_train, y_train, X_test, y_test,
+                          args.single_row_calls)
+        results[name] = result
+        print(f"{name:<24}{result['fit_s']:>9.2f}{result['single_row_ms']['p50']:>14.2f}"
+              f"{result['batch_rows_per_s']:>14.0f}{result['artifact_mb']:>13.2f}"
+              f"{result['r2']:>8.3f}{result['mae']:>10.3f}{result['interval_90_coverage_pct']:>9.1f}")
+
+    report = {
+        'run_at': datetime.now().isoformat(),
+        'config': {
+            'rows': args.rows,
+            'test_fraction': args.test_fraction,
+            'single_row_calls': args.single_row_calls
+        },
+        'results': results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"estimators-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved results to: {output}")
+
+
+if __name__ == '__main__':
+    main()
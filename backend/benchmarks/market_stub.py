@@ -0,0 +1,298 @@
+"""
+Offline stand-ins for Yahoo Finance and the model database
+
+`install()` registers a fake `yfinance` module in `sys.modules` and swaps
+`database.ModelDB` for an in-memory implementation, so the real Flask app
+can be driven without network or PostgreSQL access. Price history is read
+from `<SYMBOL>.csv` fixtures when a fixture directory is given (columns
+Date, Open, High, Low, Close, Volume) and synthesised deterministically
+otherwise.
+"""
+
+import os
+import sys
+import types
+import uuid
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import database
+
+# Keep a handle on the real class for its file <-> record conversion helpers
+_PostgresModelDB = database.ModelDB
+
+# Fixed "today" so runs are reproducible
+FIXTURE_END_DATE = pd.Timestamp('2025-06-30')
+FIXTURE_YEARS = 6
+
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183,
+    '1y': 365, '2y': 730, '5y': 1826, 'max': 365 * FIXTURE_YEARS
+}
+
+
+# =============================
+# MARKET DATA
+# =============================
+class FixtureMarketData:
+    """Deterministic daily OHLCV bars per symbol"""
+
+    def __init__(self, fixtures_dir=None):
+        self.fixtures_dir = fixtures_dir
+        self._frames = {}
+
+    def bars(self, symbol):
+        symbol = symbol.upper()
+        if symbol not in self._frames:
+            self._frames[symbol] = self._load(symbol)
+        return self._frames[symbol]
+
+    def _load(self, symbol):
+        if self.fixtures_dir:
+            path = os.path.join(self.fixtures_dir, f'{symbol}.csv')
+            if os.path.exists(path):
+                df = pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+                df.index = df.index.tz_localize('America/New_York')
+                return df
+        return synthetic_bars(symbol)
+
+    def history(self, symbol, period='1mo'):
+        bars = self.bars(symbol)
+        if bars.empty:
+            return bars
+        days = PERIOD_DAYS.get(period, 31)
+        start = bars.index[-1] - pd.Timedelta(days=days)
+        return bars[bars.index > start].copy()
+
+
+def synthetic_bars(symbol, end=FIXTURE_END_DATE, years=FIXTURE_YEARS):
+    """Geometric random walk seeded by the symbol name"""
+    if symbol.startswith('INVALID'):
+        return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume'])
+
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    dates = pd.bdate_range(end=end, periods=252 * years, tz='America/New_York')
+    n = len(dates)
+
+    start_price = rng.uniform(20, 500)
+    returns = rng.normal(0.0004, 0.018, n)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, n)))
+    volume = rng.integers(1_000_000, 50_000_000, n)
+
+    return pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close,
+        'Adj Close': close, 'Volume': volume
+    }, index=dates)
+
+
+class _FastInfo:
+    def __init__(self, symbol):
+        self.shares = 1_000_000_000 + zlib.crc32(symbol.encode()) % 9_000_000_000
+
+
+class FakeTicker:
+    """Subset of `yfinance.Ticker` used by the backend"""
+
+    def __init__(self, symbol, market):
+        self.ticker = symbol.upper()
+        self._market = market
+
+    def history(self, period='1mo', interval='1d', **kwargs):
+        return self._market.history(self.ticker, period)
+
+    def get_history_metadata(self):
+        return {'longName': f'{self.ticker} Holdings Inc.', 'shortName': self.ticker, 'currency': 'USD'}
+
+    @property
+    def fast_info(self):
+        return _FastInfo(self.ticker)
+
+    @property
+    def info(self):
+        bars = self._market.bars(self.ticker)
+        return {
+            'longName': f'{self.ticker} Holdings Inc.',
+            'previousClose': float(bars['Close'].iloc[-2]) if len(bars) > 1 else None,
+            'marketCap': int(_FastInfo(self.ticker).shares * bars['Close'].iloc[-1]) if len(bars) else 0,
+            'sector': 'Technology'
+        }
+
+    @property
+    def news(self):
+        return [
+            {
+                'content': {
+                    'title': f'{self.ticker} shares rise after strong quarter #{i}',
+                    'summary': f'Analysts discuss growth prospects for {self.ticker}.',
+                    'pubDate': (FIXTURE_END_DATE - pd.Timedelta(hours=i)).isoformat(),
+                    'canonicalUrl': {'url': f'https://example.com/{self.ticker}/{i}'},
+                    'provider': {'displayName': 'Fixture Wire'}
+                }
+            }
+            for i in range(10)
+        ]
+
+
+def make_yfinance_module(market):
+    """Build a module object exposing `Ticker` and `download`"""
+    module = types.ModuleType('yfinance')
+    module.__version__ = 'fixture'
+
+    def Ticker(symbol):
+        return FakeTicker(symbol, market)
+
+    def download(tickers, period='1mo', interval='1d', group_by='column', **kwargs):
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {s.upper(): market.history(s, period) for s in symbols}
+        frames = {s: f for s, f in frames.items() if not f.empty}
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames, axis=1)  # columns: (ticker, field)
+        if group_by != 'ticker':
+            data = data.swaplevel(0, 1, axis=1).sort_index(axis=1)
+        return data
+
+    module.Ticker = Ticker
+    module.download = download
+    return module
+
+
+# =============================
+# MODEL DATABASE
+# =============================
+class InMemoryModelDB:
+    """Drop-in replacement for `database.ModelDB` backed by a dict"""
+
+    _rows = {}
+
+    def save_model(self, model_data, activate=True):
+        model_id = str(uuid.uuid4())
+        now = datetime.now()
+        self._rows[model_id] = {
+            'id': model_id,
+            'name': model_data.get('name', 'Stock Prediction Model'),
+            'version': model_data.get('version', '1.0.0'),
+            'model_type': model_data.get('model_type', 'stock_prediction'),
+            'model_data': model_data.get('model_data', {}),
+            'metadata': model_data.get('metadata', {}),
+            'features': model_data.get('features', []),
+            'trained_by': model_data.get('trained_by'),
+            'description': model_data.get('description'),
+            'is_active': 0,
+            'created_at': now,
+            'updated_at': now
+        }
+        if activate:
+            self.activate_model(model_id)
+        return model_id
+
+    def activate_model(self, model_id):
+        row = self._rows.get(model_id)
+        if row is None:
+            return None
+        deactivated = []
+        for other in self._rows.values():
+            if other['model_type'] == row['model_type'] and other['is_active'] == 1 and other['id'] != model_id:
+                other['is_active'] = 0
+                deactivated.append(other['id'])
+        row['is_active'] = 1
+        return {'id': model_id, 'model_type': row['model_type'], 'deactivated': deactivated}
+
+    def get_active_model(self, model_type):
+        rows = [r for r in self._rows.values() if r['model_type'] == model_type and r['is_active'] == 1]
+        return dict(max(rows, key=lambda r: r['created_at'])) if rows else None
+
+    def get_model_by_id(self, model_id):
+        row = self._rows.get(model_id)
+        return dict(row) if row else None
+
+    def list_models(self, model_type=None):
+        keys = ['id', 'name', 'version', 'model_type', 'created_at', 'is_active', 'trained_by', 'description']
+        rows = [r for r in self._rows.values() if model_type is None or r['model_type'] == model_type]
+        rows.sort(key=lambda r: r['created_at'], reverse=True)
+        return [{k: r[k] for k in keys} for r in rows]
+
+    def list_active_models(self, model_type_prefix):
+        latest = {}
+        for r in self._rows.values():
+            if r['model_type'].startswith(model_type_prefix) and r['is_active'] == 1:
+                if r['model_type'] not in latest or r['created_at'] > latest[r['model_type']]['created_at']:
+                    latest[r['model_type']] = r
+        return [{k: r[k] for k in ('id', 'model_type', 'metadata', 'created_at')} for r in latest.values()]
+
+    def update_model_status(self, model_id, is_active):
+        if model_id not in self._rows:
+            return False
+        self._rows[model_id]['is_active'] = is_active
+        return True
+
+    def delete_model(self, model_id):
+        return self._rows.pop(model_id, None) is not None
+
+    def model_file_to_db(self, model_path, metadata=None):
+        return _PostgresModelDB.model_file_to_db(self, model_path, metadata)
+
+    def model_db_to_file(self, model_data, output_path):
+        return _PostgresModelDB.model_db_to_file(self, model_data, output_path)
+
+
+# Columns produced by app.calculate_technical_indicators
+SERVING_FEATURES = [
+    'Open', 'High', 'Low', 'Close', 'Volume', 'RSI_14', 'MACD', 'Signal_Line',
+    'MA20', 'STD20', 'Bollinger_Upper', 'Bollinger_Lower', 'Volume_MA'
+]
+
+
+def register_benchmark_model(market, symbol='FIXTURE', n_estimators=50):
+    """Train a small forest on serving-time features and store it as active"""
+    import tempfile
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    import app
+
+    df = app.calculate_technical_indicators(market.history(symbol, 'max'))
+    df['Target_Close_7d'] = df['Close'].shift(-7)
+    df = df.dropna()
+
+    pipeline = Pipeline([
+        ('preprocessor', StandardScaler()),
+        ('model', RandomForestRegressor(n_estimators=n_estimators, max_depth=10, random_state=42, n_jobs=1))
+    ])
+    pipeline.fit(df[SERVING_FEATURES], df['Target_Close_7d'])
+
+    db = InMemoryModelDB()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'pipeline.pkl')
+        joblib.dump(pipeline, path)
+        record = db.model_file_to_db(path, metadata={
+            'trained_on': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'numeric_features': SERVING_FEATURES,
+            'categorical_features': [],
+            'target_column': 'Target_Close_7d'
+        })
+    record.update({'model_type': 'stock_prediction', 'name': 'Benchmark Model', 'version': 'bench'})
+    return db.save_model(record)
+
+
+def install(fixtures_dir=None):
+    """Install the stubs; must run before `app` touches yfinance or the DB"""
+    market = FixtureMarketData(fixtures_dir)
+    sys.modules['yfinance'] = make_yfinance_module(market)
+
+    InMemoryModelDB._rows = {}
+    database.ModelDB = InMemoryModelDB
+    database.db_instance = InMemoryModelDB()
+    return market
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for training and inference hot paths
+
+Each benchmark runs on synthetic inputs built the same way as
+generate_models.py (ml_pipeline.make_sample_dataset) at every requested
+size. Wall time is the best of --repeat runs; peak memory is measured in a
+separate run under tracemalloc so it does not skew the timings. Results
+are printed as a table and written as JSON.
+
+Model-fitting benchmarks are expensive, so sizes above --max-fit-rows are
+skipped for them (and recorded as skipped) unless the limit is raised.
+
+Usage (from backend/):
+    python benchmarks/micro_bench.py
+    python benchmarks/micro_bench.py --sizes 1000,100000,10000000 --bench create_features,validate_input_data
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from ml_pipeline import (
+    make_sample_dataset, create_features, validate_input_data,
+    build_pipeline, time_series_cv, tree_predictions
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+TARGET_COL = 'Target_Close_7d'
+
+
+# =============================
+# INPUTS
+# =============================
+def training_frame(n_rows):
+    return make_sample_dataset(n_rows + 7)
+
+
+def ohlcv_frame(n_rows, seed=42):
+    """Daily OHLCV bars shaped like a yfinance history frame"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n_rows)))
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.003, n_rows)),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 10_000_000, n_rows)
+    }, index=pd.RangeIndex(n_rows))
+
+
+def split_features(df):
+    df = create_features(df).dropna()
+    feature_cols = [c for c in df.columns if c != TARGET_COL]
+    numeric_cols = df[feature_cols].select_dtypes(include=[np.number]).columns.tolist()
+    return df[feature_cols], df[TARGET_COL], numeric_cols
+
+
+def fitted_pipeline(n_rows, n_estimators, cache={}):
+    key = (n_rows, n_estimators)
+    if key not in cache:
+        X, y, numeric_cols = split_features(training_frame(n_rows))
+        pipeline = build_pipeline(numeric_cols, [], n_estimators=n_estimators)
+        pipeline.fit(X, y)
+        cache[key] = (pipeline, X)
+    return cache[key]
+
+
+# =============================
+# BENCHMARKS
+# =============================
+# Each entry: (setup(n, args) -> state, run(state), fits_model[, rows processed per run])
+def _bench_create_features():
+    return (lambda n, a: training_frame(n), create_features, False)
+
+
+def _bench_validate():
+    def run(df):
+        # Silence the issue report; we only time the checks
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            validate_input_data(df)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return (lambda n, a: training_frame(n), run, False)
+
+
+def _bench_indicators():
+    from app import calculate_technical_indicators
+    return (lambda n, a: ohlcv_frame(n), calculate_technical_indicators, False)
+
+
+def _bench_cv_loop():
+    def setup(n, a):
+        X, y, numeric_cols = split_features(training_frame(n))
+        return build_pipeline(numeric_cols, [], n_estimators=a.n_estimators), X, y
+    return (setup, lambda s: time_series_cv(s[0], s[1], s[2], verbose=False), True)
+
+
+def _bench_fit():
+    def setup(n, a):
+        X, y, numeric_cols = split_features(training_frame(n))
+        return build_pipeline(numeric_cols, [], n_estimators=a.n_estimators), X, y
+    return (setup, lambda s: s[0].fit(s[1], s[2]), True)
+
+
+def _bench_predict_single():
+    def setup(n, a):
+        pipeline, X = fitted_pipeline(min(n, a.max_fit_rows), a.n_estimators)
+        return pipeline, X.iloc[-1:]
+    return (setup, lambda s: s[0].predict(s[1]), False, lambda n: 1)
+
+
+def _bench_predict_batch():
+    def setup(n, a):
+        pipeline, _ = fitted_pipeline(min(n, a.max_fit_rows), a.n_estimators)
+        X, _, _ = split_features(training_frame(n))
+        return pipeline, X
+    return (setup, lambda s: s[0].predict(s[1]), False)
+
+
+def _bench_tree_intervals():
+    def setup(n, a):
+        pipeline, _ = fitted_pipeline(min(n, a.max_fit_rows), a.n_estimators)
+        X, _, _ = split_features(training_frame(n))
+        return pipeline, X
+
+    def run(s):
+        all_preds = tree_predictions(s[0], s[1])
+        return np.percentile(all_preds, [5, 95], axis=1)
+    return (setup, run, False)
+
+
+BENCHMARKS = {
+    'create_features': _bench_create_features,
+    'validate_input_data': _bench_validate,
+    'calculate_technical_indicators': _bench_indicators,
+    'cv_loop': _bench_cv_loop,
+    'pipeline_fit': _bench_fit,
+    'predict_single': _bench_predict_single,
+    'predict_batch': _bench_predict_batch,
+    'tree_intervals': _bench_tree_intervals,
+}
+
+
+# =============================
+# RUNNER
+# =============================
+def measure(setup, run, n_rows, args, processed_rows=None):
+    """Best-of-N wall time and tracemalloc peak for one benchmark/size"""
+    processed_rows = n_rows if processed_rows is None else processed_rows
+    state = setup(n_rows, args)
+
+    timings = []
+    for _ in range(args.repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        'rows': n_rows,
+        'best_s': round(best, 6),
+        'mean_s': round(float(np.mean(timings)), 6),
+        'rows_processed': processed_rows,
+        'rows_per_s': round(processed_rows / best, 1) if best > 0 else None,
+        'peak_mb': round(peak / 1024 ** 2, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Comma separated row counts (e.g. 1000,10000000)')
+    parser.add_argument('--bench', help=f'Comma separated subset of: {", ".join(BENCHMARKS)}')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark/size')
+    parser.add_argument('--n-estimators', type=int, default=50, help='Trees in benchmark forests')
+    parser.add_argument('--max-fit-rows', type=int, default=100_000,
+                        help='Largest size used for model-fitting benchmarks')
+    parser.add_argument('--output', help='Result JSON path (default: benchmarks/results/micro-<timestamp>.json)')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    names = [b.strip() for b in args.bench.split(',')] if args.bench else list(BENCHMARKS)
+    unknown = [b for b in names if b not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {unknown}")
+
+    print("=" * 72)
+    print(f"Microbenchmarks: sizes {sizes}, best of {args.repeat}, {args.n_estimators} trees")
+    print("=" * 72)
+    print(f"{'benchmark':<32}{'rows':>12}{'best s':>12}{'rows/s':>14}{'peak MB':>10}")
+
+    results = {}
+    for name in names:
+        setup, run, fits_model, *rest = BENCHMARKS[name]()
+        processed = rest[0] if rest else (lambda n: n)
+        results[name] = []
+        for n_rows in sizes:
+            if fits_model and n_rows > args.max_fit_rows:
+                results[name].append({'rows': n_rows, 'skipped': f'> --max-fit-rows ({args.max_fit_rows})'})
+                print(f"{name:<32}{n_rows:>12}{'skipped':>12}")
+                continue
+            try:
+                result = measure(setup, run, n_rows, args, processed(n_rows))
+            except MemoryError:
+                results[name].append({'rows': n_rows, 'skipped': 'MemoryError'})
+                print(f"{name:<32}{n_rows:>12}{'OOM':>12}")
+                continue
+            results[name].append(result)
+            print(f"{name:<32}{n_rows:>12}{result['best_s']:>12.4f}{result['rows_per_s']:>14.0f}{result['peak_mb']:>10.1f}")
+
+    report = {
+        'run_at': datetime.now().isoformat(),
+        'config': {
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'n_estimators': args.n_estimators,
+            'max_fit_rows': args.max_fit_rows,
+            'numpy': np.__version__,
+            'pandas': pd.__version__
+        },
+        'results': results
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"micro-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved results to: {output}")
+
+
+if __name__ == '__main__':
+    main()
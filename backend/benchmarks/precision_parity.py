@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+float32 vs float64 parity report
+
+Trains the train_model.py pipeline twice on the same synthetic data (from
+ml_pipeline.make_sample_dataset): once with float64 features and once in
+compact float32 mode. For each size it reports hold-out accuracy for both,
+the largest prediction and interval differences, feature-matrix memory,
+fit time and batch predict time. Results are printed and written as JSON.
+
+Usage (from backend/):
+    python benchmarks/precision_parity.py
+    python benchmarks/precision_parity.py --sizes 10000,200000 --n-estimators 100
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from ml_pipeline import (
+    make_sample_dataset, create_features, build_pipeline, prediction_intervals,
+    to_compact, COMPACT_DTYPE, TARGET_COL
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_SIZES = [10_000, 100_000]
+
+
+def run_precision(df, dtype, n_estimators, test_fraction):
+    """Fit and evaluate one precision; returns metrics plus raw predictions"""
+    if dtype == COMPACT_DTYPE:
+        df = to_compact(df)
+    df = create_features(df, inplace=True).dropna()
+    feature_cols = [c for c in df.columns if c != TARGET_COL]
+    X, y = df[feature_cols], df[TARGET_COL]
+    split = int(len(X) * (1 - test_fraction))
+    X_train, X_test, y_train, y_test = X.iloc[:split], X.iloc[split:], y.iloc[:split], y.iloc[split:]
+
+    pipeline = build_pipeline(feature_cols, [], n_estimators=n_estimators, dtype=dtype)
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = pipeline.predict(X_test)
+    predict_s = time.perf_counter() - start
+    lower, upper = prediction_intervals(pipeline, X_test)
+
+    return {
+        'feature_mb': round(X_train.memory_usage(deep=True).sum() / 1024 ** 2, 2),
+        'fit_s': round(fit_s, 4),
+        'predict_s': round(predict_s, 4),
+        'mae': float(mean_absolute_error(y_test, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        'r2': float(r2_score(y_test, y_pred))
+    }, y_pred, lower, upper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES), help='Comma separated row counts')
+    parser.add_argument('--n-estimators', type=int, default=100, help='Trees per forest')
+    parser.add_argument('--test-fraction', type=float, default=0.15)
+    parser.add_argument('--output', help='Result JSON path (default: benchmarks/results/precision-<timestamp>.json)')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    print("=" * 72)
+    print(f"Precision parity: float64 vs float32, {args.n_estimators} trees")
+    print("=" * 72)
+
+    results = []
+    for n_rows in sizes:
+        base = make_sample_dataset(n_rows + 7)
+        m64, pred64, lo64, hi64 = run_precision(base.copy(), np.float64, args.n_estimators, args.test_fraction)
+        m32, pred32, lo32, hi32 = run_precision(base.copy(), COMPACT_DTYPE, args.n_estimators, args.test_fraction)
+
+        parity = {
+            'max_abs_prediction_diff': float(np.max(np.abs(pred64 - pred32))),
+            'mean_abs_prediction_diff': float(np.mean(np.abs(pred64 - pred32))),
+            'max_abs_interval_diff': float(max(np.max(np.abs(lo64 - lo32)), np.max(np.abs(hi64 - hi32)))),
+            'r2_delta': m32['r2'] - m64['r2'],
+            'memory_ratio': round(m32['feature_mb'] / m64['feature_mb'], 3) if m64['feature_mb'] else None
+        }
+        results.append({'rows': n_rows, 'float64': m64, 'float32': m32, 'parity': parity})
+
+        print(f"\n{n_rows} rows")
+        print(f"  {'':<10}{'R²':>10}{'MAE':>12}{'features MB':>14}{'fit s':>10}{'predict s':>12}")
+        for name, m in (('float64', m64), ('float32', m32)):
+            print(f"  {name:<10}{m['r2']:>10.4f}{m['mae']:>12.4f}{m['feature_mb']:>14.1f}{m['fit_s']:>10.3f}{m['predict_s']:>12.4f}")
+        print(f"  max |Δprediction| {parity['max_abs_prediction_diff']:.6f}, "
+              f"max |Δinterval| {parity['max_abs_interval_diff']:.6f}, ΔR² {parity['r2_delta']:+.6f}")
+
+    report = {
+        'run_at': datetime.now().isoformat(),
+        'config': {'sizes': sizes, 'n_estimators': args.n_estimators, 'test_fraction': args.test_fraction},
+        'results': results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"precision-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved results to: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Build a versioned training dataset from the local price store
+
+Reads the daily bars of every stored symbol (see backfill.py), updates
+their rows in the point-in-time feature store (feature_store.py), and
+joins them as of each bar's date with the Target_Close_7d label (the
+close 7 bars ahead) and optional fundamentals and macro columns. The
+features are the exact rows serving reads, computed once per bar with
+grouped rolling windows. Symbols are split into batches, and each batch
+is processed in its own worker process.
+
+Each run writes a new version next to the previous ones:
+
+  <out>/<version>/Ticker=<SYMBOL>/part-*.parquet   hive-partitioned rows
+  <out>/<version>/_manifest.json                   symbols, rows, columns, inputs
+  <out>/LATEST                                     name of the newest version
+
+A version only appears once it is complete. train_model.py
+(TRAINING_DATA=<out>), train_shards.py and train_out_of_core.py read it directly.
+
+Usage (from backend/):
+    python build_dataset.py --store data/prices --out data/datasets/daily
+    python build_dataset.py --fundamentals fundamentals.csv --macro macro.csv --workers 8
+    python build_dataset.py --symbols AAPL,MSFT --start 2015-01-01 --version aapl-msft
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from feature_store import FeatureStore, FEATURE_STORE_DIR, INDICATOR_COLUMNS
+from ml_pipeline import TARGET_COL
+from price_store import PriceStore, PRICE_STORE_DIR, DATE_COL, SYMBOL_COL
+
+DATASET_DIR = os.path.join('data', 'datasets', 'daily')
+LATEST_FILE = 'LATEST'
+MANIFEST_FILE = '_manifest.json'
+TARGET_HORIZON = 7
+DEFAULT_BATCH_SYMBOLS = 50
+
+
+# =============================
+# LABELS & JOINS
+# =============================
+def add_target(bars, horizon=TARGET_HORIZON):
+    """Target_Close_7d: each symbol's close `horizon` bars ahead (bars sorted by Ticker, Date)"""
+    bars[TARGET_COL] = bars['Close'].groupby(bars[SYMBOL_COL], sort=False).shift(-horizon)
+    return bars
+
+
+def join_as_of(df, side, by=None):
+    """Attach the latest `side` row dated on or before each row's Date (no look-ahead)"""
+    side = side.copy()
+    side[DATE_COL] = pd.to_datetime(side[DATE_COL]).astype(df[DATE_COL].dtype)
+    if by is not None:
+        side[by] = side[by].astype(str).str.upper()
+    merged = pd.merge_asof(df.sort_values(DATE_COL, kind='stable'), side.sort_values(DATE_COL),
+                           on=DATE_COL, by=by, direction='backward')
+    return merged.sort_values([SYMBOL_COL, DATE_COL], ignore_index=True)
+
+
+def read_side_table(path):
+    if path is None:
+        return None
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+
+
+# =============================
+# BATCHES
+# =============================
+def build_batch(batch_id, symbols, store_dir, features_dir, out_dir, start, fundamentals_path, macro_path,
+                horizon, full_features=False):
+    """Build and write the rows of one batch of symbols; runs in a worker process"""
+    started = time.perf_counter()
+    store = PriceStore(store_dir)
+    features = FeatureStore(features_dir, prices=store)
+    features.materialize(symbols, full=full_features)
+
+    frames = []
+    for symbol in symbols:
+        bars = store.read(symbol)
+        if len(bars):
+            frames.append(bars[['Close']].reset_index().assign(**{SYMBOL_COL: symbol}))
+    if not frames:
+        return {'symbols': 0, 'rows': 0, 'seconds': 0.0}
+
+    labels = add_target(pd.concat(frames, ignore_index=True), horizon=horizon)
+    df = features.as_of(labels[[SYMBOL_COL, DATE_COL, TARGET_COL]])
+    fundamentals, macro = read_side_table(fundamentals_path), read_side_table(macro_path)
+    if fundamentals is not None:
+        df = join_as_of(df, fundamentals, by=SYMBOL_COL)
+    if macro is not None:
+        df = join_as_of(df, macro)
+
+    df = df.dropna(subset=INDICATOR_COLUMNS + [TARGET_COL])
+    if start is not None:
+        df = df[df[DATE_COL] >= pd.Timestamp(start)]
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(table, out_dir, format='parquet', partitioning=[SYMBOL_COL],
+                     partitioning_flavor='hive', existing_data_behavior='overwrite_or_ignore',
+                     basename_template=f'part-{batch_id}-{{i}}.parquet',
+                     file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'))
+    return {
+        'symbols': int(df[SYMBOL_COL].nunique()),
+        'rows': len(df),
+        'columns': [c for c in df.columns if c != SYMBOL_COL],
+        'date_min': df[DATE_COL].min().isoformat() if len(df) else None,
+        'date_max': df[DATE_COL].max().isoformat() if len(df) else None,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+
+def input_fingerprint(store, symbols, params):
+    """Hash of the stored history (symbol, last bar) and the build parameters"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode())
+    for symbol in symbols:
+        digest.update(f'{symbol}:{store.last_date(symbol)}'.encode())
+    return digest.hexdigest()[:16]
+
+
+# =============================
+# READING
+# =============================
+def resolve_version(path):
+    """Version directory for a dataset path (the LATEST one when given the dataset root)"""
+    latest = os.path.join(path, LATEST_FILE)
+    if os.path.isfile(latest):
+        with open(latest) as f:
+            return os.path.join(path, f.read().strip())
+    return path
+
+
+def read_dataset(path, columns=None):
+    """
+    Load a built dataset as one frame in chronological order
+
+    Args:
+        path: Dataset root (reads its LATEST version) or a version directory
+        columns: Optional subset of columns to read
+
+    Returns:
+        DataFrame sorted by Date then Ticker, so chronological splits hold
+        every symbol's latest rows out together
+    """
+    df = pd.read_parquet(resolve_version(path), columns=columns)
+    if SYMBOL_COL in df.columns:
+        df[SYMBOL_COL] = df[SYMBOL_COL].astype(str)
+    sort_cols = [c for c in (DATE_COL, SYMBOL_COL) if c in df.columns]
+    return df.sort_values(sort_cols, ignore_index=True) if sort_cols else df
+
+
+# =============================
+# MAIN
+# =============================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--store', default=PRICE_STORE_DIR, help='Price store directory')
+    parser.add_argument('--features', default=FEATURE_STORE_DIR, help='Feature store directory')
+    parser.add_argument('--full-features', action='store_true',
+                        help='Rebuild every feature row instead of adding rows for new bars')
+    parser.add_argument('--out', default=DATASET_DIR, help='Dataset root (versions are created inside)')
+    parser.add_argument('--symbols', help='Comma separated subset of stored symbols')
+    parser.add_argument('--start', help='Drop rows before this date (indicators still warm up on earlier bars)')
+    parser.add_argument('--fundamentals', help='CSV/Parquet with Ticker, Date and fundamental columns')
+    parser.add_argument('--macro', help='CSV/Parquet with Date and macro columns')
+    parser.add_argument('--horizon', type=int, default=TARGET_HORIZON, help='Bars ahead for the target close')
+    parser.add_argument('--batch-symbols', type=int, default=DEFAULT_BATCH_SYMBOLS, help='Symbols per worker task')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel worker processes')
+    parser.add_argument('--version', help='Version name (default: build timestamp)')
+    args = parser.parse_args()
+
+    store = PriceStore(args.store)
+    symbols = store.symbols()
+    if args.symbols:
+        wanted = {s.strip().upper() for s in args.symbols.split(',') if s.strip()}
+        symbols = [s for s in symbols if s in wanted]
+    if not symbols:
+        parser.error(f"No symbols found in price store {args.store} (run backfill.py first)")
+
+    version = args.version or datetime.now().strftime('%Y%m%dT%H%M%S')
+    final_dir = os.path.join(args.out, version)
+    if os.path.exists(final_dir):
+        parser.error(f"Version {version} already exists in {args.out}")
+    tmp_dir = os.path.join(args.out, f'.{version}.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    params = {
+        'horizon': args.horizon, 'start': args.start,
+        'fundamentals': os.path.abspath(args.fundamentals) if args.fundamentals else None,
+        'macro': os.path.abspath(args.macro) if args.macro else None
+    }
+    batches = [symbols[i:i + args.batch_symbols] for i in range(0, len(symbols), args.batch_symbols)]
+    print(f"🏗️ Building dataset {version} from {len(symbols)} symbols: "
+          f"{len(batches)} batches, {args.workers} workers")
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(build_batch, i, batch, args.store, args.features, tmp_dir, args.start,
+                        args.fundamentals, args.macro, args.horizon, args.full_features): i
+            for i, batch in enumerate(batches)
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"  ✅ Batch {futures[future]}: {result['symbols']} symbols, "
+                  f"{result['rows']:,} rows in {result['seconds']}s")
+
+    built = [r for r in results if r['rows']]
+    if not built:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise SystemExit("❌ No rows left after indicator warm-up and target shift")
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'source': os.path.abspath(args.store),
+        'fingerprint': input_fingerprint(store, symbols, params),
+        'params': params,
+        'target_column': TARGET_COL,
+        'symbols': sum(r['symbols'] for r in built),
+        'rows': sum(r['rows'] for r in built),
+        'columns': built[0]['columns'],
+        'partitioning': [SYMBOL_COL],
+        'date_min': min(r['date_min'] for r in built),
+        'date_max': max(r['date_max'] for r in built)
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_dir, final_dir)
+    with open(os.path.join(args.out, f'{LATEST_FILE}.tmp'), 'w') as f:
+        f.write(version)
+    os.replace(os.path.join(args.out, f'{LATEST_FILE}.tmp'), os.path.join(args.out, LATEST_FILE))
+
+    elapsed = time.perf_counter() - start
+    print(f"\n📦 {manifest['rows']:,} rows, {manifest['symbols']} symbols, {len(manifest['columns'])} columns "
+          f"({manifest['date_min'][:10]} → {manifest['date_max'][:10]}) in {elapsed:.1f}s")
+    print(f"📁 Dataset version: {final_dir}")
+
+
+if __name__ == '__main__':
+    main()
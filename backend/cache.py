@@ -0,0 +1,129 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+_MISSING = object()
+
+# Every live cache, so hit/miss counters can be exported
+_caches = weakref.WeakSet()
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with per-entry expiry and LRU eviction
+
+    With `max_weight` and `weigher`, least recently used entries are also
+    evicted while the summed weight of the entries (e.g. model size in
+    bytes) exceeds `max_weight`; the newest entry is always kept.
+
+    With `stale_ttl`, expired entries are kept that much longer. `get`
+    ignores them, but `get_stale` returns them as a last-known-good value
+    when a refresh fails.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024, name: str = 'cache',
+                 max_weight: Optional[float] = None, weigher: Optional[Callable[[Any], float]] = None,
+                 stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.name = name
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def get(self, key, default=None):
+        """Return a live entry or `default` if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            now = time.monotonic()
+            if expires_at < now:
+                if expires_at + self.stale_ttl < now:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key, default=None):
+        """Return a live entry without counting a hit/miss or refreshing its LRU position"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[1] < time.monotonic():
+                return default
+            return entry[0]
+
+    def get_stale(self, key, default=None):
+        """Return an entry that is live or expired less than `stale_ttl` ago"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[1] + self.stale_ttl < time.monotonic():
+                return default
+            self.stale_hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        weight = self.weigher(value) if self.weigher else 0
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (value, expires_at, weight)
+            self.weight += weight
+            while len(self._data) > self.maxsize or (
+                self.max_weight is not None and self.weight > self.max_weight and len(self._data) > 1
+            ):
+                _, (_, _, evicted_weight) = self._data.popitem(last=False)
+                self.weight -= evicted_weight
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Return the cached value or compute, store and return it"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        """Remove an entry if present"""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+
+def all_caches():
+    """All live TTLCache instances"""
+    return list(_caches)
@@ -0,0 +1,270 @@
+import os
+
+from cache import TTLCache
+from lazy_imports import lazy_import
+from upstream import upstream_request, cached_fetch
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+yf = lazy_import('yfinance')
+
+# =============================
+# CONFIG
+# =============================
+PERIOD_MAP = {
+    '1M': '1mo',
+    '6M': '6mo',
+    '1Y': '1y',
+    '5Y': '5y'
+}
+DEFAULT_WINDOW = 20
+MAX_COMPARE_SYMBOLS = 20
+TRADING_DAYS_PER_YEAR = 252
+CLOSE_PRICES_TTL_SECONDS = float(os.getenv('CLOSE_PRICES_TTL_SECONDS', '60'))
+# Served after expiry when a refresh fails or the upstream budget is exhausted
+CLOSE_PRICES_STALE_SECONDS = float(os.getenv('CLOSE_PRICES_STALE_SECONDS', str(24 * 60 * 60)))
+
+
+class BenchmarkError(ValueError):
+    """The requested benchmark has no price data"""
+
+
+_close_prices = TTLCache(CLOSE_PRICES_TTL_SECONDS, maxsize=256, name='close_prices',
+                         stale_ttl=CLOSE_PRICES_STALE_SECONDS)
+
+
+# =============================
+# DATA LOADING
+# =============================
+def parse_symbols(raw):
+    """Split a comma separated symbol list into unique upper-case symbols"""
+    symbols = []
+    for part in (raw or '').split(','):
+        symbol = part.strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+def align_close_prices(closes):
+    """
+    Outer-join per-symbol close series on their date index
+
+    Args:
+        closes: Mapping of symbol -> pandas Series of close prices indexed by date
+
+    Returns:
+        DataFrame indexed by date with one column per symbol (NaN where a
+        symbol has no bar for that date)
+    """
+    if not closes:
+        return pd.DataFrame()
+    prices = pd.concat(closes, axis=1, join='outer', sort=True)
+    prices.index = pd.DatetimeIndex(prices.index).tz_localize(None).normalize()
+    # Intraday timestamps from different exchanges collapse onto the same day
+    return prices.groupby(level=0).last()
+
+
+def fetch_close_prices(symbols, range_str='1M'):
+    """Download close prices for all symbols in one request, aligned by date (cached)"""
+    period = PERIOD_MAP.get(range_str, '1mo')
+    return cached_fetch(_close_prices, (tuple(symbols), period),
+                        lambda: _download_close_prices(symbols, period), is_empty=lambda prices: prices.empty)
+
+
+def _download_close_prices(symbols, period):
+    data = upstream_request('download', lambda: yf.download(
+        symbols,
+        period=period,
+        auto_adjust=False,
+        group_by='column',
+        progress=False,
+        threads=True
+    ))
+    if data is None or data.empty:
+        return pd.DataFrame(columns=symbols)
+
+    closes = data['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(symbols[0])
+
+    closes = closes.dropna(how='all')
+    prices = align_close_prices({symbol: closes[symbol] for symbol in symbols if symbol in closes.columns})
+    return prices.reindex(columns=symbols)
+
+
+# =============================
+# METRICS
+# =============================
+def compute_comparison(prices, window=DEFAULT_WINDOW, benchmark=None, benchmark_prices=None):
+    """
+    Compute aligned comparison metrics for every symbol column at once
+
+    Args:
+        prices: Date-indexed DataFrame of close prices, one column per symbol
+        window: Rolling window (in bars) for correlation and beta
+        benchmark: Symbol used as the reference for correlation/beta
+            (defaults to the first column)
+        benchmark_prices: Close prices of `benchmark` on the same index, when
+            it is not one of the compared columns
+
+    Returns:
+        Dictionary of 2-D numpy arrays (dates x symbols) plus per-symbol summary
+    """
+    symbols = list(prices.columns)
+    benchmark = benchmark or symbols[0]
+    if benchmark not in symbols and benchmark_prices is None:
+        raise BenchmarkError(f"No prices for benchmark {benchmark}")
+
+    values = prices.to_numpy(dtype=float)
+    filled = prices.ffill().to_numpy(dtype=float)
+    first = prices.bfill().to_numpy(dtype=float)[0] if len(prices) else np.full(len(symbols), np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = values / first - 1.0
+
+        returns = np.full_like(filled, np.nan)
+        returns[1:] = filled[1:] / filled[:-1] - 1.0
+
+        running_max = np.fmax.accumulate(filled, axis=0)
+        drawdown = filled / running_max - 1.0
+
+    returns_df = pd.DataFrame(returns, index=prices.index, columns=symbols)
+    if benchmark in symbols:
+        bench_returns = returns_df[benchmark]
+    else:
+        bench_filled = benchmark_prices.reindex(prices.index).ffill()
+        bench_returns = bench_filled / bench_filled.shift(1) - 1.0
+    rolling = returns_df.rolling(window, min_periods=window)
+    rolling_corr = rolling.corr(bench_returns)
+    rolling_beta = rolling.cov(bench_returns).div(bench_returns.rolling(window, min_periods=window).var(), axis=0)
+
+    full_corr = returns_df.corrwith(bench_returns)
+    full_beta = returns_df.apply(lambda col: col.cov(bench_returns)) / bench_returns.var()
+
+    # Last and 7-bars-back prices per symbol on each symbol's own bars
+    last_idx = _last_valid_index(values)
+    week_idx = np.array([_nth_valid_back(values[:, j], last_idx[j], 6) for j in range(len(symbols))])
+    cols = np.arange(len(symbols))
+    last_price = np.where(last_idx >= 0, values[np.maximum(last_idx, 0), cols], np.nan)
+    week_price = np.where(week_idx >= 0, values[np.maximum(week_idx, 0), cols], np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        seven_day_change = (last_price - week_price) / week_price * 100
+        total_return = (last_price / first - 1.0) * 100
+    volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100 if len(prices) > 2 else np.full(len(symbols), np.nan)
+    max_drawdown = np.nanmin(drawdown, axis=0) * 100 if len(prices) else np.full(len(symbols), np.nan)
+
+    summary = {}
+    for j, symbol in enumerate(symbols):
+        summary[symbol] = {
+            'lastPrice': _round_or_none(last_price[j], 2),
+            'totalReturn': _round_or_none(total_return[j], 2),
+            'sevenDayChange': _round_or_none(seven_day_change[j], 2),
+            'volatility': _round_or_none(volatility[j], 2),
+            'maxDrawdown': _round_or_none(max_drawdown[j], 2),
+            'correlation': _round_or_none(full_corr[symbol], 4),
+            'beta': _round_or_none(full_beta[symbol], 4),
+            'bars': int(np.count_nonzero(~np.isnan(values[:, j])))
+        }
+
+    return {
+        'symbols': symbols,
+        'benchmark': benchmark,
+        'dates': prices.index,
+        'price': values,
+        'normalized': normalized * 100,
+        'drawdown': drawdown * 100,
+        'rollingCorrelation': rolling_corr.reindex(columns=symbols).to_numpy(dtype=float),
+        'rollingBeta': rolling_beta.reindex(columns=symbols).to_numpy(dtype=float),
+        'summary': summary
+    }
+
+
+def _last_valid_index(values):
+    """Row index of the last non-NaN value in every column (-1 if none)"""
+    valid = ~np.isnan(values)
+    n_rows = values.shape[0]
+    last = n_rows - 1 - np.argmax(valid[::-1], axis=0)
+    return np.where(valid.any(axis=0), last, -1)
+
+
+def _nth_valid_back(column, last, n):
+    """Index of the n-th valid value before `last` in a column (-1 if none)"""
+    if last < 0:
+        return -1
+    valid_rows = np.flatnonzero(~np.isnan(column[:last + 1]))
+    return int(valid_rows[-1 - n]) if len(valid_rows) > n else -1
+
+
+def _round_or_none(value, decimals):
+    """Round a scalar, mapping NaN/inf to None for JSON"""
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), decimals)
+
+
+# =============================
+# SERIALIZATION
+# =============================
+def _columns_to_json(array, symbols, decimals):
+    """Convert a (dates x symbols) array into {symbol: [values]} with NaN -> None"""
+    rounded = np.round(array, decimals)
+    out = rounded.astype(object)
+    out[~np.isfinite(rounded)] = None
+    return {symbol: out[:, j].tolist() for j, symbol in enumerate(symbols)}
+
+
+def comparison_payload(result, range_str, window):
+    """Build the columnar JSON payload for a comparison result"""
+    symbols = result['symbols']
+    return {
+        'symbols': symbols,
+        'benchmark': result['benchmark'],
+        'range': range_str,
+        'window': window,
+        'dates': result['dates'].strftime('%Y-%m-%d').tolist(),
+        'series': {
+            'price': _columns_to_json(result['price'], symbols, 2),
+            'normalized': _columns_to_json(result['normalized'], symbols, 2),
+            'drawdown': _columns_to_json(result['drawdown'], symbols, 2),
+            'rollingCorrelation': _columns_to_json(result['rollingCorrelation'], symbols, 4),
+            'rollingBeta': _columns_to_json(result['rollingBeta'], symbols, 4)
+        },
+        'summary': result['summary']
+    }
+
+
+def compare_symbols(symbols, range_str='1M', window=DEFAULT_WINDOW, benchmark=None):
+    """
+    Fetch, align and compare N symbols
+
+    A benchmark that is not one of `symbols` is downloaded in the same
+    request and only used as the reference for correlation and beta.
+
+    Returns:
+        Tuple of (payload or None, list of symbols with no data)
+
+    Raises:
+        BenchmarkError: The benchmark has no data
+    """
+    extra = [benchmark] if benchmark and benchmark not in symbols else []
+    prices = fetch_close_prices(symbols + extra, range_str)
+    missing = [s for s in symbols if s not in prices.columns or prices[s].isna().all()]
+    available = [s for s in symbols if s not in missing]
+    if not available:
+        return None, missing
+
+    benchmark_prices = None
+    if extra:
+        if benchmark not in prices.columns or prices[benchmark].isna().all():
+            raise BenchmarkError(f"No prices for benchmark {benchmark}")
+        benchmark_prices = prices[benchmark]
+    elif benchmark in missing:
+        raise BenchmarkError(f"No prices for benchmark {benchmark}")
+
+    result = compute_comparison(prices[available], window=window, benchmark=benchmark,
+                                benchmark_prices=benchmark_prices)
+    payload = comparison_payload(result, range_str, window)
+    payload['missing'] = missing
+    return payload, missing
@@ -1,12 +1,19 @@
 import os
 import json
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import joblib
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import base64
 
+from lazy_imports import lazy_import
+
+# Imported on first database access to keep app startup fast
+psycopg2 = lazy_import('psycopg2')
+psycopg2_extras = lazy_import('psycopg2.extras')
+joblib = lazy_import('joblib')
+
+# Serving workers LISTEN on this channel to hot-reload models (see model_events.py)
+MODEL_EVENTS_CHANNEL = os.getenv('MODEL_EVENTS_CHANNEL', 'ml_model_events')
+
 class ModelDB:
     """Database operations for ML Models using PostgreSQL"""
 
@@ -17,38 +24,118 @@ class ModelDB:
         """Get database connection"""
         return psycopg2.connect(self.connection_string)
 
-    def save_model(self, model_data: Dict[str, Any]) -> str:
+    def save_model(self, model_data: Dict[str, Any], activate: bool = True) -> str:
         """
         Save model to database
 
         Args:
             model_data: Dictionary containing model information
+            activate: Make it the only active model of its type in the same
+                transaction; False stores an inactive candidate (e.g. for shadow mode)
 
         Returns:
             model_id: The ID of the saved model
         """
         query = """
-        INSERT INTO ml_models (name, version, model_type, model_data, metadata, features, trained_by, description)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        INSERT INTO ml_models (name, version, model_type, model_data, metadata, features, trained_by, description, is_active)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         RETURNING id
         """
+        model_type = model_data.get('model_type', 'stock_prediction')
 
         with self.get_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, (
                     model_data.get('name', 'Stock Prediction Model'),
                     model_data.get('version', '1.0.0'),
-                    model_data.get('model_type', 'stock_prediction'),
+                    model_type,
                     json.dumps(model_data.get('model_data', {})),
                     json.dumps(model_data.get('metadata', {})),
                     json.dumps(model_data.get('features', [])),
                     model_data.get('trained_by'),
-                    model_data.get('description')
+                    model_data.get('description'),
+                    1 if activate else 0
                 ))
                 model_id = cursor.fetchone()[0]
+                if activate:
+                    self._activate(cursor, model_id, model_type)
                 conn.commit()
                 return model_id
 
+    def activate_model(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Make a model the only active one of its type, in one transaction
+
+        Concurrent activations of the same model_type are serialised with an
+        advisory lock, so exactly one row stays active. Serving workers are
+        told through NOTIFY on MODEL_EVENTS_CHANNEL, delivered on commit.
+
+        Args:
+            model_id: Model ID to activate
+
+        Returns:
+            {id, model_type, deactivated} or None if the model does not exist
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT model_type FROM ml_models WHERE id = %s", (model_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    conn.rollback()
+                    return None
+                model_type = row[0]
+                deactivated = self._activate(cursor, model_id, model_type)
+                conn.commit()
+                return {'id': model_id, 'model_type': model_type, 'deactivated': deactivated}
+
+    def _activate(self, cursor, model_id: str, model_type: str) -> List[str]:
+        """Flip is_active within the caller's transaction; returns deactivated IDs"""
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (model_type,))
+        cursor.execute(
+            "UPDATE ml_models SET is_active = 0, updated_at = NOW() "
+            "WHERE model_type = %s AND is_active = 1 AND id <> %s RETURNING id",
+            (model_type, model_id)
+        )
+        deactivated = [r[0] for r in cursor.fetchall()]
+        cursor.execute("UPDATE ml_models SET is_active = 1, updated_at = NOW() WHERE id = %s", (model_id,))
+        self._notify(cursor, 'activated', model_type, model_id)
+        return deactivated
+
+    def claim_retrain(self, model_type: str, model_version: str, cooldown_seconds: float) -> bool:
+        """
+        Claim the retraining of a drifting model version for this process
+
+        Every serving worker sees drift on its own, so the claim is one row
+        per (model_type, model_version) in model_retrain_claims (declared in
+        shared/schema.ts): the insert, or the refresh of a claim older than
+        the cooldown, succeeds for exactly one caller.
+
+        Args:
+            model_type: Model type that drifted
+            model_version: Version of that model
+            cooldown_seconds: A claim younger than this blocks new ones
+
+        Returns:
+            True if the caller should start retraining
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO model_retrain_claims (model_type, model_version) VALUES (%s, %s) "
+                    "ON CONFLICT (model_type, model_version) DO UPDATE SET claimed_at = NOW() "
+                    "WHERE model_retrain_claims.claimed_at < NOW() - make_interval(secs => %s) "
+                    "RETURNING claimed_at",
+                    (model_type, str(model_version), float(cooldown_seconds))
+                )
+                claimed = cursor.fetchone() is not None
+                conn.commit()
+                return claimed
+
+    def _notify(self, cursor, event: str, model_type: str, model_id: str):
+        """Queue a model event for LISTENers; sent when the transaction commits"""
+        payload = json.dumps({'event': event, 'model_type': model_type, 'model_id': str(model_id)})
+        cursor.execute("SELECT pg_notify(%s, %s)", (MODEL_EVENTS_CHANNEL, payload))
+
     def get_active_model(self, model_type: str) -> Optional[Dict[str, Any]]:
         """
         Get the active model of specified type
@@ -67,7 +154,7 @@ class ModelDB:
         """
 
         with self.get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            with conn.cursor(cursor_factory=psycopg2_extras.RealDictCursor) as cursor:
                 cursor.execute(query, (model_type,))
                 result = cursor.fetchone()
                 return dict(result) if result else None
@@ -85,7 +172,7 @@ class ModelDB:
         query = "SELECT * FROM ml_models WHERE id = %s"
 
         with self.get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            with conn.cursor(cursor_factory=psycopg2_extras.RealDictCursor) as cursor:
                 cursor.execute(query, (model_id,))
                 result = cursor.fetchone()
                 return dict(result) if result else None
@@ -108,11 +195,33 @@ class ModelDB:
             params = ()
 
         with self.get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            with conn.cursor(cursor_factory=psycopg2_extras.RealDictCursor) as cursor:
                 cursor.execute(query, params)
                 results = cursor.fetchall()
                 return [dict(row) for row in results]
 
+    def list_active_models(self, model_type_prefix: str) -> List[Dict[str, Any]]:
+        """
+        Latest active model per model_type starting with a prefix, without the model blob
+
+        Args:
+            model_type_prefix: e.g. 'stock_prediction:' for all shards
+
+        Returns:
+            List of {id, model_type, metadata, created_at}
+        """
+        query = """
+        SELECT DISTINCT ON (model_type) id, model_type, metadata, created_at
+        FROM ml_models
+        WHERE model_type LIKE %s AND is_active = 1
+        ORDER BY model_type, created_at DESC
+        """
+
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2_extras.RealDictCursor) as cursor:
+                cursor.execute(query, (model_type_prefix.replace('%', r'\%').replace('_', r'\_') + '%',))
+                return [dict(row) for row in cursor.fetchall()]
+
     def update_model_status(self, model_id: str, is_active: int) -> bool:
         """
         Update model active status
@@ -124,13 +233,16 @@ class ModelDB:
         Returns:
             Success status
         """
-        query = "UPDATE ml_models SET is_active = %s, updated_at = NOW() WHERE id = %s"
+        query = "UPDATE ml_models SET is_active = %s, updated_at = NOW() WHERE id = %s RETURNING model_type"
 
         with self.get_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, (is_active, model_id))
+                row = cursor.fetchone()
+                if row:
+                    self._notify(cursor, 'status', row[0], model_id)
                 conn.commit()
-                return cursor.rowcount > 0
+                return row is not None
 
     def delete_model(self, model_id: str) -> bool:
         """
@@ -142,13 +254,16 @@ class ModelDB:
         Returns:
             Success status
         """
-        query = "DELETE FROM ml_models WHERE id = %s"
+        query = "DELETE FROM ml_models WHERE id = %s RETURNING model_type"
 
         with self.get_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, (model_id,))
+                row = cursor.fetchone()
+                if row:
+                    self._notify(cursor, 'deleted', row[0], model_id)
                 conn.commit()
-                return cursor.rowcount > 0
+                return row is not None
 
     def model_file_to_db(self, model_path: str, metadata: Optional[Dict] = None) -> Dict[str, Any]:
         """
@@ -220,7 +335,7 @@ class ModelDB:
 db_instance = ModelDB()
 
 # Convenience functions
-def save_model_to_db(model_path: str, model_type: str = 'stock_prediction', **kwargs) -> str:
+def save_model_to_db(model_path: str, model_type: str = 'stock_prediction', activate: bool = True, **kwargs) -> str:
     """Save model from file to database"""
     db_model = ModelDB()
     model_data = db_model.model_file_to_db(model_path)
@@ -228,7 +343,7 @@ def save_model_to_db(model_path: str, model_type: str = 'stock_prediction', **kw
         'model_type': model_type,
         **kwargs
     })
-    return db_model.save_model(model_data)
+    return db_model.save_model(model_data, activate=activate)
 
 def load_model_from_db(model_type: str = 'stock_prediction', output_path: Optional[str] = None) -> Any:
     """Load model from database"""
@@ -255,3 +370,41 @@ def get_db_model_metadata(model_type: str = 'stock_prediction') -> Optional[Dict
     db_model = ModelDB()
     model_data = db_model.get_active_model(model_type)
     return model_data.get('metadata') if model_data else None
+
+def load_active_model(model_type: str = 'stock_prediction') -> Optional[Dict[str, Any]]:
+    """
+    Load the active model and its metadata from a single row
+
+    Returns:
+        {id, model, metadata, size_bytes} or None if no active model exists
+    """
+    db_model = ModelDB()
+    return _load_model_record(db_model, db_model.get_active_model(model_type))
+
+def load_model_version(model_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a specific model version, active or not (e.g. a shadow candidate)
+
+    Returns:
+        {id, model, metadata, size_bytes} or None if the model does not exist
+    """
+    db_model = ModelDB()
+    return _load_model_record(db_model, db_model.get_model_by_id(model_id))
+
+def _load_model_record(db_model: ModelDB, model_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not model_data:
+        return None
+
+    import tempfile
+    with tempfile.NamedTemporaryFile(suffix='.pkl', delete=False) as tmp:
+        db_model.model_db_to_file(model_data, tmp.name)
+        size_bytes = os.path.getsize(tmp.name)
+        model = joblib.load(tmp.name)
+    os.unlink(tmp.name)
+
+    return {
+        'id': model_data.get('id'),
+        'model': model,
+        'metadata': model_data.get('metadata') or {},
+        'size_bytes': size_bytes
+    }
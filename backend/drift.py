@@ -0,0 +1,407 @@
+import bisect
+import math
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from lazy_imports import lazy_import
+from metrics import DRIFT_ALERTS, DRIFT_SAMPLES
+
+ml_pipeline = lazy_import('ml_pipeline')
+
+# =============================
+# CONFIG
+# =============================
+DRIFT_QUEUE_SIZE = int(os.getenv('DRIFT_QUEUE_SIZE', '10000'))
+# Model versions tracked per worker; the least recently served is dropped
+DRIFT_MAX_MODELS = int(os.getenv('DRIFT_MAX_MODELS', '16'))
+# No drift is reported before a version has served this many predictions
+DRIFT_MIN_SAMPLES = int(os.getenv('DRIFT_MIN_SAMPLES', '200'))
+DRIFT_EVALUATE_EVERY = int(os.getenv('DRIFT_EVALUATE_EVERY', '100'))
+# Models trained before drift references were saved take their reference
+# from their first served predictions instead
+DRIFT_WARMUP_SAMPLES = int(os.getenv('DRIFT_WARMUP_SAMPLES', '500'))
+# PSI above 0.25 is the usual "significant shift" cut-off; the z-score is
+# check_prediction_drift's threshold on the running prediction mean
+DRIFT_PSI_THRESHOLD = float(os.getenv('DRIFT_PSI_THRESHOLD', '0.25'))
+DRIFT_Z_THRESHOLD = float(os.getenv('DRIFT_Z_THRESHOLD', '2'))
+DRIFT_SKETCH_COMPRESSION = int(os.getenv('DRIFT_SKETCH_COMPRESSION', '100'))
+DRIFT_RETRAIN_COOLDOWN_SECONDS = float(os.getenv('DRIFT_RETRAIN_COOLDOWN_SECONDS', str(24 * 60 * 60)))
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Floor for empty bins so PSI stays finite
+_PSI_EPSILON = 1e-4
+
+
+# =============================
+# RUNNING STATISTICS
+# =============================
+class RunningMoments:
+    """Count, mean, variance, min and max of a stream (Welford's algorithm)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count, 'mean': self.mean, 'std': self.std, 'min': self.min, 'max': self.max}
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles of a stream in bounded memory (merging t-digest)
+
+    Values are buffered and periodically merged into weighted centroids:
+    a few hundred at the default `compression`, growing only with the
+    logarithm of the count. Centroids near the median may hold many
+    values, and the ones in the tails hold few, so the tail quantiles
+    stay accurate.
+    """
+
+    def __init__(self, compression: int = DRIFT_SKETCH_COMPRESSION):
+        self.compression = compression
+        self.count = 0
+        self._centroids = []
+        self._buffer = []
+
+    def add(self, value: float):
+        self._buffer.append(value)
+        self.count += 1
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + [(value, 1) for value in self._buffer])
+        self._buffer = []
+        merged = [list(points[0])]
+        cumulative = 0
+        for mean, weight in points[1:]:
+            current = merged[-1]
+            q = (cumulative + current[1] + weight / 2) / self.count
+            limit = max(1.0, 4 * self.count * q * (1 - q) / self.compression)
+            if current[1] + weight <= limit:
+                current[0] += (mean - current[0]) * weight / (current[1] + weight)
+                current[1] += weight
+            else:
+                cumulative += current[1]
+                merged.append([mean, weight])
+        self._centroids = [tuple(c) for c in merged]
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self._centroids:
+            return None
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+        # Interpolate between centroid midpoints on the cumulative weight
+        target = q * self.count
+        cumulative = 0
+        previous = None
+        for mean, weight in self._centroids:
+            midpoint = cumulative + weight / 2
+            if target <= midpoint:
+                if previous is None:
+                    return mean
+                prev_mean, prev_midpoint = previous
+                return prev_mean + (mean - prev_mean) * (target - prev_midpoint) / (midpoint - prev_midpoint)
+            previous = (mean, midpoint)
+            cumulative += weight
+        return self._centroids[-1][0]
+
+    def summary(self) -> dict:
+        return {f'p{int(q * 100)}': self.quantile(q) for q in SUMMARY_QUANTILES}
+
+
+def population_stability_index(expected, actual) -> float:
+    """PSI between two bin-proportion lists of the same length"""
+    total = 0.0
+    for e, a in zip(expected, actual):
+        e, a = max(e, _PSI_EPSILON), max(a, _PSI_EPSILON)
+        total += (a - e) * math.log(a / e)
+    return total
+
+
+class BinnedCounts:
+    """Counts of a stream over a reference's bins, compared by PSI"""
+
+    def __init__(self, reference: dict):
+        self.edges = reference['edges']
+        self.expected = reference['proportions']
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_right(self.edges, value)] += 1
+        self.count += 1
+
+    def psi(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return population_stability_index(self.expected, [c / self.count for c in self.counts])
+
+
+class StreamStats:
+    """Moments, quantile sketch and (once a reference exists) binned counts of one stream"""
+
+    def __init__(self):
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch()
+        self.bins = None
+
+    def add(self, value: float):
+        self.moments.add(value)
+        self.sketch.add(value)
+        if self.bins is not None:
+            self.bins.add(value)
+
+    def summary(self) -> dict:
+        summary = self.moments.summary()
+        if self.moments.count:
+            summary['quantiles'] = self.sketch.summary()
+        summary['psi'] = self.bins.psi() if self.bins is not None else None
+        return summary
+
+
+# =============================
+# PER-MODEL STATE
+# =============================
+class ModelDrift:
+    """Running statistics of the predictions and inputs served by one model version"""
+
+    def __init__(self, model_type: str, model_version: str, metadata: dict):
+        self.model_type = model_type
+        self.model_version = model_version
+        self.started_at = time.time()
+        self.samples = 0
+        self.prediction_mean = metadata.get('prediction_mean')
+        self.prediction_std = metadata.get('prediction_std')
+        self.prediction = StreamStats()
+        self.features = OrderedDict((col, StreamStats()) for col in metadata.get('numeric_features', []))
+        self.reference_source = None
+        self._warmup = []
+        self.detected = False
+        self.reasons = []
+        self.evaluated_at = None
+        self.retrain_triggered_at = None
+
+        reference = metadata.get('drift_reference')
+        if reference:
+            self._set_reference(reference, 'training')
+
+    def _set_reference(self, reference, source):
+        if reference.get('prediction'):
+            self.prediction.bins = BinnedCounts(reference['prediction'])
+        for col, bins in (reference.get('features') or {}).items():
+            if bins and col in self.features:
+                self.features[col].bins = BinnedCounts(bins)
+        self.reference_source = source
+
+    def add(self, prediction: float, row: dict):
+        self.samples += 1
+        self.prediction.add(prediction)
+        for col, stats in self.features.items():
+            value = row.get(col)
+            if value is not None and math.isfinite(value):
+                stats.add(value)
+
+        if self.reference_source is None:
+            self._warmup.append((prediction, row))
+            if len(self._warmup) >= DRIFT_WARMUP_SAMPLES:
+                columns = {col: [r.get(col, math.nan) for _, r in self._warmup] for col in self.features}
+                reference = ml_pipeline.drift_reference(columns, [p for p, _ in self._warmup])
+                self._set_reference(reference, 'warmup')
+                self._warmup = []
+
+    def evaluate(self):
+        """Update `detected`/`reasons` from the current statistics"""
+        reasons = []
+        if self.samples >= DRIFT_MIN_SAMPLES:
+            if self.prediction_mean is not None and self.prediction_std:
+                if ml_pipeline.check_prediction_drift(self.prediction.moments.mean, self.prediction_mean,
+                                                      self.prediction_std, threshold=DRIFT_Z_THRESHOLD):
+                    reasons.append('prediction_mean')
+            psi = self.prediction.bins.psi() if self.prediction.bins is not None else None
+            if psi is not None and psi > DRIFT_PSI_THRESHOLD:
+                reasons.append('prediction_psi')
+            for col, stats in self.features.items():
+                psi = stats.bins.psi() if stats.bins is not None else None
+                if psi is not None and psi > DRIFT_PSI_THRESHOLD:
+                    reasons.append(f'feature_psi:{col}')
+        self.detected = bool(reasons)
+        self.reasons = reasons
+        self.evaluated_at = time.time()
+        return self.detected
+
+    def summary(self, include_features: bool = True) -> dict:
+        z_score = None
+        if self.prediction.moments.count and self.prediction_mean is not None and self.prediction_std:
+            z_score = abs(self.prediction.moments.mean - self.prediction_mean) / self.prediction_std
+        summary = {
+            'model_type': self.model_type,
+            'model_version': self.model_version,
+            'started_at': _isoformat(self.started_at),
+            'samples': self.samples,
+            'reference': self.reference_source or f'collecting ({len(self._warmup)}/{DRIFT_WARMUP_SAMPLES})',
+            'prediction': {
+                **self.prediction.summary(),
+                'training_mean': self.prediction_mean,
+                'training_std': self.prediction_std,
+                'z_score': z_score
+            },
+            'drift': {
+                'detected': self.detected,
+                'reasons': self.reasons,
+                'evaluated_at': _isoformat(self.evaluated_at),
+                'retrain_triggered_at': _isoformat(self.retrain_triggered_at)
+            }
+        }
+        if include_features:
+            summary['features'] = {col: stats.summary() for col, stats in self.features.items()}
+        return summary
+
+
+def _isoformat(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(timestamp)) if timestamp else None
+
+
+# =============================
+# MONITOR
+# =============================
+class DriftMonitor:
+    """
+    Streaming drift statistics of every model version a worker serves
+
+    The request thread only calls `observe`, which enqueues references to
+    data it already holds and never blocks; a full queue drops the sample.
+    A single background thread updates the version's statistics, which use
+    constant memory per version:
+    - Welford moments and a quantile sketch of the predictions and of each
+      numeric input;
+    - counts over the reference bins, compared by PSI.
+
+    The reference is the hold-out distribution saved at training time
+    (metadata['drift_reference']), or the first DRIFT_WARMUP_SAMPLES served
+    rows for older models. Every DRIFT_EVALUATE_EVERY samples the version
+    is checked. Drift is detected when the running prediction mean is
+    DRIFT_Z_THRESHOLD training standard deviations away from the training
+    mean (check_prediction_drift), or when the PSI of the predictions or
+    of any input exceeds DRIFT_PSI_THRESHOLD. The first detection then
+    calls `on_drift` with the version's summary, at most once per
+    DRIFT_RETRAIN_COOLDOWN_SECONDS per version.
+    """
+
+    def __init__(self, on_drift: Optional[Callable[[dict], None]] = None, queue_size: int = DRIFT_QUEUE_SIZE,
+                 max_models: int = DRIFT_MAX_MODELS):
+        self.on_drift = on_drift
+        self.max_models = max_models
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._models = OrderedDict()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+        self._thread.start()
+
+    def observe(self, model_type: str, model_version: str, metadata: dict, features, prediction: float):
+        """
+        Queue one served prediction (non-blocking)
+
+        Args:
+            model_type: Model type that served the prediction
+            model_version: Version of that model
+            metadata: The model's metadata (numeric_features, drift_reference, ...)
+            features: Single-row DataFrame passed to the model
+            prediction: Prediction returned to the client
+        """
+        try:
+            self._queue.put_nowait((model_type, str(model_version), metadata, features, float(prediction)))
+        except queue.Full:
+            self.dropped += 1
+            DRIFT_SAMPLES.inc(result='dropped')
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                self._update(*item)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                DRIFT_SAMPLES.inc(result='error')
+
+    def _update(self, model_type, model_version, metadata, features, prediction):
+        row = {col: float(value) for col, value in features.iloc[0].items()}
+        key = (model_type, model_version)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._models[key] = ModelDrift(model_type, model_version, metadata)
+                while len(self._models) > self.max_models:
+                    self._models.popitem(last=False)
+            self._models.move_to_end(key)
+            model.add(prediction, row)
+            DRIFT_SAMPLES.inc(result='observed')
+
+            if model.samples % DRIFT_EVALUATE_EVERY:
+                return
+            was_detected = model.detected
+            if not model.evaluate():
+                return
+            if not was_detected:
+                for reason in model.reasons:
+                    DRIFT_ALERTS.inc(model_type=model_type, signal=reason.split(':', 1)[0])
+            now = time.time()
+            if model.retrain_triggered_at and now - model.retrain_triggered_at < DRIFT_RETRAIN_COOLDOWN_SECONDS:
+                return
+            model.retrain_triggered_at = now
+            summary = model.summary(include_features=False)
+
+        print(f"📉 Drift detected for {model_type} ({model_version}): {', '.join(summary['drift']['reasons'])}")
+        if self.on_drift is not None:
+            self.on_drift(summary)
+
+    def summary(self, model_type: Optional[str] = None, include_features: bool = True) -> dict:
+        with self._lock:
+            models = [m.summary(include_features) for m in reversed(self._models.values())
+                      if model_type is None or m.model_type == model_type]
+        return {
+            'models': models,
+            'queued': self._queue.qsize(),
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'thresholds': {
+                'min_samples': DRIFT_MIN_SAMPLES,
+                'psi': DRIFT_PSI_THRESHOLD,
+                'z_score': DRIFT_Z_THRESHOLD
+            }
+        }
@@ -0,0 +1,330 @@
+import os
+import threading
+from typing import Iterable, List, Optional
+
+from cache import TTLCache
+from lazy_imports import lazy_import
+from price_store import PriceStore, DATE_COL, SYMBOL_COL
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+ml_pipeline = lazy_import('ml_pipeline')
+
+# =============================
+# CONFIG
+# =============================
+FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', os.path.join('data', 'features'))
+FEATURE_ROW_CACHE_SIZE = int(os.getenv('FEATURE_ROW_CACHE_SIZE', '4096'))
+# Rows are re-validated against the file's mtime on every lookup; the TTL only bounds memory for idle symbols
+FEATURE_ROW_TTL_SECONDS = float(os.getenv('FEATURE_ROW_TTL_SECONDS', str(60 * 60)))
+FEATURES_FILE = 'features.parquet'
+
+BAR_FEATURES = ['Open', 'High', 'Low', 'Close', 'Volume']
+INDICATOR_COLUMNS = ['RSI_14', 'MACD', 'Signal_Line', 'MA20', 'STD20', 'Bollinger_Upper', 'Bollinger_Lower',
+                     'Volume_MA']
+# EMA values carried from one bar to the next, so new bars extend the
+# stored rows exactly instead of re-running the EMAs from the first bar
+EMA_STATE_COLUMNS = ['_EMA12', '_EMA26']
+EMA_SPANS = {'_EMA12': 12, '_EMA26': 26, 'Signal_Line': 9}
+SEED_COLUMNS = EMA_STATE_COLUMNS + ['Signal_Line']
+# Longest rolling window (MA20/STD20/Volume_MA); RSI needs 14 diffs = 15 bars
+WARMUP_BARS = 20
+
+
+# =============================
+# INDICATORS
+# =============================
+def _drop_group_levels(result, n_keys):
+    return result.droplevel(list(range(n_keys))) if n_keys else result
+
+
+def _rolling(values, window, groups):
+    if groups is None:
+        return values.rolling(window=window)
+    return values.groupby(groups, sort=False).rolling(window=window)
+
+
+def _ema(values, span, keys, seed=None):
+    """
+    EMA (adjust=False) within each key group, optionally continuing from a seed
+
+    Where `seed` is set, that row's EMA is (1 - alpha) * seed + alpha * value,
+    i.e. the recursion continues from the EMA of the bar before it.
+    """
+    if seed is not None:
+        alpha = 2 / (span + 1)
+        values = values.mask(seed.notna(), (1 - alpha) * seed + alpha * values)
+    if not keys:
+        return values.ewm(span=span, adjust=False).mean()
+    return _drop_group_levels(values.groupby(keys, sort=False).ewm(span=span, adjust=False).mean(), len(keys))
+
+
+def compute_indicators(bars, groups=None, seed=None):
+    """
+    Technical indicators served to and trained on by every model
+
+    Rolling windows and EMAs run within each symbol (`groups`), so none of
+    them crosses from one symbol into the next. Without `seed` the EMAs start
+    at each symbol's first bar. With `seed`, they restart on the seeded row
+    of each symbol from the stored EMA state of the previous bar, which lets
+    a few new bars (after WARMUP_BARS of context) extend stored rows with
+    exactly the values a full recomputation gives.
+
+    Args:
+        bars: Bars (Close, Volume) in date order, sorted by symbol first when
+            `groups` is given
+        groups: Symbol of each row (Series aligned with `bars`), or None for
+            a single symbol
+        seed: Optional frame aligned with `bars` holding EMA_STATE_COLUMNS and
+            Signal_Line of the previous bar on the first new row per symbol
+            (NaN elsewhere); rows before it are context only
+
+    Returns:
+        DataFrame of INDICATOR_COLUMNS and EMA_STATE_COLUMNS with the index of `bars`
+    """
+    close, volume = bars['Close'], bars['Volume']
+    group_keys = [] if groups is None else [groups]
+    ema_keys = list(group_keys)
+    if seed is not None:
+        restart = seed['_EMA12'].notna()
+        ema_keys.append(restart.groupby(groups, sort=False).cumsum() if groups is not None else restart.cumsum())
+
+    out = {}
+
+    # RSI
+    delta = close.diff() if groups is None else close.groupby(groups, sort=False).diff()
+    gain = _drop_group_levels(_rolling(delta.where(delta > 0, 0), 14, groups).mean(), len(group_keys))
+    loss = _drop_group_levels(_rolling(-delta.where(delta < 0, 0), 14, groups).mean(), len(group_keys))
+    out['RSI_14'] = 100 - (100 / (1 + gain / loss))
+
+    # MACD
+    exp1 = _ema(close, EMA_SPANS['_EMA12'], ema_keys, None if seed is None else seed['_EMA12'])
+    exp2 = _ema(close, EMA_SPANS['_EMA26'], ema_keys, None if seed is None else seed['_EMA26'])
+    out['MACD'] = exp1 - exp2
+    out['Signal_Line'] = _ema(out['MACD'], EMA_SPANS['Signal_Line'], ema_keys,
+                              None if seed is None else seed['Signal_Line'])
+
+    # Bollinger Bands
+    window = _rolling(close, 20, groups)
+    out['MA20'] = _drop_group_levels(window.mean(), len(group_keys))
+    out['STD20'] = _drop_group_levels(window.std(), len(group_keys))
+    out['Bollinger_Upper'] = out['MA20'] + (out['STD20'] * 2)
+    out['Bollinger_Lower'] = out['MA20'] - (out['STD20'] * 2)
+
+    # Volume indicators
+    out['Volume_MA'] = _drop_group_levels(_rolling(volume, 20, groups).mean(), len(group_keys))
+
+    out['_EMA12'] = exp1
+    out['_EMA26'] = exp2
+    # Grouped results come back in group order; align them to the rows of `bars`
+    return pd.DataFrame(out).reindex(bars.index)
+
+
+def _bar_dates(index):
+    """Bar timestamps as tz-naive midnight dates (store keys)"""
+    dates = pd.DatetimeIndex(index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return dates.normalize().astype('datetime64[ns]')
+
+
+# =============================
+# STORE
+# =============================
+class FeatureStore:
+    """
+    Point-in-time feature rows per (symbol, date)
+
+    Rows are materialized once from the price store and kept at
+    <root>/Ticker=<SYMBOL>/features.parquet: bar columns, INDICATOR_COLUMNS,
+    the ml_pipeline.create_features columns they allow, and the EMA state.
+    A row dated D only uses bars up to D. Training reads them with `as_of`
+    and serving with `latest`/`online_row`, so both see the same values.
+    """
+
+    def __init__(self, root: str = FEATURE_STORE_DIR, prices: Optional[PriceStore] = None):
+        self.root = root
+        self.prices = prices or PriceStore()
+        self._rows = TTLCache(FEATURE_ROW_TTL_SECONDS, maxsize=FEATURE_ROW_CACHE_SIZE, name='feature_rows')
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.root, f'{SYMBOL_COL}={symbol.upper()}', FEATURES_FILE)
+
+    def symbols(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        prefix = f'{SYMBOL_COL}='
+        return sorted(
+            name[len(prefix):] for name in os.listdir(self.root)
+            if name.startswith(prefix) and os.path.exists(os.path.join(self.root, name, FEATURES_FILE))
+        )
+
+    # -----------------------------
+    # Materialization
+    # -----------------------------
+    def materialize(self, symbols: Iterable[str], full: bool = False) -> dict:
+        """
+        Add feature rows for bars that arrived since the last run
+
+        All symbols are computed in one grouped pass. A stored symbol only
+        needs its new bars plus WARMUP_BARS of context, and its EMAs continue
+        from the stored state. `full=True` rebuilds every row (e.g. after
+        the price history was corrected).
+
+        Returns:
+            {symbol: number of rows added}
+        """
+        frames, seeds, stored = [], [], {}
+        for symbol in symbols:
+            symbol = symbol.upper()
+            bars = self.prices.read(symbol)
+            if bars.empty:
+                continue
+            bars = bars[BAR_FEATURES]
+            previous = None if full else self.read(symbol, include_state=True)
+            seed = pd.DataFrame(np.nan, index=bars.index, columns=SEED_COLUMNS)
+            if previous is not None and len(previous):
+                first_new = bars.index.searchsorted(previous.index[-1], side='right')
+                if first_new == len(bars):
+                    continue
+                if first_new == 0 or bars.index[first_new - 1] != previous.index[-1]:
+                    # The stored rows no longer line up with the price history
+                    previous = None
+                else:
+                    context = min(first_new, WARMUP_BARS)
+                    bars, seed = bars.iloc[first_new - context:], seed.iloc[first_new - context:]
+                    seed.iloc[context] = previous[SEED_COLUMNS].iloc[-1].to_numpy()
+            stored[symbol] = previous
+            frames.append(bars.reset_index().assign(**{SYMBOL_COL: symbol}))
+            seeds.append(seed.reset_index(drop=True))
+
+        if not frames:
+            return {}
+        bars = pd.concat(frames, ignore_index=True)
+        seed = pd.concat(seeds, ignore_index=True)
+        features = pd.concat([bars, compute_indicators(bars, groups=bars[SYMBOL_COL], seed=seed)], axis=1)
+        features = ml_pipeline.create_features(features, inplace=True)
+
+        added = {}
+        for symbol, rows in features.groupby(SYMBOL_COL, sort=False):
+            rows = rows.drop(columns=[SYMBOL_COL]).set_index(DATE_COL)
+            previous = stored[symbol]
+            if previous is not None:
+                rows = rows[rows.index > previous.index[-1]]
+                rows = pd.concat([previous, rows[previous.columns]])
+            added[symbol] = len(rows) - (0 if previous is None else len(previous))
+            self._write(symbol, rows)
+        return added
+
+    def _write(self, symbol, rows):
+        path = self.path(symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        pq.write_table(pa.Table.from_pandas(rows.reset_index(), preserve_index=False), tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        self._rows.delete(symbol.upper())
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    def read(self, symbol: str, start=None, end=None, include_state: bool = False):
+        """Feature rows of a symbol indexed by date, or None when not materialized"""
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return None
+        filters = []
+        if start is not None:
+            filters.append((DATE_COL, '>=', pd.Timestamp(start)))
+        if end is not None:
+            filters.append((DATE_COL, '<=', pd.Timestamp(end)))
+        rows = pd.read_parquet(path, filters=filters or None).set_index(DATE_COL)
+        return rows if include_state else rows.drop(columns=EMA_STATE_COLUMNS)
+
+    def latest(self, symbol: str, include_state: bool = False):
+        """
+        Latest stored row of a symbol as a one-row frame, or None
+
+        The row is cached and only re-read when the file changes, so a
+        lookup costs one stat call.
+        """
+        symbol = symbol.upper()
+        try:
+            mtime = os.stat(self.path(symbol)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._rows.get(symbol)
+        if cached is None or cached[0] != mtime:
+            pf = pq.ParquetFile(self.path(symbol))
+            last_group = pf.read_row_group(pf.num_row_groups - 1).to_pandas()
+            cached = (mtime, last_group.iloc[-1:].set_index(DATE_COL))
+            self._rows.set(symbol, cached)
+        row = cached[1]
+        return row if include_state else row.drop(columns=EMA_STATE_COLUMNS)
+
+    def as_of(self, keys, columns: Optional[List[str]] = None, tolerance=None):
+        """
+        Point-in-time join of feature rows onto (Ticker, Date) keys
+
+        Each key gets the latest row of its symbol dated on or before the
+        key's date, never a later one, so labels and features can be joined
+        without leaking the future.
+
+        Args:
+            keys: Frame with Ticker and Date columns (e.g. label rows)
+            columns: Feature columns to attach (default: all)
+            tolerance: Optional Timedelta; older rows are not used
+
+        Returns:
+            `keys` with the feature columns added, in the order of `keys`
+        """
+        frames = []
+        for symbol in keys[SYMBOL_COL].astype(str).str.upper().unique():
+            rows = self.read(symbol)
+            if rows is None:
+                continue
+            rows = rows[columns] if columns else rows
+            frames.append(rows.reset_index().assign(**{SYMBOL_COL: symbol}))
+
+        keys = keys.assign(**{SYMBOL_COL: keys[SYMBOL_COL].astype(str).str.upper(),
+                              DATE_COL: pd.to_datetime(keys[DATE_COL]).astype('datetime64[ns]')})
+        if not frames:
+            return keys
+        features = pd.concat(frames, ignore_index=True)
+        features = features.drop(columns=[c for c in features.columns if c in keys.columns
+                                          and c not in (SYMBOL_COL, DATE_COL)])
+        order = keys.reset_index(drop=True).rename_axis('_order').reset_index()
+        joined = pd.merge_asof(order.sort_values(DATE_COL), features.sort_values(DATE_COL),
+                               on=DATE_COL, by=SYMBOL_COL, direction='backward', tolerance=tolerance)
+        return joined.sort_values('_order').drop(columns='_order').set_index(keys.index)
+
+    # -----------------------------
+    # Serving
+    # -----------------------------
+    def online_row(self, symbol: str, bars):
+        """
+        Feature row for the last of `bars` (recent daily bars from upstream)
+
+        Served from the store when its latest row is that bar. When newer
+        bars arrived (including today's partial bar), the stored EMA state is
+        extended over them with the bars as context, without writing. Symbols
+        that are not materialized, or whose stored rows fall outside `bars`,
+        are computed from `bars` alone, as before the store existed.
+        """
+        dates = _bar_dates(bars.index)
+        recent = bars[BAR_FEATURES].set_axis(dates).rename_axis(DATE_COL)
+        seed = None
+        stored = self.latest(symbol, include_state=True)
+        if stored is not None:
+            first_new = dates.searchsorted(stored.index[-1], side='right')
+            lined_up = first_new > 0 and dates[first_new - 1] == stored.index[-1]
+            if lined_up and first_new == len(dates) and np.isclose(stored['Close'].iloc[-1], recent['Close'].iloc[-1]):
+                return stored.drop(columns=EMA_STATE_COLUMNS)
+            if lined_up and WARMUP_BARS <= first_new < len(dates):
+                recent = recent.iloc[first_new - WARMUP_BARS:]
+                seed = pd.DataFrame(np.nan, index=recent.index, columns=SEED_COLUMNS)
+                seed.iloc[WARMUP_BARS] = stored[SEED_COLUMNS].iloc[-1].to_numpy()
+
+        features = pd.concat([recent, compute_indicators(recent, seed=seed)], axis=1).iloc[-1:]
+        return ml_pipeline.create_features(features).drop(columns=EMA_STATE_COLUMNS)
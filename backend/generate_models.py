@@ -1,43 +1,23 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 import joblib
 import os
 from datetime import datetime
 
+from ml_pipeline import make_sample_dataset, build_estimator
+
 print("🚀 Generating model files for StockSight...")
 
 # Create model artifacts directory
 MODEL_DIR = "model_artifacts"
+ESTIMATOR = os.getenv("ESTIMATOR", "random_forest")  # see ml_pipeline.ESTIMATORS
 os.makedirs(MODEL_DIR, exist_ok=True)
 
 # Create sample training data
-np.random.seed(42)
 n_samples = 1000
-
-# Generate sample features
-sample_data = pd.DataFrame({
-    'Close': np.random.randn(n_samples).cumsum() * 10 + 100,
-    'Volume': np.random.randint(1000000, 10000000, n_samples),
-    'RSI_14': np.random.uniform(20, 80, n_samples),
-    'MACD': np.random.randn(n_samples) * 2,
-    'Bollinger_Upper': np.random.randn(n_samples).cumsum() * 5 + 110,
-    'Bollinger_Lower': np.random.randn(n_samples).cumsum() * 5 + 90,
-    'News_Sentiment_Score': np.random.uniform(-1, 1, n_samples),
-    'Social_Sentiment_Score': np.random.uniform(-1, 1, n_samples),
-    'ROE': np.random.uniform(0.05, 0.25, n_samples),
-    'Debt_to_Equity': np.random.uniform(0.1, 2.0, n_samples),
-    'PE_Ratio': np.random.uniform(10, 30, n_samples),
-    'EPS': np.random.uniform(1, 5, n_samples),
-    'Inflation_Rate': np.random.uniform(0.01, 0.08, n_samples),
-    'Interest_Rate': np.random.uniform(0.02, 0.06, n_samples)
-})
-
-# Create target (next day close price)
-sample_data['Target_Close_7d'] = sample_data['Close'].shift(-7)
-sample_data = sample_data.dropna()
+sample_data = make_sample_dataset(n_samples, seed=42)
 
 # Split features and target
 feature_cols = [col for col in sample_data.columns if col != 'Target_Close_7d']
@@ -45,13 +25,11 @@ X = sample_data[feature_cols]
 y = sample_data['Target_Close_7d']
 
 # Create and train model
-print("🔧 Training RandomForest model...")
-model = RandomForestRegressor(
-    n_estimators=100,
-    max_depth=10,
-    random_state=42,
-    n_jobs=-1
-)
+print(f"🔧 Training {ESTIMATOR} model...")
+if ESTIMATOR == "random_forest":
+    model = build_estimator(ESTIMATOR, n_estimators=100, max_depth=10, min_samples_split=2, min_samples_leaf=1)
+else:
+    model = build_estimator(ESTIMATOR)
 
 # Simple preprocessor (just scaling)
 preprocessor = StandardScaler()
@@ -86,7 +64,8 @@ metadata = {
     "n_train": len(X),
     "n_test": 100,
     "prediction_mean": float(np.mean(y)),
-    "prediction_std": float(np.std(y))
+    "prediction_std": float(np.std(y)),
+    "estimator": ESTIMATOR
 }
 
 # Save metadata
@@ -95,14 +74,14 @@ joblib.dump(metadata, metadata_path)
 print(f"💾 Saved metadata to: {metadata_path}")
 
 # Create feature importance
-importances = pipeline.named_steps['model'].feature_importances_
-importance_df = pd.DataFrame({
-    'feature': feature_cols,
-    'importance': importances
-}).sort_values('importance', ascending=False)
-
-importance_df.to_csv(os.path.join(MODEL_DIR, "feature_importance.csv"), index=False)
-print("💾 Saved feature importance")
+if hasattr(model, 'feature_importances_'):
+    importance_df = pd.DataFrame({
+        'feature': feature_cols,
+        'importance': model.feature_importances_
+    }).sort_values('importance', ascending=False)
+
+    importance_df.to_csv(os.path.join(MODEL_DIR, "feature_importance.csv"), index=False)
+    print("💾 Saved feature importance")
 
 print("✅ All model files generated successfully!")
 print(f"📁 Files created in: {MODEL_DIR}/")
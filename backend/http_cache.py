@@ -0,0 +1,128 @@
+import hashlib
+import os
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import make_response, request
+
+from cache import TTLCache
+from metrics import NOT_MODIFIED
+
+# =============================
+# CONFIG
+# =============================
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', '1') == '1'
+# How long a recorded data version (e.g. last bar of a history) is trusted
+# before the view runs again to re-check it upstream
+DATA_VERSION_TTL_SECONDS = float(os.getenv('DATA_VERSION_TTL_SECONDS', '60'))
+DATA_VERSION_CACHE_SIZE = int(os.getenv('DATA_VERSION_CACHE_SIZE', '10000'))
+
+
+class DataVersions:
+    """
+    Last known version of each piece of served data
+
+    Views record a cheap fingerprint of what they served (last bar
+    timestamp and close, model id, ...) under a key such as
+    ('history', 'AAPL', '5Y'). `cached_route` turns it into an ETag and
+    answers a matching If-None-Match before the view runs. Entries expire
+    after `ttl` so new bars are still picked up.
+    """
+
+    def __init__(self, ttl: float = DATA_VERSION_TTL_SECONDS, maxsize: int = DATA_VERSION_CACHE_SIZE):
+        self._versions = TTLCache(ttl, maxsize=maxsize, name='data_versions')
+
+    def record(self, key, version, ttl: Optional[float] = None):
+        if version is not None:
+            self._versions.set(key, str(version), ttl)
+
+    def get(self, key) -> Optional[str]:
+        return self._versions.get(key)
+
+    def clear(self):
+        self._versions.clear()
+
+
+data_versions = DataVersions()
+
+
+def last_bar_version(bars) -> Optional[str]:
+    """Fingerprint of a bar frame: its last timestamp and close (today's bar moves intraday)"""
+    if bars is None or len(bars) == 0:
+        return None
+    return f"{bars.index[-1].isoformat()}:{float(bars['Close'].iloc[-1]):.6f}:{len(bars)}"
+
+
+def make_etag(*parts) -> str:
+    """Opaque ETag value for a request and the version of its data"""
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()[:24]
+
+
+def cache_control(max_age: int, stale_while_revalidate: int = 0, private: bool = False) -> str:
+    directives = ['private' if private else 'public', f'max-age={max_age}']
+    if stale_while_revalidate:
+        directives.append(f'stale-while-revalidate={stale_while_revalidate}')
+    return ', '.join(directives)
+
+
+def cached_route(max_age: int, stale_while_revalidate: int = 0, version: Optional[Callable] = None,
+                 private: bool = False):
+    """
+    Add Cache-Control, ETag and conditional GET handling to a Flask view
+
+    Args:
+        max_age: Seconds clients and CDNs may reuse the response
+        stale_while_revalidate: Seconds a stale response may be served while revalidating
+        version: Called with the view's arguments; returns the data version
+            (e.g. data_versions.get(...)) or None when it is not known yet.
+            A known version that matches If-None-Match returns 304 without
+            running the view or serializing anything. Without a version the
+            ETag is a hash of the response body, which still saves the transfer.
+        private: Only the browser may cache (not shared caches)
+    """
+    policy = cache_control(max_age, stale_while_revalidate, private)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not HTTP_CACHE_ENABLED or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            route = request.url_rule.rule if request.url_rule else request.path
+            etag = _versioned_etag(version, args, kwargs)
+            if etag is not None and request.if_none_match.contains_weak(etag):
+                NOT_MODIFIED.inc(route=route, stage='before_view')
+                return _not_modified(etag, policy)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+
+            etag = _versioned_etag(version, args, kwargs)
+            if etag is None:
+                etag = hashlib.sha1(response.get_data()).hexdigest()[:24]
+            response.headers['Cache-Control'] = policy
+            response.set_etag(etag, weak=True)
+            if request.if_none_match.contains_weak(etag):
+                NOT_MODIFIED.inc(route=route, stage='after_view')
+                return _not_modified(etag, policy)
+            return response
+        return wrapper
+    return decorator
+
+
+def _versioned_etag(version, args, kwargs):
+    if version is None:
+        return None
+    data_version = version(*args, **kwargs)
+    if data_version is None:
+        return None
+    query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return make_etag(request.path, query, data_version)
+
+
+def _not_modified(etag, policy):
+    response = make_response('', 304)
+    response.headers['Cache-Control'] = policy
+    response.set_etag(etag, weak=True)
+    return response
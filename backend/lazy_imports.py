@@ -0,0 +1,49 @@
+import importlib
+import threading
+import time
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _load_times[self._name] = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+_load_times = {}
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for `name` that defers the import until first use"""
+    return LazyModule(name)
+
+
+def preload(*modules):
+    """Force the import of lazily loaded modules (e.g. during pre-warm)"""
+    for module in modules:
+        if isinstance(module, LazyModule):
+            module._load()
+
+
+def load_times():
+    """Seconds spent importing each lazily loaded module so far"""
+    return dict(_load_times)
@@ -0,0 +1,280 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from cache import all_caches
+
+# Latency buckets in seconds (Prometheus convention)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return '{' + body + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing counter with optional labels"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with optional labels"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = ('le', _format_value(bound))
+                yield f'{self.name}_bucket', _format_labels(self.labelnames, key, le), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labelnames, key), total
+            yield f'{self.name}_count', _format_labels(self.labelnames, key), count
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        Register a callable evaluated at scrape time
+
+        The callable returns an iterable of (name, type, help, samples) where
+        samples is a list of (labels dict, value).
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    label_str = _format_labels(tuple(labels), tuple(labels.values()))
+                    lines.append(f'{name}{label_str} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# =============================
+# GLOBAL METRICS
+# =============================
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'stocksight_http_request_duration_seconds',
+    'HTTP request latency by route',
+    ('method', 'route', 'status')
+)
+UPSTREAM_LATENCY = registry.histogram(
+    'stocksight_upstream_request_duration_seconds',
+    'Latency of calls to market-data and news providers',
+    ('provider', 'operation')
+)
+UPSTREAM_ERRORS = registry.counter(
+    'stocksight_upstream_errors_total',
+    'Upstream calls that raised an exception',
+    ('provider', 'operation')
+)
+CIRCUIT_OPENED = registry.counter(
+    'stocksight_upstream_circuit_opened_total',
+    'Times a provider circuit breaker opened',
+    ('provider',)
+)
+STALE_RESPONSES = registry.counter(
+    'stocksight_stale_responses_total',
+    'Responses served from last-known-good data because upstream failed',
+    ('route',)
+)
+UPSTREAM_THROTTLED = registry.counter(
+    'stocksight_upstream_throttled_total',
+    'Upstream calls refused because no rate-budget token was available before the deadline',
+    ('provider', 'priority')
+)
+UPSTREAM_RETRIED = registry.counter(
+    'stocksight_upstream_retries_total',
+    'Upstream calls retried after an error',
+    ('provider', 'operation')
+)
+UPSTREAM_QUEUE_WAIT = registry.histogram(
+    'stocksight_upstream_queue_wait_seconds',
+    'Time spent waiting for an upstream rate-budget token',
+    ('provider', 'priority'),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+STAGE_LATENCY = registry.histogram(
+    'stocksight_stage_duration_seconds',
+    'Time spent in internal hot-path stages',
+    ('stage',)
+)
+PREDICTION_FALLBACKS = registry.counter(
+    'stocksight_prediction_fallbacks_total',
+    'Predictions served by generate_simple_prediction instead of the ML model',
+    ('reason',)
+)
+PREDICTIONS = registry.counter(
+    'stocksight_predictions_total',
+    'Predictions served by model type',
+    ('model',)
+)
+MODEL_ROUTES = registry.counter(
+    'stocksight_model_routes_total',
+    'ML predictions by the granularity of the model that served them',
+    ('shard',)
+)
+RESPONSE_BYTES = registry.counter(
+    'stocksight_response_compression_bytes_total',
+    'Bytes of compressed responses before (raw) and after (sent) compression',
+    ('encoding', 'stage')
+)
+NOT_MODIFIED = registry.counter(
+    'stocksight_http_not_modified_total',
+    '304 responses, answered before the view ran or after comparing its output',
+    ('route', 'stage')
+)
+SHADOW_LATENCY = registry.histogram(
+    'stocksight_shadow_predict_duration_seconds',
+    'Predict time of the served model and the shadow candidate on the same rows',
+    ('role',)
+)
+SHADOW_EVALUATIONS = registry.counter(
+    'stocksight_shadow_evaluations_total',
+    'Shadow scoring outcomes (scored, dropped on a full queue, error)',
+    ('result',)
+)
+DRIFT_SAMPLES = registry.counter(
+    'stocksight_drift_samples_total',
+    'Served predictions seen by the drift monitor (observed, dropped on a full queue, error)',
+    ('result',)
+)
+DRIFT_ALERTS = registry.counter(
+    'stocksight_drift_alerts_total',
+    'Model versions that started drifting, by signal (prediction_mean, prediction_psi, feature_psi)',
+    ('model_type', 'signal')
+)
+
+
+@contextmanager
+def upstream_call(operation, provider='yahoo'):
+    """Time an upstream call and count it as an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(provider=provider, operation=operation)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, provider=provider, operation=operation)
+
+
+def _cache_collector():
+    """Export hit/miss/eviction counters and sizes of every TTLCache"""
+    caches = sorted(all_caches(), key=lambda c: c.name)
+    yield ('stocksight_cache_requests_total', 'counter', 'Cache lookups by result',
+           [({'cache': c.name, 'result': 'hit'}, c.hits) for c in caches] +
+           [({'cache': c.name, 'result': 'miss'}, c.misses) for c in caches] +
+           [({'cache': c.name, 'result': 'stale'}, c.stale_hits) for c in caches if c.stale_ttl])
+    yield ('stocksight_cache_evictions_total', 'counter', 'Entries evicted to respect maxsize',
+           [({'cache': c.name}, c.evictions) for c in caches])
+    yield ('stocksight_cache_entries', 'gauge', 'Entries currently held',
+           [({'cache': c.name}, len(c)) for c in caches])
+    yield ('stocksight_cache_weight', 'gauge', 'Summed entry weight of size-bounded caches (bytes for models)',
+           [({'cache': c.name}, c.weight) for c in caches if c.max_weight is not None])
+
+
+registry.register_collector(_cache_collector)
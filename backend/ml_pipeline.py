@@ -0,0 +1,376 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+from validation import validate_frame
+
+TARGET_COL = 'Target_Close_7d'
+
+# Columns in the training table that are never model inputs
+NON_FEATURE_COLS = [TARGET_COL, 'Confidence_Interval_Lower', 'Confidence_Interval_Upper',
+                    'Last_Updated', 'Missing_Values_Flag']
+
+
+# =============================
+# SAMPLE DATA
+# =============================
+def make_sample_dataset(n_samples, seed=42, start_date=None):
+    """
+    Create the synthetic training table used when no real dataset is available
+
+    Args:
+        n_samples: Number of rows to generate (before the 7-day target shift)
+        seed: Seed for np.random
+        start_date: Optional first date; adds a daily 'Date' column
+
+    Returns:
+        DataFrame with feature columns and 'Target_Close_7d'
+    """
+    np.random.seed(seed)
+
+    columns = {}
+    if start_date is not None:
+        columns['Date'] = pd.date_range(start_date, periods=n_samples, freq='D')
+
+    columns.update({
+        'Close': np.random.randn(n_samples).cumsum() * 10 + 100,
+        'Volume': np.random.randint(1000000, 10000000, n_samples),
+        'RSI_14': np.random.uniform(20, 80, n_samples),
+        'MACD': np.random.randn(n_samples) * 2,
+        'Bollinger_Upper': np.random.randn(n_samples).cumsum() * 5 + 110,
+        'Bollinger_Lower': np.random.randn(n_samples).cumsum() * 5 + 90,
+        'News_Sentiment_Score': np.random.uniform(-1, 1, n_samples),
+        'Social_Sentiment_Score': np.random.uniform(-1, 1, n_samples),
+        'ROE': np.random.uniform(0.05, 0.25, n_samples),
+        'Debt_to_Equity': np.random.uniform(0.1, 2.0, n_samples),
+        'PE_Ratio': np.random.uniform(10, 30, n_samples),
+        'EPS': np.random.uniform(1, 5, n_samples),
+        'Inflation_Rate': np.random.uniform(0.01, 0.08, n_samples),
+        'Interest_Rate': np.random.uniform(0.02, 0.06, n_samples)
+    })
+    df = pd.DataFrame(columns)
+
+    # Create target (close price 7 rows ahead)
+    df['Target_Close_7d'] = df['Close'].shift(-7)
+    return df.dropna()
+
+
+# =============================
+# FEATURES & VALIDATION
+# =============================
+# Derived features: (name, input columns, fn(cols, out) writing into `out`).
+# A feature is built only when all of its inputs are present; inputs may name
+# features defined earlier in the list.
+FEATURE_SPEC = [
+    # Technical indicator interactions
+    ('RSI_MACD_Interaction', ('RSI_14', 'MACD'),
+     lambda c, out: np.multiply(c['RSI_14'], c['MACD'], out=out)),
+    # Bollinger Band width
+    ('Bollinger_Width', ('Bollinger_Upper', 'Bollinger_Lower'),
+     lambda c, out: np.subtract(c['Bollinger_Upper'], c['Bollinger_Lower'], out=out)),
+    ('Bollinger_Position', ('Bollinger_Upper', 'Bollinger_Lower'),
+     lambda c, out: np.divide(np.add(c['Bollinger_Upper'], c['Bollinger_Lower'], out=out), 2, out=out)),
+    # Sentiment features
+    ('Combined_Sentiment', ('News_Sentiment_Score', 'Social_Sentiment_Score'),
+     lambda c, out: np.divide(np.add(c['News_Sentiment_Score'], c['Social_Sentiment_Score'], out=out), 2, out=out)),
+    ('Sentiment_Divergence', ('News_Sentiment_Score', 'Social_Sentiment_Score'),
+     lambda c, out: np.abs(np.subtract(c['News_Sentiment_Score'], c['Social_Sentiment_Score'], out=out), out=out)),
+    # Financial health score
+    ('Financial_Health', ('ROE', 'Debt_to_Equity'),
+     lambda c, out: np.divide(c['ROE'], np.add(1, c['Debt_to_Equity'], out=out), out=out)),
+    # Valuation metrics
+    ('Earnings_Yield', ('PE_Ratio', 'EPS'),
+     lambda c, out: np.divide(c['EPS'], c['PE_Ratio'], out=out)),
+    # Macro indicators
+    ('Real_Interest_Rate', ('Inflation_Rate', 'Interest_Rate'),
+     lambda c, out: np.subtract(c['Interest_Rate'], c['Inflation_Rate'], out=out)),
+]
+
+
+def _check_feature_spec(spec):
+    """Reject duplicate names and inputs that refer to later (or own) features"""
+    defined = set()
+    names = [name for name, _, _ in spec]
+    for name, inputs, _ in spec:
+        if name in defined:
+            raise ValueError(f"Feature '{name}' is defined twice")
+        forward = [i for i in inputs if i in names and i not in defined]
+        if forward:
+            raise ValueError(f"Feature '{name}' depends on {forward}, which must be defined before it")
+        defined.add(name)
+
+
+_check_feature_spec(FEATURE_SPEC)
+
+
+def create_features(df, inplace=False, dtype=None, spec=FEATURE_SPEC):
+    """
+    Create additional predictive features
+
+    All applicable features are computed with NumPy into one preallocated
+    column-major block, which is attached to the frame in a single step.
+    The input columns are read without copying.
+
+    Args:
+        df: Input frame
+        inplace: Add the columns to `df` itself instead of a shallow copy
+        dtype: Block dtype; defaults to float32 when every input column is
+            float32, float64 otherwise
+        spec: Feature definitions (see FEATURE_SPEC)
+
+    Returns:
+        Frame with the derived columns appended (`df` itself when inplace)
+    """
+    available = set(df.columns)
+    planned = []
+    for name, inputs, fn in spec:
+        if all(i in available for i in inputs):
+            planned.append((name, inputs, fn))
+            available.add(name)
+
+    out_df = df if inplace else df.copy(deep=False)
+    if not planned:
+        return out_df
+
+    source_cols = {i for _, inputs, _ in planned for i in inputs if i in df.columns}
+    if dtype is None:
+        all_float32 = all(df[c].dtype == np.float32 for c in source_cols)
+        dtype = np.float32 if all_float32 else np.float64
+
+    block = np.empty((len(df), len(planned)), dtype=dtype, order='F')
+    cols = {c: df[c].to_numpy() for c in source_cols}
+    for j, (name, _, fn) in enumerate(planned):
+        fn(cols, block[:, j])
+        cols[name] = block[:, j]
+
+    names = [name for name, _, _ in planned]
+    out_df[names] = pd.DataFrame(block, columns=names, index=df.index, copy=False)
+    return out_df
+
+
+def validate_input_data(df, rules=None):
+    """Ensure input data quality (see validation.validate_frame for the full report)"""
+    report = validate_frame(df, rules)
+    if not report.ok:
+        report.print_summary()
+    return report.ok
+
+
+def check_prediction_drift(new_predictions, historical_mean, historical_std, threshold=2):
+    """Alert if predictions drift significantly"""
+    new_mean = np.mean(new_predictions)
+    z_score = abs(new_mean - historical_mean) / historical_std
+
+    if z_score > threshold:
+        print(f"⚠️ WARNING: Prediction drift detected! Z-score: {z_score:.2f}")
+        return True
+    return False
+
+
+DRIFT_BINS = 10
+
+
+def _reference_bins(values, bins):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return None
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    return {'edges': edges.tolist(), 'proportions': (counts / len(values)).tolist()}
+
+
+def drift_reference(X, predictions, bins=DRIFT_BINS):
+    """
+    Quantile bins of each numeric input and of the predictions, saved as
+    metadata['drift_reference'] for the serving drift monitor (drift.py)
+
+    Args:
+        X: DataFrame (or dict of columns) of numeric features, usually the hold-out rows
+        predictions: Model predictions for those rows
+        bins: Number of equal-frequency bins
+
+    Returns:
+        Dict with {'edges', 'proportions'} per feature and for the predictions
+    """
+    return {
+        'bins': bins,
+        'prediction': _reference_bins(predictions, bins),
+        'features': {col: _reference_bins(X[col], bins) for col in X}
+    }
+
+
+# =============================
+# PRECISION
+# =============================
+# Opt-in compact mode: float32 features from ingestion through scaling.
+# StandardScaler keeps float32 input as float32 and the forest already
+# compares in float32, so this only removes float64 copies.
+COMPACT_DTYPE = np.float32
+
+
+def to_compact(df, exclude=(TARGET_COL,)):
+    """Cast numeric columns (except `exclude`) to float32"""
+    cols = [c for c in df.select_dtypes(include=[np.number]).columns
+            if c not in exclude and df[c].dtype != COMPACT_DTYPE]
+    return df.astype({c: COMPACT_DTYPE for c in cols}) if cols else df
+
+
+# =============================
+# MODEL
+# =============================
+def build_preprocessor(numeric_cols, categorical_cols, categories='auto', dtype=np.float64, dense=False):
+    """Scale numeric columns, one-hot encode categorical ones"""
+    return ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), numeric_cols),
+            ("cat", OneHotEncoder(categories=categories, handle_unknown="ignore", dtype=dtype), categorical_cols),
+        ],
+        sparse_threshold=0 if dense else 0.3
+    )
+
+
+class QuantileBoostingRegressor(RegressorMixin, BaseEstimator):
+    """
+    HistGradientBoosting point model plus one quantile-loss model per quantile
+
+    predict() uses the squared-error model; predict_quantiles() returns the
+    quantile models' predictions, which replace the per-tree spread a
+    RandomForest uses for intervals.
+    """
+
+    def __init__(self, quantiles=(0.05, 0.10, 0.90, 0.95), max_iter=300, learning_rate=0.1,
+                 max_leaf_nodes=31, max_depth=None, l2_regularization=0.0, random_state=42):
+        self.quantiles = quantiles
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_leaf_nodes = max_leaf_nodes
+        self.max_depth = max_depth
+        self.l2_regularization = l2_regularization
+        self.random_state = random_state
+
+    def _boosting(self, **loss):
+        return HistGradientBoostingRegressor(
+            max_iter=self.max_iter,
+            learning_rate=self.learning_rate,
+            max_leaf_nodes=self.max_leaf_nodes,
+            max_depth=self.max_depth,
+            l2_regularization=self.l2_regularization,
+            random_state=self.random_state,
+            **loss
+        )
+
+    def fit(self, X, y):
+        self.point_model_ = self._boosting().fit(X, y)
+        self.quantile_models_ = {
+            round(q, 6): self._boosting(loss='quantile', quantile=q).fit(X, y)
+            for q in self.quantiles
+        }
+        return self
+
+    def predict(self, X):
+        return self.point_model_.predict(X)
+
+    def predict_quantiles(self, X, quantiles):
+        """One prediction array per requested quantile (each must have been fitted)"""
+        missing = [q for q in quantiles if round(q, 6) not in self.quantile_models_]
+        if missing:
+            raise ValueError(f"Quantiles {missing} were not fitted (available: {sorted(self.quantile_models_)})")
+        return [self.quantile_models_[round(q, 6)].predict(X) for q in quantiles]
+
+
+def _random_forest(n_estimators=200, max_depth=10, min_samples_split=5, min_samples_leaf=2, n_jobs=-1, **params):
+    return RandomForestRegressor(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_split=min_samples_split,
+        min_samples_leaf=min_samples_leaf,
+        random_state=42,
+        n_jobs=n_jobs,
+        **params
+    )
+
+
+def _hist_gradient_boosting(**params):
+    return QuantileBoostingRegressor(**params)
+
+
+# Estimator name -> (factory(**params), needs dense input)
+ESTIMATORS = {
+    'random_forest': (_random_forest, False),
+    'hist_gradient_boosting': (_hist_gradient_boosting, True),
+}
+DEFAULT_ESTIMATOR = 'random_forest'
+
+
+def register_estimator(name, factory, dense=False):
+    """Make `factory(**params)` available to build_pipeline as `estimator=name`"""
+    ESTIMATORS[name] = (factory, dense)
+
+
+def build_estimator(name=DEFAULT_ESTIMATOR, **params):
+    """Instantiate a registered estimator"""
+    if name not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator '{name}'. Available: {sorted(ESTIMATORS)}")
+    factory, _ = ESTIMATORS[name]
+    return factory(**params)
+
+
+def build_pipeline(numeric_cols, categorical_cols, estimator=DEFAULT_ESTIMATOR, dtype=np.float64, **params):
+    """Preprocessing + estimator pipeline used by train_model.py (RandomForest by default)"""
+    model = build_estimator(estimator, **params)
+    _, dense = ESTIMATORS[estimator]
+
+    return Pipeline([
+        ("preprocessor", build_preprocessor(numeric_cols, categorical_cols, dtype=dtype, dense=dense)),
+        ("model", model)
+    ])
+
+
+def time_series_cv(pipeline, X, y, n_splits=5, verbose=True):
+    """Walk the TimeSeriesSplit folds, returning the R² of each fold"""
+    tscv = TimeSeriesSplit(n_splits=n_splits)
+    cv_scores = []
+
+    for fold, (train_idx, val_idx) in enumerate(tscv.split(X), 1):
+        X_train_cv = X.iloc[train_idx]
+        X_val_cv = X.iloc[val_idx]
+        y_train_cv = y.iloc[train_idx]
+        y_val_cv = y.iloc[val_idx]
+
+        pipeline.fit(X_train_cv, y_train_cv)
+        y_pred_cv = pipeline.predict(X_val_cv)
+        score = r2_score(y_val_cv, y_pred_cv)
+        cv_scores.append(score)
+        if verbose:
+            print(f"  Fold {fold}: R² = {score:.3f}")
+
+    return cv_scores
+
+
+def tree_predictions(pipeline, X):
+    """Per-tree predictions of the forest, shape (n_rows, n_trees)"""
+    X_transformed = pipeline.named_steps["preprocessor"].transform(X)
+    forest = pipeline.named_steps["model"]
+    return np.stack([tree.predict(X_transformed) for tree in forest.estimators_], axis=1)
+
+
+def prediction_intervals(pipeline, X, percentiles=(5, 95)):
+    """
+    One bound array per percentile
+
+    Uses the quantile models when the estimator has them and the spread of
+    the per-tree predictions otherwise.
+    """
+    model = pipeline.named_steps["model"]
+    if hasattr(model, "predict_quantiles"):
+        X_transformed = pipeline.named_steps["preprocessor"].transform(X)
+        return model.predict_quantiles(X_transformed, [p / 100 for p in percentiles])
+    all_preds = tree_predictions(pipeline, X)
+    return [np.percentile(all_preds, p, axis=1) for p in percentiles]
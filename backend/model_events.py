@@ -0,0 +1,90 @@
+import json
+import os
+import select
+import threading
+from typing import Callable, Optional
+
+from database import ModelDB, MODEL_EVENTS_CHANNEL
+
+# =============================
+# CONFIG
+# =============================
+MODEL_EVENTS_RECONNECT_SECONDS = float(os.getenv('MODEL_EVENTS_RECONNECT_SECONDS', '5'))
+# Wake up this often to notice stop() even when no events arrive
+_POLL_SECONDS = 5.0
+
+
+class ModelEventListener:
+    """
+    Background LISTEN loop that hot-reloads models in a serving worker
+
+    Every worker process runs one listener. `on_event` receives the decoded
+    NOTIFY payload ({event, model_type, model_id}) sent by ModelDB when a
+    model is activated, deactivated or deleted. Notifications sent while
+    the connection was down are lost, so after every (re)connect `on_event`
+    is called with {'event': 'reconnect'} and should drop everything cached.
+    """
+
+    def __init__(self, on_event: Callable[[dict], None], channel: str = MODEL_EVENTS_CHANNEL,
+                 connect: Optional[Callable] = None, reconnect_seconds: float = MODEL_EVENTS_RECONNECT_SECONDS):
+        self.on_event = on_event
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self.events = 0
+        self.connected = False
+        self._connect = connect or (lambda: ModelDB().get_connection())
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='model-events', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                if self.connected:
+                    print(f"⚠️ Model event listener disconnected: {e}")
+                self.connected = False
+            self._stop.wait(self.reconnect_seconds)
+
+    def _listen(self):
+        conn = self._connect()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                # Channel names are identifiers and cannot be bound as parameters
+                cursor.execute(f'LISTEN "{self.channel}"')
+            if not self.connected:
+                print(f"📡 Listening for model events on '{self.channel}'")
+            self.connected = True
+            self._dispatch({'event': 'reconnect'})
+
+            while not self._stop.is_set():
+                if select.select([conn], [], [], _POLL_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        event = json.loads(notify.payload)
+                    except ValueError:
+                        print(f"⚠️ Ignoring malformed model event: {notify.payload!r}")
+                        continue
+                    self._dispatch(event)
+        finally:
+            conn.close()
+
+    def _dispatch(self, event):
+        self.events += 1
+        try:
+            self.on_event(event)
+        except Exception as e:
+            print(f"⚠️ Model event handler failed for {event}: {e}")
@@ -0,0 +1,114 @@
+import os
+from typing import Callable, Dict, List, Optional
+
+from cache import TTLCache
+
+# =============================
+# CONFIG
+# =============================
+BASE_MODEL_TYPE = 'stock_prediction'
+SHARD_KINDS = ('symbol', 'sector')
+
+SHARDS_DIR = os.getenv('MODEL_SHARDS_DIR', os.path.join('model_artifacts', 'shards'))
+SHARD_INDEX_TTL_SECONDS = float(os.getenv('SHARD_INDEX_TTL_SECONDS', '300'))
+
+
+# =============================
+# SHARD KEYS
+# =============================
+def shard_key(kind: str, value: str, base: str = BASE_MODEL_TYPE) -> str:
+    """model_type for a shard, e.g. 'stock_prediction:symbol:AAPL'"""
+    if kind not in SHARD_KINDS:
+        raise ValueError(f"Unknown shard kind '{kind}'. Expected one of {SHARD_KINDS}")
+    if kind == 'symbol':
+        value = value.upper()
+    return f"{base}:{kind}:{value}"
+
+
+def parse_shard_key(model_type: str):
+    """(base, kind, value) for a shard key, None for unsharded model types"""
+    parts = model_type.split(':', 2)
+    if len(parts) != 3 or parts[1] not in SHARD_KINDS:
+        return None
+    return tuple(parts)
+
+
+def shard_dir(model_type: str, root: str = SHARDS_DIR) -> str:
+    """Filesystem location of a shard's pipeline/metadata files"""
+    safe = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in model_type.replace(':', '__'))
+    return os.path.join(root, safe)
+
+
+# =============================
+# ROUTER
+# =============================
+class ModelRouter:
+    """
+    Picks the most specific model for a symbol
+
+    Order: symbol shard, then the sector shard listing the symbol in its
+    metadata ('symbols'), then the global model. The shard index (model_type
+    -> metadata) comes from `list_shards` and is cached for `index_ttl`
+    seconds so routing never touches the database per request.
+    """
+
+    def __init__(self, list_shards: Callable[[], Dict[str, dict]], base: str = BASE_MODEL_TYPE,
+                 index_ttl: float = SHARD_INDEX_TTL_SECONDS):
+        self.base = base
+        self._list_shards = list_shards
+        self._index = TTLCache(index_ttl, maxsize=1, name='model_index')
+
+    def _build_index(self):
+        symbols, sectors = {}, {}
+        for model_type, metadata in self._list_shards().items():
+            parsed = parse_shard_key(model_type)
+            if parsed is None or parsed[0] != self.base:
+                continue
+            _, kind, value = parsed
+            if kind == 'symbol':
+                symbols[value.upper()] = model_type
+            else:
+                for symbol in (metadata or {}).get('symbols', []):
+                    sectors.setdefault(symbol.upper(), model_type)
+        return {'symbols': symbols, 'sectors': sectors}
+
+    def index(self):
+        return self._index.get_or_set('index', self._build_index)
+
+    def candidates(self, symbol: str) -> List[str]:
+        """model_types to try for `symbol`, most specific first"""
+        index = self.index()
+        symbol = symbol.upper()
+        route = [index['symbols'].get(symbol), index['sectors'].get(symbol), self.base]
+        return [model_type for model_type in route if model_type]
+
+    def shard_count(self) -> int:
+        index = self.index()
+        return len(index['symbols']) + len(set(index['sectors'].values()))
+
+    def invalidate(self):
+        """Drop the cached index (e.g. after new shards are saved)"""
+        self._index.clear()
+
+
+def filesystem_shards(root: str = SHARDS_DIR, load_metadata: Optional[Callable[[str], dict]] = None) -> Dict[str, dict]:
+    """model_type -> metadata for every shard directory under `root`"""
+    if load_metadata is None:
+        import joblib
+        load_metadata = joblib.load
+    shards = {}
+    if not os.path.isdir(root):
+        return shards
+    for name in os.listdir(root):
+        metadata_path = os.path.join(root, name, 'metadata.pkl')
+        if not os.path.exists(metadata_path):
+            continue
+        try:
+            metadata = load_metadata(metadata_path)
+        except Exception as e:
+            print(f"⚠️ Skipping unreadable shard {name}: {e}")
+            continue
+        model_type = metadata.get('model_type')
+        if model_type:
+            shards[model_type] = metadata
+    return shards
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+from cache import TTLCache
+from http_cache import last_bar_version
+from lazy_imports import lazy_import
+
+redis = lazy_import('redis')
+
+# =============================
+# CONFIG
+# =============================
+# Entries never go stale (a new bar or model version is a new key);
+# the TTL and size only bound memory for symbols nobody asks for again
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '4096'))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv('PREDICTION_CACHE_TTL_SECONDS', str(24 * 60 * 60)))
+# Optional tier shared by the workers: a directory on local disk, or a
+# Redis URL (needs the `redis` package). Redis wins when both are set.
+PREDICTION_CACHE_DIR = os.getenv('PREDICTION_CACHE_DIR')
+PREDICTION_CACHE_REDIS_URL = os.getenv('PREDICTION_CACHE_REDIS_URL')
+# Expired files in the disk tier are removed every this many writes
+_DISK_PRUNE_EVERY = 1000
+
+
+def prediction_key(model_type, model_version, symbol, bars) -> Optional[str]:
+    """
+    Cache key of an ML prediction: the model that makes it and the bars it is made from
+
+    The prediction is a pure function of the active model version and the
+    symbol's history up to its last bar, so a new bar (or a move of
+    today's close) and a model activation both change the key.
+    """
+    bar_version = last_bar_version(bars)
+    if bar_version is None:
+        return None
+    return f"{model_type}|{model_version}|{symbol.upper()}|{bar_version}"
+
+
+def _digest(key):
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class DiskTier:
+    """Payloads as JSON files under `root`, shared by the workers of one host"""
+
+    def __init__(self, root: str, ttl: float):
+        self.root = root
+        self.ttl = ttl
+        self._writes = 0
+
+    def _path(self, key):
+        digest = _digest(key)
+        return os.path.join(self.root, digest[:2], f'{digest}.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, payload):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+        self._writes += 1
+        if self._writes % _DISK_PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """Remove expired entries"""
+        cutoff = time.time() - self.ttl
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+class RedisTier:
+    """Payloads as JSON strings in Redis, shared by every worker that reaches it"""
+
+    def __init__(self, url: str, ttl: float, prefix: str = 'stocksight:prediction:'):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._client.get(self.prefix + _digest(key))
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, payload):
+        self._client.set(self.prefix + _digest(key), json.dumps(payload), ex=max(1, int(self.ttl)))
+
+
+class CachedPrediction(NamedTuple):
+    """A cache entry: the payload and the model output it was built from"""
+    payload: dict
+    prediction: float
+    predict_seconds: float
+    row: Any = None
+
+    def to_shared(self):
+        return {'payload': self.payload, 'prediction': self.prediction, 'predict_seconds': self.predict_seconds}
+
+    @classmethod
+    def from_shared(cls, value):
+        # Anything else (e.g. a bare payload written by an older worker) is a miss
+        if not isinstance(value, dict) or 'payload' not in value or 'prediction' not in value:
+            return None
+        return cls(value['payload'], float(value['prediction']), float(value.get('predict_seconds', 0.0)))
+
+
+class PredictionCache:
+    """
+    Finished /api/predict payloads keyed by `prediction_key`
+
+    The first tier is an in-process LRU (`TTLCache` named 'predictions').
+    On a miss, the optional shared tier is checked, so a prediction computed
+    by one worker is reused by the others. Entries are never invalidated
+    explicitly, because the key changes with each new bar and model version.
+    A failing shared tier only costs a recomputation.
+
+    Next to the payload, each entry keeps the raw model prediction and its
+    predict time, so hits can still be fed to the drift monitor and shadow
+    model. The local tier also keeps the feature row; entries read from the
+    shared tier come without it.
+    """
+
+    def __init__(self, maxsize: int = PREDICTION_CACHE_SIZE, ttl: float = PREDICTION_CACHE_TTL_SECONDS,
+                 directory: Optional[str] = PREDICTION_CACHE_DIR,
+                 redis_url: Optional[str] = PREDICTION_CACHE_REDIS_URL):
+        self.local = TTLCache(ttl, maxsize=maxsize, name='predictions')
+        self.shared = None
+        if redis_url:
+            self.shared = RedisTier(redis_url, ttl)
+        elif directory:
+            self.shared = DiskTier(directory, ttl)
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    def get(self, key) -> Optional[CachedPrediction]:
+        """The cached entry with a copy of its payload (callers may add fields), or None"""
+        if key is None:
+            return None
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            try:
+                entry = CachedPrediction.from_shared(self.shared.get(key))
+            except Exception as e:
+                self._shared_failed('read', e)
+            if entry is not None:
+                self.shared_hits += 1
+                self.local.set(key, entry)
+        if entry is None:
+            return None
+        return entry._replace(payload=dict(entry.payload))
+
+    def set(self, key, payload, prediction: float, predict_seconds: float, row=None):
+        """
+        Cache a finished prediction
+
+        Args:
+            key: `prediction_key` of the prediction (None skips caching)
+            payload: Response payload
+            prediction: Raw model prediction the payload was built from
+            predict_seconds: Time the model spent in predict
+            row: Single-row DataFrame of serving features (kept in this worker only)
+        """
+        if key is None or payload is None:
+            return
+        entry = CachedPrediction(dict(payload), float(prediction), float(predict_seconds), row)
+        self.local.set(key, entry)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, entry.to_shared())
+            except Exception as e:
+                self._shared_failed('write', e)
+
+    def _shared_failed(self, operation, error):
+        self.shared_errors += 1
+        if self.shared_errors == 1 or self.shared_errors % 100 == 0:
+            print(f"⚠️ Shared prediction cache {operation} failed ({self.shared_errors} errors): {error}")
+
+    def clear(self):
+        """Drop this worker's entries (the shared tier expires on its own)"""
+        self.local.clear()
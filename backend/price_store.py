@@ -0,0 +1,149 @@
+import os
+import threading
+from typing import List
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+ds = lazy_import('pyarrow.dataset')
+
+# =============================
+# CONFIG
+# =============================
+PRICE_STORE_DIR = os.getenv('PRICE_STORE_DIR', os.path.join('data', 'prices'))
+PRICE_STORE_COMPRESSION = os.getenv('PRICE_STORE_COMPRESSION', 'zstd')
+DATE_COL = 'Date'
+SYMBOL_COL = 'Ticker'
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close']
+BAR_COLUMNS = PRICE_COLUMNS + ['Volume']
+BARS_FILE = 'bars.parquet'
+
+
+class PriceStore:
+    """
+    Local columnar store of daily bars, one Parquet file per symbol
+
+    Files live at <root>/Ticker=<SYMBOL>/bars.parquet, so the whole store
+    opens as one hive-partitioned dataset (`dataset()`). Writes merge with
+    the bars already stored (a re-downloaded date replaces the old row) and
+    replace the file atomically, so readers never see a partial file and an
+    interrupted backfill leaves every symbol either before or after its update.
+    """
+
+    def __init__(self, root: str = PRICE_STORE_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.root, f'{SYMBOL_COL}={symbol.upper()}', BARS_FILE)
+
+    def _lock(self, symbol):
+        with self._locks_lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def symbols(self) -> List[str]:
+        """Symbols with stored bars, sorted"""
+        if not os.path.isdir(self.root):
+            return []
+        prefix = f'{SYMBOL_COL}='
+        return sorted(
+            name[len(prefix):] for name in os.listdir(self.root)
+            if name.startswith(prefix) and os.path.exists(os.path.join(self.root, name, BARS_FILE))
+        )
+
+    def write(self, symbol: str, bars) -> int:
+        """
+        Merge daily bars for a symbol into the store
+
+        Args:
+            symbol: Ticker the bars belong to
+            bars: Date-indexed frame as returned by `Ticker.history` or one
+                symbol of `yf.download` (Open, High, Low, Close, Volume and
+                optionally Adj Close)
+
+        Returns:
+            Number of bars stored for the symbol after the merge
+        """
+        symbol = symbol.upper()
+        new = normalize_bars(bars)
+        if new.empty:
+            return len(self.read(symbol))
+
+        with self._lock(symbol):
+            path = self.path(symbol)
+            if os.path.exists(path):
+                old = pd.read_parquet(path)
+                merged = pd.concat([old, new], ignore_index=True)
+                merged = merged.drop_duplicates(subset=[DATE_COL], keep='last')
+                new = merged.sort_values(DATE_COL, ignore_index=True)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            table = pa.Table.from_pandas(new, preserve_index=False)
+            pq.write_table(table, tmp_path, compression=PRICE_STORE_COMPRESSION)
+            os.replace(tmp_path, path)
+            return len(new)
+
+    def read(self, symbol: str, start=None, end=None):
+        """
+        Stored bars for a symbol, indexed by date like `Ticker.history`
+
+        Args:
+            symbol: Ticker to read
+            start: First date to include (inclusive), or None
+            end: Last date to include (inclusive), or None
+
+        Returns:
+            DataFrame with BAR_COLUMNS (empty when the symbol is not stored)
+        """
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([], name=DATE_COL))
+
+        filters = []
+        if start is not None:
+            filters.append((DATE_COL, '>=', pd.Timestamp(start)))
+        if end is not None:
+            filters.append((DATE_COL, '<=', pd.Timestamp(end)))
+        bars = pd.read_parquet(path, filters=filters or None)
+        return bars.set_index(DATE_COL)
+
+    def last_date(self, symbol: str):
+        """Date of the latest stored bar, read from the file statistics, or None"""
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return None
+        metadata = pq.ParquetFile(path).metadata
+        column = metadata.schema.names.index(DATE_COL)
+        latest = None
+        for i in range(metadata.num_row_groups):
+            stats = metadata.row_group(i).column(column).statistics
+            if stats is not None and stats.has_min_max:
+                latest = stats.max if latest is None else max(latest, stats.max)
+        return pd.Timestamp(latest) if latest is not None else None
+
+    def dataset(self):
+        """All stored bars as a pyarrow dataset with a Ticker partition column"""
+        return ds.dataset(self.root, format='parquet', partitioning='hive')
+
+
+def normalize_bars(bars):
+    """Date column (tz-naive, midnight) plus BAR_COLUMNS in fixed dtypes, without empty rows"""
+    if bars is None or len(bars) == 0:
+        return pd.DataFrame({DATE_COL: pd.Series(dtype='datetime64[ns]'),
+                             **{col: pd.Series(dtype='float64') for col in PRICE_COLUMNS},
+                             'Volume': pd.Series(dtype='int64')})
+
+    frame = bars.dropna(subset=['Close'])
+    dates = pd.DatetimeIndex(frame.index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+
+    normalized = pd.DataFrame({DATE_COL: dates.normalize().astype('datetime64[ns]')})
+    for col in PRICE_COLUMNS:
+        normalized[col] = frame[col].to_numpy(dtype='float64') if col in frame.columns else float('nan')
+    normalized['Volume'] = frame['Volume'].fillna(0).astype('int64').to_numpy() if 'Volume' in frame.columns else 0
+    return normalized.drop_duplicates(subset=[DATE_COL], keep='last')
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Measure backend cold-start cost with `python -X importtime`
+
+Runs `import app` in a fresh interpreter, parses the import-time log and
+reports total import time, the slowest top-level packages and which heavy
+modules were loaded eagerly. Use --output to store the report as JSON so
+cold-start time can be tracked between runs.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ['pandas', 'numpy', 'sklearn', 'joblib', 'yfinance', 'newsapi', 'psycopg2']
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` lines into (module, self_us, cumulative_us, depth)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue
+        name = name.rstrip()
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def profile_import(module='app', python=sys.executable):
+    """Import `module` in a clean interpreter and summarise the import cost"""
+    command = [python, '-X', 'importtime', '-c', f'import {module}']
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    wall_time = time.perf_counter() - start
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = parse_importtime(proc.stderr)
+    top_level = [r for r in rows if r[3] == 0]
+    shallow = [r for r in rows if r[3] <= 1]
+    total_us = sum(r[2] for r in top_level)
+    loaded = {r[0] for r in rows}
+
+    return {
+        'module': module,
+        'measured_at': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'wall_time_s': round(wall_time, 4),
+        'import_time_s': round(total_us / 1e6, 4),
+        'modules_imported': len(rows),
+        'heavy_modules_loaded': [m for m in HEAVY_MODULES if m in loaded],
+        'slowest': [
+            {'module': name, 'cumulative_ms': round(cum / 1000, 2), 'self_ms': round(own / 1000, 2)}
+            for name, own, cum, _ in sorted(shallow, key=lambda r: r[2], reverse=True)[:15]
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--runs', type=int, default=3, help='Best of N cold imports')
+    parser.add_argument('--output', help='Write the JSON report to this path')
+    args = parser.parse_args()
+
+    reports = [profile_import(args.module) for _ in range(args.runs)]
+    report = min(reports, key=lambda r: r['import_time_s'])
+    report['runs'] = args.runs
+    report['import_time_s_all'] = [r['import_time_s'] for r in reports]
+
+    print("=" * 50)
+    print(f"Cold import of '{args.module}'")
+    print("=" * 50)
+    print(f"Import time (best of {args.runs}): {report['import_time_s'] * 1000:.1f} ms")
+    print(f"Process wall time: {report['wall_time_s'] * 1000:.1f} ms")
+    print(f"Modules imported: {report['modules_imported']}")
+    print(f"Heavy modules loaded eagerly: {report['heavy_modules_loaded'] or 'none'}")
+    print("\nSlowest imports (top two levels):")
+    for row in report['slowest']:
+        print(f"  {row['cumulative_ms']:>9.2f} ms  {row['module']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved report to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from cache import TTLCache
+from lazy_imports import lazy_import
+from upstream import upstream_request, mark_stale
+
+pd = lazy_import('pandas')
+yf = lazy_import('yfinance')
+
+# =============================
+# CONFIG
+# =============================
+# Price fields change constantly; name and share count change rarely
+QUOTE_TTL_SECONDS = float(os.getenv('QUOTE_TTL_SECONDS', '15'))
+PROFILE_TTL_SECONDS = float(os.getenv('PROFILE_TTL_SECONDS', str(24 * 60 * 60)))
+# Last-known-good quotes are served this long after expiry when upstream fails or is throttled
+QUOTE_STALE_SECONDS = float(os.getenv('QUOTE_STALE_SECONDS', str(24 * 60 * 60)))
+QUOTE_CACHE_SIZE = int(os.getenv('QUOTE_CACHE_SIZE', '2048'))
+PROFILE_WORKERS = int(os.getenv('PROFILE_WORKERS', '8'))
+QUOTE_PERIOD = '5d'
+QUOTE_VERSION_FIELDS = ('symbol', 'name', 'price', 'open', 'high', 'low', 'volume', 'marketCap', 'change')
+
+
+class QuoteService:
+    """
+    Quote lookups that avoid `Ticker.info`
+
+    Price fields come from a single 5-day daily bar request (the same chart
+    endpoint `fast_info` uses), which also carries the instrument name in its
+    metadata. Market cap is derived from a long-lived cached share count and
+    the fresh price.
+    """
+
+    def __init__(self, quote_ttl=QUOTE_TTL_SECONDS, profile_ttl=PROFILE_TTL_SECONDS, maxsize=QUOTE_CACHE_SIZE,
+                 stale_ttl=QUOTE_STALE_SECONDS):
+        self.quotes = TTLCache(quote_ttl, maxsize=maxsize, name='quotes', stale_ttl=stale_ttl)
+        self.profiles = TTLCache(profile_ttl, maxsize=maxsize, name='profiles')
+
+    # -----------------------------
+    # Single symbol
+    # -----------------------------
+    def get_quote(self, symbol):
+        """Return a quote dict for one symbol, or None if unavailable"""
+        symbol = symbol.upper()
+        cached = self.quotes.get(symbol)
+        if cached is not None:
+            return cached
+
+        try:
+            ticker = yf.Ticker(symbol)
+            bars = upstream_request('history', lambda: ticker.history(period=QUOTE_PERIOD, auto_adjust=False))
+            if bars.empty:
+                # Throttled upstreams often answer with empty frames
+                return self.stale_quote(symbol)
+
+            profile = self.profiles.get(symbol)
+            if profile is None:
+                profile = self._load_profile(ticker, symbol)
+
+            quote = build_quote(symbol, bars, profile)
+            self.quotes.set(symbol, quote)
+            return quote
+        except Exception as e:
+            print(f"Error fetching quote for {symbol}: {e}")
+            return self.stale_quote(symbol)
+
+    def stale_quote(self, symbol):
+        """Last-known-good quote marked `stale: true`, or None"""
+        quote = self.quotes.get_stale(symbol)
+        if quote is None:
+            return None
+        mark_stale()
+        return {**quote, 'stale': True}
+
+    def version(self, symbols):
+        """
+        Data version of the cached quotes for `symbols` (used for ETags)
+
+        Only price fields count, not `lastUpdated`, so a refetch that returns
+        the same prices keeps the version. None if any quote is not cached.
+        """
+        parts = []
+        for symbol in symbols:
+            # Peek: ETag checks are not quote lookups and must not skew the hit rate
+            quote = self.quotes.peek(symbol.upper())
+            if quote is None:
+                return None
+            parts.append(':'.join(str(quote.get(field)) for field in QUOTE_VERSION_FIELDS))
+        return '|'.join(parts)
+
+    # -----------------------------
+    # Bulk
+    # -----------------------------
+    def get_quotes(self, symbols):
+        """
+        Fetch quotes for many symbols with one upstream bar request
+
+        Args:
+            symbols: Iterable of ticker symbols
+
+        Returns:
+            Tuple of (quotes dict keyed by symbol, errors dict keyed by symbol)
+        """
+        symbols = [s.upper() for s in symbols]
+        quotes, errors = {}, {}
+
+        pending = []
+        for symbol in symbols:
+            cached = self.quotes.get(symbol)
+            if cached is not None:
+                quotes[symbol] = cached
+            else:
+                pending.append(symbol)
+
+        if not pending:
+            return quotes, errors
+
+        try:
+            data = upstream_request('download', lambda: yf.download(
+                pending,
+                period=QUOTE_PERIOD,
+                interval='1d',
+                auto_adjust=False,
+                group_by='ticker',
+                progress=False,
+                threads=True
+            ))
+        except Exception as e:
+            print(f"Error fetching bulk quotes for {pending}: {e}")
+            for symbol in pending:
+                stale = self.stale_quote(symbol)
+                if stale is not None:
+                    quotes[symbol] = stale
+                else:
+                    errors[symbol] = 'Upstream request failed'
+            return quotes, errors
+
+        bars_by_symbol = {}
+        for symbol in pending:
+            bars = bars_for_symbol(data, symbol, len(pending))
+            if bars is None or bars.empty:
+                stale = self.stale_quote(symbol)
+                if stale is not None:
+                    quotes[symbol] = stale
+                else:
+                    errors[symbol] = 'Stock not found'
+            else:
+                bars_by_symbol[symbol] = bars
+
+        profiles = self.get_profiles(list(bars_by_symbol))
+        for symbol, bars in bars_by_symbol.items():
+            try:
+                quote = build_quote(symbol, bars, profiles.get(symbol))
+                self.quotes.set(symbol, quote)
+                quotes[symbol] = quote
+            except Exception as e:
+                print(f"Error building quote for {symbol}: {e}")
+                errors[symbol] = 'Invalid quote data'
+
+        return quotes, errors
+
+    # -----------------------------
+    # Slow-changing profile fields
+    # -----------------------------
+    def get_profiles(self, symbols):
+        """Return cached profiles, loading missing ones concurrently"""
+        profiles = {}
+        missing = []
+        for symbol in symbols:
+            profile = self.profiles.get(symbol)
+            if profile is None:
+                missing.append(symbol)
+            else:
+                profiles[symbol] = profile
+
+        if missing:
+            # Each task runs in a copy of the caller's context to keep its upstream priority
+            contexts = [contextvars.copy_context() for _ in missing]
+            with ThreadPoolExecutor(max_workers=min(PROFILE_WORKERS, len(missing))) as pool:
+                loaded = pool.map(lambda ctx, s: ctx.run(self._load_profile, yf.Ticker(s), s), contexts, missing)
+                profiles.update(zip(missing, loaded))
+        return profiles
+
+    def _load_profile(self, ticker, symbol):
+        """Load name and share count without touching `Ticker.info`"""
+        profile = {'name': symbol, 'shares': None}
+        complete = True
+        try:
+            metadata = upstream_request('history_metadata', ticker.get_history_metadata)
+            profile['name'] = metadata.get('longName') or metadata.get('shortName') or symbol
+        except Exception as e:
+            print(f"Error loading metadata for {symbol}: {e}")
+            complete = False
+
+        try:
+            profile['shares'] = upstream_request('shares', lambda: ticker.fast_info.shares)
+        except Exception as e:
+            print(f"Error loading share count for {symbol}: {e}")
+            complete = False
+
+        # Retry incomplete profiles (e.g. throttled lookups) at quote frequency, not daily
+        self.profiles.set(symbol, profile, ttl=None if complete else self.quotes.ttl)
+        return profile
+
+
+# =============================
+# HELPERS
+# =============================
+def bars_for_symbol(data, symbol, n_requested):
+    """Extract one symbol's bars from a `yf.download(group_by='ticker')` frame"""
+    if data is None or data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return None
+        bars = data[symbol]
+    elif n_requested == 1:
+        bars = data
+    else:
+        return None
+    return bars.dropna(subset=['Close'])
+
+
+def build_quote(symbol, bars, profile=None):
+    """Build the `/api/stock` quote payload from daily bars and a profile"""
+    profile = profile or {}
+    latest = bars.iloc[-1]
+    current_price = float(latest['Close'])
+    prev_close = float(bars['Close'].iloc[-2]) if len(bars) > 1 else current_price
+    change = current_price - prev_close
+    change_percent = (change / prev_close) * 100 if prev_close else 0.0
+
+    shares = profile.get('shares')
+    market_cap = int(shares * current_price) if shares else 0
+
+    return {
+        'symbol': symbol.upper(),
+        'name': profile.get('name') or symbol.upper(),
+        'price': round(current_price, 2),
+        'open': round(float(latest['Open']), 2),
+        'close': round(current_price, 2),
+        'high': round(float(latest['High']), 2),
+        'low': round(float(latest['Low']), 2),
+        'volume': int(latest['Volume']) if pd.notna(latest['Volume']) else 0,
+        'marketCap': market_cap,
+        'change': round(change, 2),
+        'changePercent': round(change_percent, 2),
+        'lastUpdated': datetime.now().isoformat()
+    }
+
+
+# Global quote service instance
+quote_service = QuoteService()
@@ -0,0 +1,150 @@
+import gzip
+import json
+import os
+from typing import Callable, Dict
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+from metrics import STAGE_LATENCY, RESPONSE_BYTES
+
+# Optional accelerators: orjson for encoding, brotli for compression
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# =============================
+# CONFIG
+# =============================
+JSON_ENCODER = os.getenv('JSON_ENCODER', 'orjson' if orjson is not None else 'stdlib')
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+# Level 4 is ~3x faster than 6 on large payloads for ~5% more bytes
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '4'))
+# Brotli quality 11 is far too slow for per-request use; 4-5 beats gzip -6 in size and speed
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+
+# =============================
+# JSON ENCODERS
+# =============================
+def _to_builtin(o):
+    """NumPy arrays/scalars (anything with `tolist`) become lists and Python numbers"""
+    if hasattr(o, 'tolist'):
+        return o.tolist()
+    return DefaultJSONProvider.default(o)
+
+
+def _stdlib_encode(obj, sort_keys=True, indent=None):
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, default=_to_builtin, sort_keys=sort_keys, indent=indent,
+                      separators=separators).encode('utf-8')
+
+
+def _orjson_encode(obj, sort_keys=True, indent=None):
+    # Datetimes go through Flask's default (HTTP date) so both encoders agree
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=_to_builtin, option=option)
+
+
+# name -> encode(obj, sort_keys, indent) returning UTF-8 bytes
+JSON_ENCODERS: Dict[str, Callable] = {'stdlib': _stdlib_encode}
+if orjson is not None:
+    JSON_ENCODERS['orjson'] = _orjson_encode
+
+
+def register_json_encoder(name: str, encode: Callable):
+    """Add a JSON encoder selectable with JSON_ENCODER=<name>"""
+    JSON_ENCODERS[name] = encode
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider with a pluggable encoder
+
+    Responses are encoded straight to bytes by `JSON_ENCODERS[encoder]`
+    (orjson when installed). NumPy arrays and scalars can be returned from
+    views as-is. orjson writes non-ASCII as UTF-8 rather than \\u escapes,
+    and NaN/inf as null where the stdlib encoder writes NaN/Infinity.
+    """
+
+    def __init__(self, app, encoder: str = JSON_ENCODER):
+        super().__init__(app)
+        if encoder not in JSON_ENCODERS:
+            raise ValueError(f"Unknown JSON encoder '{encoder}'. Available: {sorted(JSON_ENCODERS)}")
+        self.encoder = encoder
+
+    def encode(self, obj) -> bytes:
+        indent = 2 if self.compact is False or (self.compact is None and self._app.debug) else None
+        return JSON_ENCODERS[self.encoder](obj, sort_keys=self.sort_keys, indent=indent)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b'\n', mimetype=self.mimetype)
+
+
+# =============================
+# COMPRESSION
+# =============================
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def negotiate_encoding(accept_encodings) -> str:
+    """Best supported Content-Encoding for an Accept-Encoding header, or None"""
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best, best_quality = None, 0
+    for encoding in candidates:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def install_compression(app, min_bytes: int = COMPRESS_MIN_BYTES):
+    """Compress eligible responses of `app` with gzip or brotli, as the client accepts"""
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.is_streamed
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if response.status_code != 200 or response.content_length is None or response.content_length < min_bytes:
+            return response
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        with STAGE_LATENCY.time(stage='compress'):
+            compressed = compress(data, encoding)
+        RESPONSE_BYTES.inc(len(data), encoding=encoding, stage='raw')
+        RESPONSE_BYTES.inc(len(compressed), encoding=encoding, stage='sent')
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return compress_response
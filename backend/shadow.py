@@ -0,0 +1,185 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from metrics import SHADOW_LATENCY, SHADOW_EVALUATIONS
+
+# =============================
+# CONFIG
+# =============================
+SHADOW_QUEUE_SIZE = int(os.getenv('SHADOW_QUEUE_SIZE', '1000'))
+# Predictions waiting for their realized price, per evaluator
+SHADOW_MAX_PENDING = int(os.getenv('SHADOW_MAX_PENDING', '10000'))
+# Bars between the feature row and the predicted close (Target_Close_7d)
+SHADOW_HORIZON_BARS = int(os.getenv('SHADOW_HORIZON_BARS', '7'))
+
+
+class _ErrorStats:
+    """Running mean absolute error of one model"""
+
+    def __init__(self):
+        self.count = 0
+        self.abs_error = 0.0
+
+    def add(self, predicted, actual):
+        self.count += 1
+        self.abs_error += abs(predicted - actual)
+
+    @property
+    def mae(self):
+        return self.abs_error / self.count if self.count else None
+
+
+class ShadowEvaluator:
+    """
+    Scores a candidate model on live traffic without touching responses
+
+    The request thread only calls `submit`, which enqueues references to
+    data it already holds and never blocks; a full queue drops the sample.
+    A single background thread loads the candidate (via `load_candidate`),
+    predicts on the same feature row, and records latency and the
+    difference from the served prediction. Both predictions are kept until
+    a later request for the symbol brings the close SHADOW_HORIZON_BARS
+    bars ahead, which gives each model's realized error.
+    """
+
+    def __init__(self, model_type: str, candidate_id: str, load_candidate: Callable[[str], Optional[dict]],
+                 queue_size: int = SHADOW_QUEUE_SIZE, max_pending: int = SHADOW_MAX_PENDING,
+                 horizon: int = SHADOW_HORIZON_BARS):
+        self.model_type = model_type
+        self.candidate_id = candidate_id
+        self.horizon = horizon
+        self.max_pending = max_pending
+        self.started_at = time.time()
+        self._load_candidate = load_candidate
+        self._candidate = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self.scored = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._abs_diff = 0.0
+        self._latency = {'primary': 0.0, 'shadow': 0.0}
+        self._accuracy = {'primary': _ErrorStats(), 'shadow': _ErrorStats()}
+
+        self._thread = threading.Thread(target=self._run, name=f'shadow-{candidate_id}', daemon=True)
+        self._thread.start()
+
+    def submit(self, symbol: str, row, closes, primary_prediction: float, primary_seconds: float):
+        """
+        Queue one served prediction for shadow scoring (non-blocking)
+
+        Args:
+            symbol: Ticker the prediction was served for
+            row: Single-row DataFrame of serving features (all computed columns)
+            closes: Close price Series the row was built from, used to resolve
+                earlier predictions for the symbol
+            primary_prediction: Prediction returned to the client
+            primary_seconds: Time the served model spent in predict
+        """
+        try:
+            self._queue.put_nowait((symbol.upper(), row, closes, float(primary_prediction), primary_seconds))
+        except queue.Full:
+            self.dropped += 1
+            SHADOW_EVALUATIONS.inc(result='dropped')
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                self._evaluate(*item)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                SHADOW_EVALUATIONS.inc(result='error')
+
+    def _evaluate(self, symbol, row, closes, primary_prediction, primary_seconds):
+        if self._candidate is None:
+            self._candidate = self._load_candidate(self.candidate_id)
+            if self._candidate is None:
+                raise LookupError(f"Shadow model {self.candidate_id} not found")
+            print(f"👥 Shadow model {self.candidate_id} loaded for '{self.model_type}'")
+
+        pipeline, metadata = self._candidate['model'], self._candidate['metadata']
+        features = row[metadata.get('numeric_features', []) + metadata.get('categorical_features', [])]
+        if metadata.get('precision') == 'float32':
+            features = features.astype('float32')
+
+        start = time.perf_counter()
+        shadow_prediction = float(pipeline.predict(features)[0])
+        shadow_seconds = time.perf_counter() - start
+
+        SHADOW_LATENCY.observe(primary_seconds, role='primary')
+        SHADOW_LATENCY.observe(shadow_seconds, role='shadow')
+        SHADOW_EVALUATIONS.inc(result='scored')
+
+        with self._lock:
+            self.scored += 1
+            self._abs_diff += abs(shadow_prediction - primary_prediction)
+            self._latency['primary'] += primary_seconds
+            self._latency['shadow'] += shadow_seconds
+
+            self._resolve(symbol, closes)
+            key = (symbol, closes.index[-1])
+            self._pending[key] = (primary_prediction, shadow_prediction)
+            self._pending.move_to_end(key)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+
+    def _resolve(self, symbol, closes):
+        """Score pending predictions whose target bar is now in `closes`"""
+        resolved = []
+        for key, (primary, shadow) in self._pending.items():
+            if key[0] != symbol:
+                continue
+            position = closes.index.searchsorted(key[1])
+            if position >= len(closes) or closes.index[position] != key[1]:
+                continue
+            if position + self.horizon < len(closes):
+                actual = float(closes.iloc[position + self.horizon])
+                self._accuracy['primary'].add(primary, actual)
+                self._accuracy['shadow'].add(shadow, actual)
+                resolved.append(key)
+        for key in resolved:
+            del self._pending[key]
+
+    def summary(self) -> dict:
+        with self._lock:
+            scored = self.scored
+            primary, shadow = self._accuracy['primary'], self._accuracy['shadow']
+            return {
+                'model_type': self.model_type,
+                'candidate_id': self.candidate_id,
+                'candidate_loaded': self._candidate is not None,
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+                'scored': scored,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'last_error': self.last_error,
+                'queued': self._queue.qsize(),
+                'mean_abs_prediction_diff': self._abs_diff / scored if scored else None,
+                'mean_predict_ms': {
+                    role: round(total / scored * 1000, 3) if scored else None
+                    for role, total in self._latency.items()
+                },
+                'accuracy': {
+                    'horizon_bars': self.horizon,
+                    'resolved': primary.count,
+                    'pending': len(self._pending),
+                    'primary_mae': primary.mae,
+                    'shadow_mae': shadow.mae
+                }
+            }
@@ -0,0 +1,217 @@
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# =============================
+# CONFIG
+# =============================
+STREAM_POLL_SECONDS = float(os.getenv('STREAM_POLL_SECONDS', '15'))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv('STREAM_HEARTBEAT_SECONDS', '15'))
+MAX_STREAM_SUBSCRIBERS = int(os.getenv('MAX_STREAM_SUBSCRIBERS', '500'))
+MAX_STREAM_SYMBOLS = int(os.getenv('MAX_STREAM_SYMBOLS', '25'))
+
+# Price fields compared to decide whether a quote actually changed
+_QUOTE_CHANGE_FIELDS = ('price', 'open', 'high', 'low', 'volume', 'change', 'changePercent')
+# Latest events replayed to new subscribers; errors are transient and only go to current ones
+_REPLAYED_EVENTS = ('quote', 'prediction')
+
+
+class StreamLimitError(Exception):
+    """Raised when the hub cannot accept another subscriber"""
+
+
+class Subscription:
+    """
+    One client's view of the stream
+
+    Holds at most one pending event per (symbol, event type). A slow client
+    that falls behind gets the newest value instead of a growing backlog,
+    so memory per subscriber is bounded by symbols x event types.
+    """
+
+    def __init__(self, subscription_id, symbols):
+        self.id = subscription_id
+        self.symbols = frozenset(symbols)
+        self.dropped = 0
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def push(self, event):
+        """Queue an event, replacing any undelivered event for the same key"""
+        key = (event['symbol'], event['event'])
+        with self._cond:
+            if self._closed:
+                return
+            if key in self._pending:
+                self.dropped += 1
+            self._pending[key] = event
+            self._pending.move_to_end(key)
+            self._cond.notify()
+
+    def next_event(self, timeout):
+        """Block until an event is available; returns None on timeout or close"""
+        with self._cond:
+            if not self._pending and not self._closed:
+                self._cond.wait(timeout)
+            if self._closed or not self._pending:
+                return None
+            _, event = self._pending.popitem(last=False)
+            return event
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class QuoteStreamHub:
+    """
+    Fan-out hub for quote and prediction updates
+
+    A single background poller fetches the union of all subscribed symbols
+    with one bulk quote call per interval, so upstream load scales with the
+    number of distinct symbols rather than the number of connected clients.
+    """
+
+    def __init__(self, fetch_quotes, poll_interval=STREAM_POLL_SECONDS,
+                 max_subscribers=MAX_STREAM_SUBSCRIBERS, max_symbols=MAX_STREAM_SYMBOLS):
+        self.fetch_quotes = fetch_quotes
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers
+        self.max_symbols = max_symbols
+
+        self._subscribers = {}
+        self._by_symbol = {}
+        self._last = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._poller = None
+
+    # -----------------------------
+    # Subscriptions
+    # -----------------------------
+    def subscribe(self, symbols):
+        """Register a subscriber and replay the latest known events to it"""
+        symbols = [s.upper() for s in symbols]
+        if len(symbols) > self.max_symbols:
+            raise StreamLimitError(f'At most {self.max_symbols} symbols per stream')
+
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise StreamLimitError('Too many stream subscribers')
+            sub = Subscription(next(self._ids), symbols)
+            self._subscribers[sub.id] = sub
+            new_symbols = False
+            for symbol in sub.symbols:
+                if symbol not in self._by_symbol:
+                    self._by_symbol[symbol] = set()
+                    new_symbols = True
+                self._by_symbol[symbol].add(sub.id)
+            replay = [event for (symbol, _), event in self._last.items() if symbol in sub.symbols]
+            self._ensure_poller()
+
+        for event in replay:
+            sub.push(event)
+        if new_symbols:
+            self._wake.set()
+        return sub
+
+    def unsubscribe(self, sub):
+        """Remove a subscriber and stop polling symbols nobody watches"""
+        sub.close()
+        with self._lock:
+            if self._subscribers.pop(sub.id, None) is None:
+                return
+            for symbol in sub.symbols:
+                watchers = self._by_symbol.get(symbol)
+                if watchers is None:
+                    continue
+                watchers.discard(sub.id)
+                if not watchers:
+                    del self._by_symbol[symbol]
+                    for key in [key for key in self._last if key[0] == symbol]:
+                        del self._last[key]
+
+    # -----------------------------
+    # Publishing
+    # -----------------------------
+    def publish(self, symbol, event_type, data):
+        """Deliver an event to every subscriber of `symbol`"""
+        symbol = symbol.upper()
+        event = {'symbol': symbol, 'event': event_type, 'data': data}
+        with self._lock:
+            watchers = self._by_symbol.get(symbol)
+            if not watchers:
+                return 0
+            if event_type in _REPLAYED_EVENTS:
+                self._last[(symbol, event_type)] = event
+            targets = [self._subscribers[i] for i in watchers if i in self._subscribers]
+        for sub in targets:
+            sub.push(event)
+        return len(targets)
+
+    def stats(self):
+        """Current subscriber and symbol counts"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'symbols': len(self._by_symbol),
+                'droppedEvents': sum(s.dropped for s in self._subscribers.values())
+            }
+
+    # -----------------------------
+    # Poller
+    # -----------------------------
+    def _ensure_poller(self):
+        """Start the poller thread on first use (caller holds the lock)"""
+        if self._poller is None or not self._poller.is_alive():
+            self._poller = threading.Thread(target=self._poll_loop, name='quote-stream-poller', daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self):
+        while True:
+            with self._lock:
+                symbols = sorted(self._by_symbol)
+            # Cleared before polling, so a symbol added during the poll wakes the next one
+            self._wake.clear()
+            if symbols:
+                self.poll_once(symbols)
+            self._wake.wait(self.poll_interval if symbols else None)
+
+    def poll_once(self, symbols):
+        """Fetch quotes for `symbols` and publish the ones that changed"""
+        try:
+            quotes, errors = self.fetch_quotes(symbols)
+        except Exception as e:
+            print(f"Error polling stream quotes: {e}")
+            return
+
+        for symbol, quote in quotes.items():
+            with self._lock:
+                previous = self._last.get((symbol, 'quote'))
+            if previous is not None and _same_quote(previous['data'], quote):
+                continue
+            self.publish(symbol, 'quote', quote)
+
+        for symbol, message in errors.items():
+            self.publish(symbol, 'error', {'error': message})
+
+
+def _same_quote(old, new):
+    return all(old.get(field) == new.get(field) for field in _QUOTE_CHANGE_FIELDS)
+
+
+def format_sse(event):
+    """Encode a hub event as a Server-Sent Events frame"""
+    payload = dict(event['data'])
+    payload.setdefault('symbol', event['symbol'])
+    return f"event: {event['event']}\ndata: {json.dumps(payload)}\n\n"
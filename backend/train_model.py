@@ -1,10 +1,6 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, TimeSeriesSplit, RandomizedSearchCV
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
 import joblib
 import os
@@ -12,125 +8,49 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from ml_pipeline import (
+    make_sample_dataset, create_features, check_prediction_drift, drift_reference,
+    build_pipeline, time_series_cv, prediction_intervals, to_compact, NON_FEATURE_COLS, COMPACT_DTYPE
+)
+from validation import ValidationRules, validate_frame
+
 
 # =============================
 # CONFIG
 # =============================
-DATA_PATH = "stock_prediction_dataset_2000.xlsx"
+# .xlsx/.csv table, or a dataset built by build_dataset.py (its root or one version)
+DATA_PATH = os.getenv("TRAINING_DATA", "stock_prediction_dataset_2000.xlsx")
 MODEL_DIR = "model_artifacts"
 TARGET_COL = "Target_Close_7d"  # The target column to predict
+COMPACT_PRECISION = os.getenv("COMPACT_PRECISION", "0") == "1"  # float32 features end to end
+ESTIMATOR = os.getenv("ESTIMATOR", "random_forest")  # see ml_pipeline.ESTIMATORS
 os.makedirs(MODEL_DIR, exist_ok=True)
 
 
-# =============================
-# HELPER FUNCTIONS
-# =============================
-def create_features(df):
-    """Create additional predictive features"""
-    df = df.copy()
-
-    # Technical indicator interactions
-    if 'RSI_14' in df.columns and 'MACD' in df.columns:
-        df['RSI_MACD_Interaction'] = df['RSI_14'] * df['MACD']
-
-    # Bollinger Band width
-    if 'Bollinger_Upper' in df.columns and 'Bollinger_Lower' in df.columns:
-        df['Bollinger_Width'] = df['Bollinger_Upper'] - df['Bollinger_Lower']
-        df['Bollinger_Position'] = (df['Bollinger_Upper'] + df['Bollinger_Lower']) / 2
-
-    # Sentiment features
-    if 'News_Sentiment_Score' in df.columns and 'Social_Sentiment_Score' in df.columns:
-        df['Combined_Sentiment'] = (df['News_Sentiment_Score'] + df['Social_Sentiment_Score']) / 2
-        df['Sentiment_Divergence'] = abs(df['News_Sentiment_Score'] - df['Social_Sentiment_Score'])
-
-    # Financial health score
-    if 'ROE' in df.columns and 'Debt_to_Equity' in df.columns:
-        df['Financial_Health'] = df['ROE'] / (1 + df['Debt_to_Equity'])
-
-    # Valuation metrics
-    if 'PE_Ratio' in df.columns and 'EPS' in df.columns:
-        df['Earnings_Yield'] = df['EPS'] / df['PE_Ratio']
-
-    # Macro indicators
-    if 'Inflation_Rate' in df.columns and 'Interest_Rate' in df.columns:
-        df['Real_Interest_Rate'] = df['Interest_Rate'] - df['Inflation_Rate']
-
-    return df
-
-
-def validate_input_data(df):
-    """Ensure input data quality"""
-    issues = []
-
-    # Check for missing values
-    missing_pct = df.isnull().sum() / len(df) * 100
-    high_missing = missing_pct[missing_pct > 50]
-    if len(high_missing) > 0:
-        issues.append(f"High missing values in: {high_missing.index.tolist()}")
-
-    # Check for outliers
-    for col in df.select_dtypes(include=[np.number]).columns:
-        if df[col].std() > 0:
-            z_scores = np.abs((df[col] - df[col].mean()) / df[col].std())
-            outlier_pct = (z_scores > 5).sum() / len(df) * 100
-            if outlier_pct > 5:
-                issues.append(f"High outliers in {col}: {outlier_pct:.1f}%")
-
-    if issues:
-        print("⚠️ Data quality issues detected:")
-        for issue in issues:
-            print(f"  - {issue}")
-        return False
-    return True
-
-
-def check_prediction_drift(new_predictions, historical_mean, historical_std, threshold=2):
-    """Alert if predictions drift significantly"""
-    new_mean = np.mean(new_predictions)
-    z_score = abs(new_mean - historical_mean) / historical_std
-
-    if z_score > threshold:
-        print(f"⚠️ WARNING: Prediction drift detected! Z-score: {z_score:.2f}")
-        return True
-    return False
-
-
 # =============================
 # LOAD DATA
 # =============================
 print("📂 Loading data...")
+# Columns that identify rows but are never model inputs (serving only passes numeric features)
+id_cols = []
 try:
-    df = pd.read_excel(DATA_PATH)
+    if os.path.isdir(DATA_PATH) or DATA_PATH.endswith(".parquet"):
+        from build_dataset import read_dataset
+        from price_store import SYMBOL_COL
+        df = read_dataset(DATA_PATH)
+        id_cols = [SYMBOL_COL]
+    elif DATA_PATH.endswith(".csv"):
+        df = pd.read_csv(DATA_PATH, parse_dates=["Date"])
+    else:
+        df = pd.read_excel(DATA_PATH)
     print(f"✅ Loaded {len(df)} rows, {len(df.columns)} columns")
 except Exception as e:
     print(f"⚠️ Could not load dataset: {e}")
     print("📝 Creating sample dataset for demonstration...")
 
     # Create sample dataset
-    np.random.seed(42)
     dates = pd.date_range('2020-01-01', '2023-12-31', freq='D')
-
-    df = pd.DataFrame({
-        'Date': dates,
-        'Close': np.random.randn(len(dates)).cumsum() * 10 + 100,
-        'Volume': np.random.randint(1000000, 10000000, len(dates)),
-        'RSI_14': np.random.uniform(20, 80, len(dates)),
-        'MACD': np.random.randn(len(dates)) * 2,
-        'Bollinger_Upper': np.random.randn(len(dates)).cumsum() * 5 + 110,
-        'Bollinger_Lower': np.random.randn(len(dates)).cumsum() * 5 + 90,
-        'News_Sentiment_Score': np.random.uniform(-1, 1, len(dates)),
-        'Social_Sentiment_Score': np.random.uniform(-1, 1, len(dates)),
-        'ROE': np.random.uniform(0.05, 0.25, len(dates)),
-        'Debt_to_Equity': np.random.uniform(0.1, 2.0, len(dates)),
-        'PE_Ratio': np.random.uniform(10, 30, len(dates)),
-        'EPS': np.random.uniform(1, 5, len(dates)),
-        'Inflation_Rate': np.random.uniform(0.01, 0.08, len(dates)),
-        'Interest_Rate': np.random.uniform(0.02, 0.06, len(dates))
-    })
-
-    # Create target variable (next day close price)
-    df['Target_Close_7d'] = df['Close'].shift(-7)
-    df = df.dropna()
+    df = make_sample_dataset(len(dates), start_date=dates[0])
 
     print(f"✅ Created sample dataset with {len(df)} rows, {len(df.columns)} columns")
 
@@ -159,7 +79,13 @@ if TARGET_COL not in df.columns:
 
 # Validate data quality
 print("\n🔍 Validating data quality...")
-validate_input_data(df)
+validation_rules = ValidationRules(
+    date_column='Date' if 'Date' in df.columns else None,
+    group_column='Ticker' if 'Ticker' in df.columns else None
+)
+validation_report = validate_frame(df, validation_rules)
+validation_report.print_summary()
+validation_report.save(os.path.join(MODEL_DIR, "validation_report.json"))
 
 
 # Drop rows with missing target
@@ -174,7 +100,9 @@ print(f"✅ {len(df)} rows after dropping missing targets")
 # =============================
 print("\n🔧 Creating features...")
 initial_rows = len(df)
-df = create_features(df)
+if COMPACT_PRECISION:
+    df = to_compact(df, exclude=(TARGET_COL,))
+df = create_features(df, inplace=True)
 df = df.dropna()  # Drop rows with NaN from feature engineering
 print(f"✅ {len(df)} rows after feature engineering (dropped {initial_rows - len(df)} rows with NaN)")
 
@@ -183,8 +111,7 @@ print(f"✅ {len(df)} rows after feature engineering (dropped {initial_rows - le
 # SPLIT FEATURES & TARGET
 # =============================
 # Exclude columns that shouldn't be features
-exclude_cols = [TARGET_COL, 'Confidence_Interval_Lower', 'Confidence_Interval_Upper',
-                'Last_Updated', 'Missing_Values_Flag']
+exclude_cols = [TARGET_COL] + NON_FEATURE_COLS + id_cols
 feature_cols = [col for col in df.columns if col not in exclude_cols]
 
 
@@ -201,34 +128,12 @@ print(f"\n📊 Features: {len(numeric_cols)} numeric, {len(categorical_cols)} ca
 print(f"   Categorical: {categorical_cols}")
 
 
-# =============================
-# PREPROCESSING
-# =============================
-preprocessor = ColumnTransformer(
-    transformers=[
-        ("num", StandardScaler(), numeric_cols),
-        ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_cols),
-    ]
-)
-
-
 # =============================
 # MODEL PIPELINE
 # =============================
-model = RandomForestRegressor(
-    n_estimators=200,
-    max_depth=10,
-    min_samples_split=5,
-    min_samples_leaf=2,
-    random_state=42,
-    n_jobs=-1
-)
-
-
-pipeline = Pipeline([
-    ("preprocessor", preprocessor),
-    ("model", model)
-])
+feature_dtype = COMPACT_DTYPE if COMPACT_PRECISION else np.float64
+pipeline = build_pipeline(numeric_cols, categorical_cols, estimator=ESTIMATOR, dtype=feature_dtype)
+print(f"   Estimator: {ESTIMATOR}, precision: {np.dtype(feature_dtype).name}")
 
 
 # =============================
@@ -246,21 +151,7 @@ print(f"\n📈 Train size: {len(X_train)}, Test size: {len(X_test)}")
 # TIME-SERIES CROSS-VALIDATION
 # =============================
 print("\n🔄 Performing time-series cross-validation...")
-tscv = TimeSeriesSplit(n_splits=5)
-cv_scores = []
-
-
-for fold, (train_idx, val_idx) in enumerate(tscv.split(X_train), 1):
-    X_train_cv = X_train.iloc[train_idx]
-    X_val_cv = X_train.iloc[val_idx]
-    y_train_cv = y_train.iloc[train_idx]
-    y_val_cv = y_train.iloc[val_idx]
-
-    pipeline.fit(X_train_cv, y_train_cv)
-    y_pred_cv = pipeline.predict(X_val_cv)
-    score = r2_score(y_val_cv, y_pred_cv)
-    cv_scores.append(score)
-    print(f"  Fold {fold}: R² = {score:.3f}")
+cv_scores = time_series_cv(pipeline, X_train, y_train, n_splits=5)
 
 
 print(f"📊 Mean CV R²: {np.mean(cv_scores):.3f} (+/- {np.std(cv_scores):.3f})")
@@ -315,34 +206,27 @@ else:
     feature_names = numeric_cols
 
 
-importances = pipeline.named_steps['model'].feature_importances_
-importance_df = pd.DataFrame({
-    'feature': feature_names,
-    'importance': importances
-}).sort_values('importance', ascending=False).head(20)
-
+model = pipeline.named_steps['model']
+if hasattr(model, 'feature_importances_'):
+    importance_df = pd.DataFrame({
+        'feature': feature_names,
+        'importance': model.feature_importances_
+    }).sort_values('importance', ascending=False).head(20)
 
-print("\nTop 20 Most Important Features:")
-print(importance_df.to_string(index=False))
+    print("\nTop 20 Most Important Features:")
+    print(importance_df.to_string(index=False))
 
-
-# Save feature importance
-importance_df.to_csv(os.path.join(MODEL_DIR, "feature_importance.csv"), index=False)
+    # Save feature importance
+    importance_df.to_csv(os.path.join(MODEL_DIR, "feature_importance.csv"), index=False)
+else:
+    print(f"  {ESTIMATOR} does not expose impurity-based importances; skipping")
 
 
 # =============================
 # PREDICTION INTERVALS
 # =============================
 print("\n📐 Computing prediction intervals...")
-X_test_transformed = pipeline.named_steps["preprocessor"].transform(X_test)
-forest = pipeline.named_steps["model"]
-all_preds = np.stack([tree.predict(X_test_transformed) for tree in forest.estimators_], axis=1)
-
-
-lower_5 = np.percentile(all_preds, 5, axis=1)
-upper_95 = np.percentile(all_preds, 95, axis=1)
-lower_10 = np.percentile(all_preds, 10, axis=1)
-upper_90 = np.percentile(all_preds, 90, axis=1)
+lower_5, upper_95, lower_10, upper_90 = prediction_intervals(pipeline, X_test, (5, 95, 10, 90))
 
 
 # Check coverage
@@ -391,7 +275,10 @@ metadata = {
     "n_train": len(X_train),
     "n_test": len(X_test),
     "prediction_mean": float(np.mean(y_pred)),
-    "prediction_std": float(np.std(y_pred))
+    "prediction_std": float(np.std(y_pred)),
+    "drift_reference": drift_reference(X_test[numeric_cols], y_pred),
+    "precision": np.dtype(feature_dtype).name,
+    "estimator": ESTIMATOR
 }
 joblib.dump(metadata, os.path.join(MODEL_DIR, "metadata.pkl"))
 
@@ -418,16 +305,11 @@ def predict_stock_with_intervals(input_df, confidence=90):
     # Point prediction
     preds = pipeline.predict(input_df)
 
-    # Get all tree predictions for intervals
-    X_transformed = pipeline.named_steps["preprocessor"].transform(input_df)
-    forest = pipeline.named_steps["model"]
-    all_preds = np.stack([tree.predict(X_transformed) for tree in forest.estimators_], axis=1)
-
+    # Per-tree spread (forest) or quantile models (boosting)
     lower_pct = (100 - confidence) / 2
     upper_pct = 100 - lower_pct
 
-    lower_bound = np.percentile(all_preds, lower_pct, axis=1)
-    upper_bound = np.percentile(all_preds, upper_pct, axis=1)
+    lower_bound, upper_bound = prediction_intervals(pipeline, input_df, (lower_pct, upper_pct))
 
     return pd.DataFrame({
         'prediction': preds,
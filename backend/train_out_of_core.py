@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Out-of-core training for datasets larger than memory
+
+Reads a (hive-)partitioned Parquet dataset in bounded batches and never
+holds more than one batch plus two fixed-size samples in memory:
+
+  pass 0  scan only the date column to place the hold-out cutoff
+  pass 1  StandardScaler.partial_fit on numeric features, category counts,
+          bounded uniform samples of training and hold-out rows
+  pass 2  'forest': warm_start RandomForest, growing a few trees per batch
+          'hgb':    HistGradientBoosting (plus quantile models for intervals)
+                    on the bounded training sample
+
+Features are derived per batch with ml_pipeline.create_features (all of
+them are row-local, so batching does not change them). The artifacts have
+the same layout as train_model.py: stock_model_pipeline.pkl (a fitted
+Pipeline with 'preprocessor' and 'model' steps) and metadata.pkl.
+
+Usage (from backend/):
+    python train_out_of_core.py data/bars/ --batch-rows 500000 --estimator forest
+    python train_out_of_core.py --write-sample data/sample/ --sample-rows 2000000
+"""
+
+import argparse
+import math
+import os
+from collections import Counter
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from ml_pipeline import (
+    make_sample_dataset, create_features, build_preprocessor, build_estimator, drift_reference,
+    TARGET_COL, NON_FEATURE_COLS, COMPACT_DTYPE
+)
+from price_store import SYMBOL_COL
+
+MODEL_DIR = "model_artifacts"
+DATE_COL = 'Date'
+CATEGORICAL_DTYPES = ['object', 'string', 'category']
+
+DEFAULT_BATCH_ROWS = 250_000
+DEFAULT_SAMPLE_ROWS = 200_000
+DEFAULT_EVAL_ROWS = 100_000
+DEFAULT_MAX_CATEGORIES = 50
+
+
+# =============================
+# DATA SOURCE
+# =============================
+def open_dataset(source):
+    """Parquet file or directory, with hive-style partition columns (e.g. Sector=Tech/)"""
+    return ds.dataset(source, format='parquet', partitioning='hive')
+
+
+def compact_table(table, exclude=(TARGET_COL,)):
+    """Cast numeric Arrow columns to float32 before they reach pandas"""
+    fields = [
+        pa.field(f.name, pa.float32()) if (
+            f.name not in exclude and (pa.types.is_floating(f.type) or pa.types.is_integer(f.type))
+        ) else f
+        for f in table.schema
+    ]
+    return table.cast(pa.schema(fields))
+
+
+def scan_batches(dataset, batch_rows=DEFAULT_BATCH_ROWS, columns=None, compact=False):
+    """Yield pandas frames of roughly `batch_rows` rows, merging small row groups"""
+    def to_frame(batches):
+        table = pa.Table.from_batches(batches)
+        return (compact_table(table) if compact else table).to_pandas()
+
+    pending, pending_rows = [], 0
+    for record_batch in dataset.to_batches(columns=columns, batch_size=batch_rows):
+        if record_batch.num_rows == 0:
+            continue
+        pending.append(record_batch)
+        pending_rows += record_batch.num_rows
+        if pending_rows >= batch_rows:
+            yield to_frame(pending)
+            pending, pending_rows = [], 0
+    if pending:
+        yield to_frame(pending)
+
+
+def date_range(dataset, date_col=DATE_COL):
+    """Min/max of the date column, reading only that column"""
+    if date_col not in dataset.schema.names:
+        return None, None
+    lo = hi = None
+    for record_batch in dataset.to_batches(columns=[date_col]):
+        if record_batch.num_rows == 0:
+            continue
+        bounds = pc.min_max(record_batch.column(0))
+        batch_lo, batch_hi = bounds['min'].as_py(), bounds['max'].as_py()
+        if batch_lo is None:
+            continue
+        lo = batch_lo if lo is None else min(lo, batch_lo)
+        hi = batch_hi if hi is None else max(hi, batch_hi)
+    return lo, hi
+
+
+def write_sample_dataset(path, n_rows, tickers=('AAPL', 'MSFT', 'GOOGL', 'AMZN'), seed=42):
+    """Write make_sample_dataset rows as Parquet partitioned by Ticker"""
+    per_ticker = math.ceil(n_rows / len(tickers))
+    for i, ticker in enumerate(tickers):
+        df = make_sample_dataset(per_ticker + 7, seed=seed + i, start_date='2000-01-01')
+        df[SYMBOL_COL] = ticker
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        ds.write_dataset(table, path, format='parquet', partitioning=[SYMBOL_COL],
+                         partitioning_flavor='hive', existing_data_behavior='overwrite_or_ignore',
+                         max_rows_per_group=100_000, basename_template=f'{ticker}-{{i}}.parquet')
+    print(f"💾 Wrote ~{n_rows} rows to {path}")
+
+
+# =============================
+# BOUNDED SAMPLE
+# =============================
+class BottomKSample:
+    """
+    Uniform sample of at most `k` rows from a stream of frames
+
+    Each row gets a random key and the `k` smallest keys are kept, which is
+    a uniform sample without replacement; batches only contribute rows whose
+    key beats the current k-th key, so the sample is never re-shuffled.
+    """
+
+    def __init__(self, k, seed=42):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.frame = None
+        self.keys = np.empty(0)
+
+    def add(self, df):
+        if self.k <= 0 or df.empty:
+            return
+        keys = self.rng.random(len(df))
+        if self.frame is not None and len(self.keys) >= self.k:
+            keep = keys < self.keys.max()
+            df, keys = df[keep], keys[keep]
+            if df.empty:
+                return
+        frame = df if self.frame is None else pd.concat([self.frame, df], ignore_index=True)
+        keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.k:
+            order = np.argpartition(keys, self.k - 1)[:self.k]
+            frame, keys = frame.iloc[order].reset_index(drop=True), keys[order]
+        self.frame, self.keys = frame, keys
+
+
+# =============================
+# TRAINING
+# =============================
+def prepare_batch(batch, exclude_cols):
+    """Drop rows without a target, derive features, split X / y"""
+    batch = batch.dropna(subset=[TARGET_COL])
+    batch = create_features(batch, inplace=True).dropna()
+    feature_cols = [c for c in batch.columns if c not in exclude_cols]
+    return batch[feature_cols], batch[TARGET_COL], batch
+
+
+def collect_statistics(dataset, exclude_cols, holdout_from, batch_rows, sample_rows, eval_rows,
+                       max_categories, date_col=DATE_COL, compact=False):
+    """Pass 1: incremental scaler, category counts and bounded samples"""
+    scaler = StandardScaler()
+    category_counts = {}
+    train_sample = BottomKSample(sample_rows, seed=42)
+    eval_sample = BottomKSample(eval_rows, seed=7)
+    numeric_cols = categorical_cols = None
+    n_train = n_eval = n_batches = 0
+
+    for batch in scan_batches(dataset, batch_rows, compact=compact):
+        X, y, prepared = prepare_batch(batch, exclude_cols)
+        if X.empty:
+            continue
+        if numeric_cols is None:
+            numeric_cols = X.select_dtypes(include=[np.number]).columns.tolist()
+            categorical_cols = X.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist()
+            category_counts = {c: Counter() for c in categorical_cols}
+
+        is_eval = np.zeros(len(X), dtype=bool)
+        if holdout_from is not None:
+            is_eval = (pd.to_datetime(prepared[date_col]) >= holdout_from).to_numpy()
+
+        train_X, train_y = X[~is_eval], y[~is_eval]
+        if len(train_X):
+            scaler.partial_fit(train_X[numeric_cols])
+            for col in categorical_cols:
+                category_counts[col].update(train_X[col].dropna().astype(str).value_counts().to_dict())
+            train_sample.add(train_X.assign(**{TARGET_COL: train_y}))
+            n_train += len(train_X)
+            n_batches += 1
+        if is_eval.any():
+            eval_sample.add(X[is_eval].assign(**{TARGET_COL: y[is_eval]}))
+            n_eval += int(is_eval.sum())
+
+    if numeric_cols is None or n_train == 0:
+        raise ValueError("No training rows left after dropping missing targets/features")
+
+    categories = [
+        sorted(v for v, _ in category_counts[col].most_common(max_categories))
+        for col in categorical_cols
+    ]
+    return {
+        'scaler': scaler,
+        'numeric_cols': numeric_cols,
+        'categorical_cols': categorical_cols,
+        'categories': categories,
+        'train_sample': train_sample.frame,
+        'eval_sample': eval_sample.frame,
+        'n_train': n_train,
+        'n_eval': n_eval,
+        'n_batches': n_batches,
+        'compact': compact
+    }
+
+
+def fitted_preprocessor(stats, dense=False):
+    """
+    ColumnTransformer whose scaler holds the streamed statistics
+
+    The transformer is fitted on the bounded sample to set up its internals,
+    then the numeric step is swapped for the partial_fit scaler so the
+    scaling matches the full dataset rather than the sample.
+    """
+    numeric_cols, categorical_cols = stats['numeric_cols'], stats['categorical_cols']
+    sample = stats['train_sample']
+    for col in categorical_cols:
+        sample[col] = sample[col].astype(str)
+    preprocessor = build_preprocessor(numeric_cols, categorical_cols,
+                                      categories=stats['categories'] or 'auto',
+                                      dtype=COMPACT_DTYPE if stats['compact'] else np.float64,
+                                      dense=dense)
+    preprocessor.fit(sample[numeric_cols + categorical_cols])
+    preprocessor.transformers_ = [
+        (name, stats['scaler'] if name == 'num' else transformer, cols)
+        for name, transformer, cols in preprocessor.transformers_
+    ]
+    return preprocessor
+
+
+def _transform(preprocessor, X, categorical_cols):
+    X = X.copy() if categorical_cols else X
+    for col in categorical_cols:
+        X[col] = X[col].astype(str)
+    return preprocessor.transform(X)
+
+
+def train_forest(dataset, preprocessor, stats, exclude_cols, holdout_from, batch_rows,
+                 n_estimators=200, max_depth=10, n_jobs=-1, date_col=DATE_COL):
+    """
+    Pass 2: grow a warm_start forest, a few trees per batch
+
+    Exactly `n_estimators` trees are spread over the training batches
+    (stats['n_batches']), the remainder carried from batch to batch. With
+    more batches than trees, batches that get no tree are skipped.
+    """
+    model = build_estimator('random_forest', n_estimators=0, max_depth=max_depth, n_jobs=n_jobs, warm_start=True)
+
+    trained = 0
+    for i, batch in enumerate(scan_batches(dataset, batch_rows, compact=stats['compact']), 1):
+        X, y, prepared = prepare_batch(batch, exclude_cols)
+        if holdout_from is not None and len(X):
+            is_train = (pd.to_datetime(prepared[date_col]) < holdout_from).to_numpy()
+            X, y = X[is_train], y[is_train]
+        if X.empty:
+            continue
+        trained += 1
+        target = n_estimators * min(trained, stats['n_batches']) // stats['n_batches']
+        if target == model.n_estimators:
+            continue
+        model.n_estimators = target
+        model.fit(_transform(preprocessor, X, stats['categorical_cols']), y)
+        print(f"  Batch {i}: {len(X)} rows, {len(model.estimators_)} trees")
+
+    return model
+
+
+def train_hgb(preprocessor, stats, max_iter=300, learning_rate=0.1):
+    """Pass 2: histogram gradient boosting (with quantile models) on the bounded training sample"""
+    sample = stats['train_sample']
+    X = sample[stats['numeric_cols'] + stats['categorical_cols']]
+    model = build_estimator('hist_gradient_boosting', max_iter=max_iter, learning_rate=learning_rate)
+    model.fit(_transform(preprocessor, X, stats['categorical_cols']), sample[TARGET_COL])
+    print(f"  Fitted on {len(sample)} sampled rows ({model.point_model_.n_iter_} iterations)")
+    return model
+
+
+# =============================
+# MAIN
+# =============================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', nargs='?', help='Parquet file or partitioned dataset directory')
+    parser.add_argument('--estimator', choices=['forest', 'hgb'], default='forest')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='Rows per in-memory batch')
+    parser.add_argument('--sample-rows', type=int, default=DEFAULT_SAMPLE_ROWS,
+                        help='Bounded training sample (hgb training set, preprocessor setup)')
+    parser.add_argument('--eval-rows', type=int, default=DEFAULT_EVAL_ROWS, help='Bounded hold-out sample')
+    parser.add_argument('--test-fraction', type=float, default=0.15,
+                        help='Latest fraction of the date range held out for evaluation')
+    parser.add_argument('--n-estimators', type=int, default=200, help='Target forest size')
+    parser.add_argument('--max-categories', type=int, default=DEFAULT_MAX_CATEGORIES,
+                        help='Most frequent values kept per categorical column')
+    parser.add_argument('--exclude', default='', help='Extra comma separated columns to leave out')
+    parser.add_argument('--compact', action='store_true', help='Keep features float32 from the Parquet scan onwards')
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--write-sample', metavar='PATH', help='Write a synthetic partitioned dataset and exit')
+    args = parser.parse_args()
+
+    if args.write_sample:
+        write_sample_dataset(args.write_sample, args.sample_rows)
+        return
+    if not args.source:
+        parser.error('source is required unless --write-sample is given')
+
+    # The symbol partition column is an id, not a model input: serving passes numeric features only
+    exclude_cols = NON_FEATURE_COLS + [SYMBOL_COL] + [c.strip() for c in args.exclude.split(',') if c.strip()]
+    dataset = open_dataset(args.source)
+
+    print("📂 Scanning date range...")
+    lo, hi = date_range(dataset)
+    holdout_from = None
+    if lo is not None and args.test_fraction > 0:
+        lo, hi = pd.Timestamp(lo), pd.Timestamp(hi)
+        holdout_from = lo + (hi - lo) * (1 - args.test_fraction)
+        print(f"✅ {lo.date()} → {hi.date()}, holding out rows from {holdout_from.date()}")
+    else:
+        print("⚠️ No date column; training on all rows without a hold-out set")
+
+    print("\n📊 Pass 1: fitting statistics incrementally...")
+    stats = collect_statistics(dataset, exclude_cols, holdout_from, args.batch_rows,
+                               args.sample_rows, args.eval_rows, args.max_categories, compact=args.compact)
+    print(f"✅ {stats['n_train']} training rows in {stats['n_batches']} batches, {stats['n_eval']} hold-out rows")
+    print(f"   Features: {len(stats['numeric_cols'])} numeric, {len(stats['categorical_cols'])} categorical")
+
+    preprocessor = fitted_preprocessor(stats, dense=args.estimator == 'hgb')
+
+    print(f"\n🚀 Pass 2: training ({args.estimator})...")
+    if args.estimator == 'forest':
+        model = train_forest(dataset, preprocessor, stats, exclude_cols, holdout_from, args.batch_rows,
+                             n_estimators=args.n_estimators)
+    else:
+        model = train_hgb(preprocessor, stats)
+
+    pipeline = Pipeline([("preprocessor", preprocessor), ("model", model)])
+
+    mae = rmse = r2 = None
+    y_pred = np.empty(0)
+    eval_sample = stats['eval_sample']
+    if eval_sample is not None and len(eval_sample):
+        print("\n📊 Evaluating on hold-out sample...")
+        X_eval = eval_sample[stats['numeric_cols'] + stats['categorical_cols']].copy()
+        for col in stats['categorical_cols']:
+            X_eval[col] = X_eval[col].astype(str)
+        y_eval = eval_sample[TARGET_COL]
+        y_pred = pipeline.predict(X_eval)
+        mae = mean_absolute_error(y_eval, y_pred)
+        rmse = float(np.sqrt(mean_squared_error(y_eval, y_pred)))
+        r2 = r2_score(y_eval, y_pred)
+        print(f"  MAE:  {mae:.3f}")
+        print(f"  RMSE: {rmse:.3f}")
+        print(f"  R²:   {r2:.3f}")
+
+    os.makedirs(args.model_dir, exist_ok=True)
+    model_path = os.path.join(args.model_dir, "stock_model_pipeline.pkl")
+    joblib.dump(pipeline, model_path)
+
+    metadata = {
+        "trained_on": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "model_path": model_path,
+        "target_column": TARGET_COL,
+        "mae": mae,
+        "rmse": rmse,
+        "r2": r2,
+        "cv_scores": [],
+        "mean_cv_r2": None,
+        "numeric_features": stats['numeric_cols'],
+        "categorical_features": stats['categorical_cols'],
+        "n_train": stats['n_train'],
+        "n_test": stats['n_eval'],
+        "prediction_mean": float(np.mean(y_pred)) if len(y_pred) else None,
+        "prediction_std": float(np.std(y_pred)) if len(y_pred) else None,
+        "drift_reference": drift_reference(X_eval[stats['numeric_cols']], y_pred) if len(y_pred) else None,
+        "estimator": 'random_forest' if args.estimator == 'forest' else 'hist_gradient_boosting',
+        "training_mode": f"out_of_core:{args.estimator}",
+        "batch_rows": args.batch_rows,
+        "precision": 'float32' if args.compact else 'float64'
+    }
+    joblib.dump(metadata, os.path.join(args.model_dir, "metadata.pkl"))
+    print(f"\n✅ All artifacts saved in '{args.model_dir}/'")
+
+
+if __name__ == '__main__':
+    main()
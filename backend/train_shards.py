@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Train one model per symbol or per sector, in parallel
+
+Each shard is trained like train_model.py (features from
+ml_pipeline.create_features, chronological 85/15 split) on the rows of one
+Ticker or Sector, in a separate worker process. Shards are written to
+model_artifacts/shards/<model_type>/ (stock_model_pipeline.pkl +
+metadata.pkl) and, with --save-db, stored as active models with
+model_type 'stock_prediction:symbol:AAPL' / 'stock_prediction:sector:Technology'.
+The API's ModelRouter picks them up without a restart once its shard index
+TTL expires.
+
+Usage (from backend/):
+    python train_shards.py --by symbol --workers 4
+    python train_shards.py --by sector --data data/bars.parquet --estimator hist_gradient_boosting --save-db
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from ml_pipeline import (
+    make_sample_dataset, create_features, build_pipeline, drift_reference,
+    TARGET_COL, NON_FEATURE_COLS, DEFAULT_ESTIMATOR
+)
+from model_router import SHARDS_DIR, shard_dir, shard_key
+
+DATA_PATH = "stock_prediction_dataset_2000.xlsx"
+GROUP_COLUMNS = {'symbol': 'Ticker', 'sector': 'Sector'}
+SAMPLE_SECTORS = {'AAPL': 'Technology', 'MSFT': 'Technology', 'JPM': 'Financial Services', 'XOM': 'Energy'}
+
+
+# =============================
+# DATA
+# =============================
+def load_dataset(path):
+    """Training table from .xlsx/.csv/.parquet, or a multi-ticker sample"""
+    try:
+        if path.endswith('.parquet') or os.path.isdir(path):
+            return pd.read_parquet(path)
+        if path.endswith('.csv'):
+            return pd.read_csv(path, parse_dates=['Date'])
+        return pd.read_excel(path)
+    except Exception as e:
+        print(f"⚠️ Could not load dataset: {e}")
+        print("📝 Creating multi-ticker sample dataset for demonstration...")
+        frames = []
+        for i, (ticker, sector) in enumerate(SAMPLE_SECTORS.items()):
+            df = make_sample_dataset(1500, seed=42 + i, start_date='2019-01-01')
+            df['Ticker'] = ticker
+            df['Sector'] = sector
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True)
+
+
+# =============================
+# TRAINING
+# =============================
+def train_shard(model_type, df, estimator, params, out_dir):
+    """Fit and save one shard; runs in a worker process"""
+    start = time.perf_counter()
+    symbols = sorted(df['Ticker'].dropna().astype(str).unique().tolist()) if 'Ticker' in df.columns else []
+
+    df = df.dropna(subset=[TARGET_COL])
+    if 'Date' in df.columns:
+        df = df.sort_values('Date')
+    df = create_features(df, inplace=True).dropna()
+
+    # Both id columns, whichever one shards: serving passes numeric features only
+    exclude_cols = [TARGET_COL] + NON_FEATURE_COLS + list(GROUP_COLUMNS.values())
+    feature_cols = [c for c in df.columns if c not in exclude_cols]
+    X, y = df[feature_cols], df[TARGET_COL]
+    categorical_cols = X.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
+    numeric_cols = X.select_dtypes(include=[np.number]).columns.tolist()
+    X = X[numeric_cols + categorical_cols]
+
+    split = int(len(X) * 0.85)
+    X_train, X_test, y_train, y_test = X.iloc[:split], X.iloc[split:], y.iloc[:split], y.iloc[split:]
+
+    pipeline = build_pipeline(numeric_cols, categorical_cols, estimator=estimator, **params)
+    pipeline.fit(X_train, y_train)
+    y_pred = pipeline.predict(X_test)
+
+    os.makedirs(out_dir, exist_ok=True)
+    model_path = os.path.join(out_dir, "stock_model_pipeline.pkl")
+    joblib.dump(pipeline, model_path)
+
+    metadata = {
+        "trained_on": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "model_path": model_path,
+        "model_type": model_type,
+        "target_column": TARGET_COL,
+        "mae": float(mean_absolute_error(y_test, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "r2": float(r2_score(y_test, y_pred)),
+        "numeric_features": numeric_cols,
+        "categorical_features": categorical_cols,
+        "n_train": len(X_train),
+        "n_test": len(X_test),
+        "prediction_mean": float(np.mean(y_pred)),
+        "prediction_std": float(np.std(y_pred)),
+        "drift_reference": drift_reference(X_test[numeric_cols], y_pred),
+        "estimator": estimator,
+        "symbols": symbols
+    }
+    joblib.dump(metadata, os.path.join(out_dir, "metadata.pkl"))
+    metadata['fit_seconds'] = round(time.perf_counter() - start, 2)
+    metadata['artifact_bytes'] = os.path.getsize(model_path)
+    return metadata
+
+
+def save_shard_to_db(metadata):
+    """Store a trained shard as the active model for its model_type"""
+    from database import ModelDB
+    db = ModelDB()
+    record = db.model_file_to_db(metadata['model_path'], metadata={
+        k: v for k, v in metadata.items() if k not in ('fit_seconds', 'artifact_bytes')
+    })
+    record.update({
+        'model_type': metadata['model_type'],
+        'name': f"Stock Prediction Shard ({metadata['model_type'].split(':', 1)[1]})",
+        'version': datetime.now().strftime('%Y%m%d%H%M%S'),
+        'features': metadata['numeric_features'] + metadata['categorical_features'],
+        'description': f"{metadata['estimator']} trained on {metadata['n_train']} rows"
+    })
+    return db.save_model(record)
+
+
+# =============================
+# MAIN
+# =============================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--by', choices=sorted(GROUP_COLUMNS), default='symbol', help='Shard granularity')
+    parser.add_argument('--data', default=DATA_PATH, help='Training table (.xlsx, .csv or .parquet)')
+    parser.add_argument('--only', help='Comma separated subset of symbols/sectors to train')
+    parser.add_argument('--min-rows', type=int, default=200, help='Skip groups with fewer rows')
+    parser.add_argument('--estimator', default=DEFAULT_ESTIMATOR, help='Name from ml_pipeline.ESTIMATORS')
+    parser.add_argument('--n-estimators', type=int, default=100, help='Trees per forest (random_forest)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel training processes')
+    parser.add_argument('--shards-dir', default=SHARDS_DIR)
+    parser.add_argument('--save-db', action='store_true', help='Also store shards as active models in PostgreSQL')
+    args = parser.parse_args()
+
+    group_col = GROUP_COLUMNS[args.by]
+    df = load_dataset(args.data)
+    if group_col not in df.columns:
+        parser.error(f"Dataset has no '{group_col}' column to shard by {args.by}")
+
+    wanted = {v.strip() for v in args.only.split(',')} if args.only else None
+    params = {'n_estimators': args.n_estimators, 'n_jobs': 1} if args.estimator == 'random_forest' else {}
+
+    jobs = []
+    for value, group in df.groupby(group_col, sort=True):
+        value = str(value)
+        if wanted and value not in wanted and value.upper() not in wanted:
+            continue
+        if len(group) < args.min_rows:
+            print(f"⏭️ Skipping {value}: {len(group)} rows < --min-rows {args.min_rows}")
+            continue
+        model_type = shard_key(args.by, value)
+        jobs.append((model_type, group, shard_dir(model_type, args.shards_dir)))
+
+    print(f"🚀 Training {len(jobs)} {args.by} shards with {args.workers} workers ({args.estimator})")
+    start = time.perf_counter()
+    trained, failed = [], []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(train_shard, model_type, group, args.estimator, params, out_dir): model_type
+            for model_type, group, out_dir in jobs
+        }
+        for future in as_completed(futures):
+            model_type = futures[future]
+            try:
+                metadata = future.result()
+            except Exception as e:
+                print(f"❌ {model_type}: {e}")
+                failed.append(model_type)
+                continue
+            trained.append(metadata)
+            print(f"✅ {model_type}: R² {metadata['r2']:.3f}, {metadata['n_train']} rows, "
+                  f"{metadata['fit_seconds']}s, {metadata['artifact_bytes'] / 1024 ** 2:.1f} MB")
+            if args.save_db:
+                try:
+                    model_id = save_shard_to_db(metadata)
+                    print(f"   💾 Saved to database: {model_id}")
+                except Exception as e:
+                    print(f"   ⚠️ Could not save to database: {e}")
+
+    total_mb = sum(m['artifact_bytes'] for m in trained) / 1024 ** 2
+    print(f"\n📦 {len(trained)} shards ({total_mb:.1f} MB) in {time.perf_counter() - start:.1f}s, {len(failed)} failed")
+    print(f"📁 Shards saved in: {args.shards_dir}/")
+
+
+if __name__ == '__main__':
+    main()
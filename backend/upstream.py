@@ -0,0 +1,381 @@
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from metrics import (
+    registry, upstream_call, UPSTREAM_THROTTLED, UPSTREAM_RETRIED, UPSTREAM_QUEUE_WAIT, CIRCUIT_OPENED
+)
+
+# =============================
+# CONFIG
+# =============================
+# Priority classes: lower is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+# provider=rate/burst, e.g. 'yahoo=5/20,newsapi=1/5' (requests per second / bucket size)
+UPSTREAM_LIMITS = os.getenv('UPSTREAM_LIMITS', 'yahoo=5/20')
+# Longest a call may queue for a token before degrading to cached data
+UPSTREAM_MAX_WAIT_SECONDS = {
+    INTERACTIVE: float(os.getenv('UPSTREAM_INTERACTIVE_WAIT_SECONDS', '2')),
+    BACKGROUND: float(os.getenv('UPSTREAM_BACKGROUND_WAIT_SECONDS', '10'))
+}
+UPSTREAM_RETRIES = int(os.getenv('UPSTREAM_RETRIES', '2'))
+UPSTREAM_BACKOFF_BASE_SECONDS = float(os.getenv('UPSTREAM_BACKOFF_BASE_SECONDS', '0.25'))
+UPSTREAM_BACKOFF_MAX_SECONDS = float(os.getenv('UPSTREAM_BACKOFF_MAX_SECONDS', '4'))
+
+# provider=seconds; a call is abandoned (and counted as a failure) after this long
+UPSTREAM_TIMEOUTS = os.getenv('UPSTREAM_TIMEOUTS', 'yahoo=5')
+UPSTREAM_DEFAULT_TIMEOUT_SECONDS = float(os.getenv('UPSTREAM_DEFAULT_TIMEOUT_SECONDS', '10'))
+# Threads that run upstream calls; abandoned calls hold one until they return
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv('UPSTREAM_MAX_CONCURRENCY', '32'))
+# Consecutive failures that open a provider's circuit, and how long it stays open before a probe
+UPSTREAM_BREAKER_FAILURES = int(os.getenv('UPSTREAM_BREAKER_FAILURES', '5'))
+UPSTREAM_BREAKER_RESET_SECONDS = float(os.getenv('UPSTREAM_BREAKER_RESET_SECONDS', '30'))
+
+_priority = contextvars.ContextVar('upstream_priority', default=INTERACTIVE)
+# Holds a one-item list per request so tasks run in copied contexts
+# (e.g. thread pool fan-out) can flag the request they belong to
+_served_stale = contextvars.ContextVar('upstream_served_stale', default=None)
+
+
+class UpstreamUnavailable(Exception):
+    """Base class for upstream calls refused or abandoned by this module"""
+
+
+class UpstreamThrottled(UpstreamUnavailable):
+    """Raised when a call cannot get an upstream token before its deadline"""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """Raised without calling the provider while its circuit is open"""
+
+
+class UpstreamTimeout(UpstreamUnavailable):
+    """Raised when a call takes longer than the provider's timeout"""
+
+
+# =============================
+# TOKEN BUCKET
+# =============================
+class TokenBucket:
+    """
+    Thread-safe token bucket with a priority queue of waiters
+
+    Tokens refill at `rate` per second up to `burst`. When tokens run out,
+    callers queue and are served strictly by (priority, arrival), so
+    interactive requests overtake queued background refreshes. A caller
+    that cannot be served before its deadline leaves the queue.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = INTERACTIVE, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting up to `timeout` seconds; False if none was granted"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._refill(time.monotonic())
+            if not self._waiters and self._tokens >= 1:
+                self._tokens -= 1
+                return True
+
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == ticket and self._tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        return True
+                    if deadline is not None and now >= deadline:
+                        return False
+                    wait = (1 - self._tokens) / self.rate if self._waiters[0] == ticket else None
+                    if deadline is not None:
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                # The next waiter may now be at the head
+                self._cond.notify_all()
+
+    @property
+    def available(self) -> float:
+        with self._cond:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+def parse_limits(spec: str) -> Dict[str, TokenBucket]:
+    """'yahoo=5/20,newsapi=1/5' -> {provider: TokenBucket(rate, burst)}"""
+    buckets = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        provider, limit = part.split('=', 1)
+        rate, _, burst = limit.partition('/')
+        buckets[provider.strip()] = TokenBucket(float(rate), float(burst or rate))
+    return buckets
+
+
+budgets = parse_limits(UPSTREAM_LIMITS)
+timeouts = {
+    provider.strip(): float(seconds)
+    for provider, _, seconds in (part.partition('=') for part in UPSTREAM_TIMEOUTS.split(',') if part.strip())
+}
+
+
+# =============================
+# CIRCUIT BREAKER
+# =============================
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one provider
+
+    After `failure_threshold` failures in a row the circuit opens and calls
+    fail fast for `reset_timeout` seconds. Then it is half-open: a single
+    probe call is let through. Its success closes the circuit; its failure
+    opens it for another `reset_timeout`.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = UPSTREAM_BREAKER_FAILURES,
+                 reset_timeout: float = UPSTREAM_BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release_probe(self):
+        """Give back a probe slot claimed by `allow` when no call was made"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"✅ Upstream circuit '{self.name}' closed")
+            self._state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (self._state == CLOSED and self.failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                CIRCUIT_OPENED.inc(provider=self.name)
+                print(f"🔌 Upstream circuit '{self.name}' opened after {self.failures} failures")
+
+
+breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    breaker = breakers.get(provider)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = breakers.setdefault(provider, CircuitBreaker(provider))
+    return breaker
+
+
+def _circuit_collector():
+    states = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+    yield ('stocksight_upstream_circuit_state', 'gauge', 'Circuit state per provider (0 closed, 1 half-open, 2 open)',
+           [({'provider': b.name}, states[b.state]) for b in list(breakers.values())])
+
+
+registry.register_collector(_circuit_collector)
+_executor = ThreadPoolExecutor(max_workers=UPSTREAM_MAX_CONCURRENCY, thread_name_prefix='upstream')
+
+
+# =============================
+# PRIORITIES
+# =============================
+@contextmanager
+def priority(level: int):
+    """Run upstream calls in the enclosed block with the given priority"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def background(fn: Callable) -> Callable:
+    """Wrap `fn` so its upstream calls queue behind interactive requests"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with priority(BACKGROUND):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# =============================
+# CALLS
+# =============================
+def backoff_delay(attempt: int, base: float = UPSTREAM_BACKOFF_BASE_SECONDS,
+                  cap: float = UPSTREAM_BACKOFF_MAX_SECONDS) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def upstream_request(operation: str, fn: Callable, provider: str = 'yahoo',
+                     retries: int = UPSTREAM_RETRIES, max_wait: Optional[float] = None):
+    """
+    Call an upstream provider within its rate budget
+
+    Each attempt takes a token from the provider's bucket, queueing by the
+    current priority for at most `max_wait` seconds (default per priority).
+    The call itself is abandoned after the provider's timeout. Exceptions
+    and timeouts feed the provider's circuit breaker and are retried with
+    jittered backoff while the deadline allows.
+
+    Raises:
+        CircuitOpen: The provider's circuit is open (no call was made)
+        UpstreamThrottled: No token could be obtained before the deadline
+        UpstreamTimeout: The call exceeded the provider's timeout
+    """
+    level = _priority.get()
+    if max_wait is None:
+        max_wait = UPSTREAM_MAX_WAIT_SECONDS.get(level, UPSTREAM_MAX_WAIT_SECONDS[INTERACTIVE])
+    deadline = time.monotonic() + max_wait
+    bucket = budgets.get(provider)
+    breaker = get_breaker(provider)
+    timeout = timeouts.get(provider, UPSTREAM_DEFAULT_TIMEOUT_SECONDS)
+
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpen(f"{provider} circuit is open, skipping '{operation}'")
+        if bucket is not None:
+            start = time.monotonic()
+            granted = bucket.acquire(level, timeout=max(0.0, deadline - start))
+            UPSTREAM_QUEUE_WAIT.observe(time.monotonic() - start, provider=provider,
+                                        priority=PRIORITY_NAMES.get(level, level))
+            if not granted:
+                breaker.release_probe()
+                UPSTREAM_THROTTLED.inc(provider=provider, priority=PRIORITY_NAMES.get(level, level))
+                raise UpstreamThrottled(f"{provider} budget exhausted for '{operation}'")
+        try:
+            with upstream_call(operation, provider):
+                future = _executor.submit(contextvars.copy_context().run, fn)
+                try:
+                    result = future.result(timeout=timeout)
+                except FutureTimeout:
+                    future.cancel()
+                    raise UpstreamTimeout(f"{provider} '{operation}' timed out after {timeout}s")
+        except Exception:
+            breaker.record_failure()
+            delay = backoff_delay(attempt)
+            if attempt == retries or time.monotonic() + delay >= deadline:
+                raise
+            UPSTREAM_RETRIED.inc(provider=provider, operation=operation)
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+# =============================
+# STALE FALLBACKS
+# =============================
+def mark_stale():
+    """Record that the current request is being served last-known-good data"""
+    flag = _served_stale.get()
+    if flag is None:
+        _served_stale.set([True])
+    else:
+        flag[0] = True
+
+
+def reset_stale():
+    """Start tracking staleness for a new request (call at request start)"""
+    _served_stale.set([False])
+
+
+def served_stale() -> bool:
+    flag = _served_stale.get()
+    return flag is not None and flag[0]
+
+
+def cached_fetch(cache, key, fetch: Callable, is_empty: Optional[Callable] = None):
+    """
+    Fresh cached value, else `fetch()`; last-known-good value when that fails
+
+    A fetch that raises (open circuit, throttling, timeout or a provider
+    error) or returns an empty result falls back to `cache.get_stale(key)`
+    and marks the request as stale. Without a stale value the exception
+    propagates and an empty result is returned uncached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    try:
+        value = fetch()
+    except Exception:
+        stale = cache.get_stale(key)
+        if stale is None:
+            raise
+        mark_stale()
+        return stale
+    if is_empty is not None and is_empty(value):
+        stale = cache.get_stale(key)
+        if stale is None:
+            return value
+        mark_stale()
+        return stale
+    cache.set(key, value)
+    return value
@@ -0,0 +1,333 @@
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Rows per block when scanning numeric columns; bounds the temporary
+# float64 copy to CHUNK_ROWS x n_columns regardless of frame size
+CHUNK_ROWS = 1_000_000
+
+
+@dataclass
+class ValidationRules:
+    """Thresholds and switches for the data quality checks"""
+    max_missing_pct: float = 50.0
+    outlier_z: float = 5.0
+    max_outlier_pct: float = 5.0
+    date_column: Optional[str] = None
+    group_column: Optional[str] = None
+    require_monotonic_dates: bool = True
+    allow_duplicate_timestamps: bool = False
+
+
+@dataclass
+class ValidationIssue:
+    rule: str
+    message: str
+    column: Optional[str] = None
+    value: Optional[float] = None
+    threshold: Optional[float] = None
+
+
+@dataclass
+class ValidationReport:
+    n_rows: int
+    n_columns: int
+    issues: List[ValidationIssue] = field(default_factory=list)
+    column_stats: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ok': self.ok,
+            'n_rows': self.n_rows,
+            'n_columns': self.n_columns,
+            'issues': [asdict(i) for i in self.issues],
+            'column_stats': self.column_stats
+        }
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=float)
+
+    def print_summary(self):
+        if self.ok:
+            print(f"✅ Data quality checks passed ({self.n_rows} rows, {self.n_columns} columns)")
+            return
+        print("⚠️ Data quality issues detected:")
+        for issue in self.issues:
+            print(f"  - {issue.message}")
+
+
+# =============================
+# STREAMING MOMENTS
+# =============================
+class ColumnMoments:
+    """
+    Per-column count/mean/M2/missing accumulated over row blocks
+
+    Blocks are merged with Chan et al.'s parallel update, so the result is
+    the same as a single pass over the full column.
+    """
+
+    def __init__(self, columns: List[str]):
+        k = len(columns)
+        self.columns = columns
+        self.rows = 0
+        self.count = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.missing = np.zeros(k, dtype=np.int64)
+
+    def update(self, block: np.ndarray):
+        """Fold a (rows x columns) float block into the running moments"""
+        nan = np.isnan(block)
+        has_nan = nan.any()
+        n_b = (block.shape[0] - np.count_nonzero(nan, axis=0)).astype(float)
+        self.rows += block.shape[0]
+        self.missing += block.shape[0] - n_b.astype(np.int64)
+
+        filled = np.where(nan, 0.0, block) if has_nan else block
+        mean_b = filled.sum(axis=0) / np.maximum(n_b, 1)
+        centered = filled - mean_b
+        if has_nan:
+            centered[nan] = 0.0
+        m2_b = np.einsum('ij,ij->j', centered, centered)
+
+        n_a = self.count
+        total = n_a + n_b
+        delta = mean_b - self.mean
+        safe_total = np.maximum(total, 1)
+        self.mean = self.mean + delta * n_b / safe_total
+        self.m2 = self.m2 + m2_b + delta ** 2 * n_a * n_b / safe_total
+        self.count = total
+
+    @property
+    def std(self) -> np.ndarray:
+        """Sample standard deviation (ddof=1, like pandas)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / np.maximum(self.count - 1, 1)), np.nan)
+
+
+def _outlier_limit(rules, moments):
+    # Constant columns have no outliers (the old per-column check skipped std == 0)
+    std = moments.std
+    return np.where(std > 0, rules.outlier_z * std, np.inf)
+
+
+def _count_outliers(block, mean, limit):
+    """Values further than `limit` from `mean`, per column (NaN never counts)"""
+    with np.errstate(invalid='ignore'):
+        deviation = np.subtract(block, mean)
+        np.abs(deviation, out=deviation)
+        return np.count_nonzero(np.greater(deviation, limit), axis=0)
+
+
+def _numeric_blocks(df: pd.DataFrame, columns: List[str], chunk_rows: int):
+    for start in range(0, len(df), chunk_rows):
+        yield df[columns].iloc[start:start + chunk_rows].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# =============================
+# DATE CHECKS
+# =============================
+class _DateOrderChecker:
+    """Counts out-of-order and repeated timestamps per group across blocks"""
+
+    def __init__(self, date_column: str, group_column: Optional[str]):
+        self.date_column = date_column
+        self.group_column = group_column
+        self.backwards = 0
+        self.repeats = 0
+        self._last = {}
+
+    def update(self, frame: pd.DataFrame):
+        dates = pd.to_datetime(frame[self.date_column], errors='coerce')
+        if self.group_column:
+            keys = frame[self.group_column]
+            diffs = dates.groupby(keys, sort=False).diff()
+            firsts = dates.groupby(keys, sort=False).first()
+            lasts = dates.groupby(keys, sort=False).last()
+        else:
+            diffs = dates.diff()
+            firsts = pd.Series([dates.iloc[0]], index=[None]) if len(dates) else pd.Series(dtype='datetime64[ns]')
+            lasts = pd.Series([dates.iloc[-1]], index=[None]) if len(dates) else firsts
+
+        self.backwards += int((diffs < pd.Timedelta(0)).sum())
+        self.repeats += int((diffs == pd.Timedelta(0)).sum())
+
+        # Boundary between the previous block and this one
+        for key, first in firsts.items():
+            previous = self._last.get(key)
+            if previous is not None and pd.notna(first):
+                if first < previous:
+                    self.backwards += 1
+                elif first == previous:
+                    self.repeats += 1
+        self._last.update(lasts.dropna().to_dict())
+
+
+# =============================
+# VALIDATION
+# =============================
+def _finish_report(rules, moments, outliers, extra_missing, n_columns, date_checker, exact_duplicates=None):
+    n_rows = moments.rows
+    report = ValidationReport(n_rows=n_rows, n_columns=n_columns)
+
+    missing = dict(zip(moments.columns, moments.missing.tolist()))
+    missing.update(extra_missing)
+    if n_rows:
+        high_missing = [c for c, m in missing.items() if m / n_rows * 100 > rules.max_missing_pct]
+        if high_missing:
+            report.issues.append(ValidationIssue(
+                rule='missingness',
+                message=f"High missing values in: {high_missing}",
+                threshold=rules.max_missing_pct
+            ))
+
+    std = moments.std
+    for j, col in enumerate(moments.columns):
+        outlier_pct = outliers[j] / n_rows * 100 if n_rows else 0.0
+        report.column_stats[col] = {
+            'count': int(moments.count[j]),
+            'missing': int(moments.missing[j]),
+            'mean': float(moments.mean[j]) if moments.count[j] else None,
+            'std': float(std[j]) if np.isfinite(std[j]) else None,
+            'outliers': int(outliers[j])
+        }
+        if outlier_pct > rules.max_outlier_pct:
+            report.issues.append(ValidationIssue(
+                rule='outliers',
+                column=col,
+                value=round(outlier_pct, 2),
+                threshold=rules.max_outlier_pct,
+                message=f"High outliers in {col}: {outlier_pct:.1f}%"
+            ))
+
+    if date_checker is not None:
+        if rules.require_monotonic_dates and date_checker.backwards:
+            report.issues.append(ValidationIssue(
+                rule='monotonic_dates',
+                column=rules.date_column,
+                value=date_checker.backwards,
+                message=f"{date_checker.backwards} rows where '{rules.date_column}' goes backwards"
+            ))
+        duplicates = date_checker.repeats if exact_duplicates is None else exact_duplicates
+        if not rules.allow_duplicate_timestamps and duplicates:
+            scope = f" per '{rules.group_column}'" if rules.group_column else ''
+            report.issues.append(ValidationIssue(
+                rule='duplicate_timestamps',
+                column=rules.date_column,
+                value=duplicates,
+                message=f"{duplicates} duplicate '{rules.date_column}' values{scope}"
+            ))
+
+    return report
+
+
+def _date_checker_for(rules, columns):
+    if rules.date_column and rules.date_column in columns:
+        group = rules.group_column if rules.group_column in columns else None
+        return _DateOrderChecker(rules.date_column, group)
+    return None
+
+
+def validate_frame(df: pd.DataFrame, rules: Optional[ValidationRules] = None,
+                   chunk_rows: int = CHUNK_ROWS) -> ValidationReport:
+    """
+    Run all data quality checks on an in-memory frame
+
+    Numeric columns are scanned as 2-D blocks: one vectorized pass for
+    moments and one for outlier counts, instead of a Python loop with
+    several full-column scans per column.
+
+    Args:
+        df: Frame to validate
+        rules: Thresholds; defaults to ValidationRules()
+        chunk_rows: Rows per numeric block
+
+    Returns:
+        ValidationReport
+    """
+    rules = rules or ValidationRules()
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    other_cols = [c for c in df.columns if c not in numeric_cols]
+
+    # Frames that fit in one block are materialised once for both passes
+    single_block = len(df) <= chunk_rows
+    blocks = list(_numeric_blocks(df, numeric_cols, chunk_rows)) if single_block else None
+
+    moments = ColumnMoments(numeric_cols)
+    for block in blocks or _numeric_blocks(df, numeric_cols, chunk_rows):
+        moments.update(block)
+    if not numeric_cols:
+        moments.rows = len(df)
+
+    outliers = np.zeros(len(numeric_cols), dtype=np.int64)
+    limit = _outlier_limit(rules, moments)
+    for block in blocks or _numeric_blocks(df, numeric_cols, chunk_rows):
+        outliers += _count_outliers(block, moments.mean, limit)
+
+    extra_missing = df[other_cols].isna().sum().to_dict() if other_cols else {}
+
+    date_checker = _date_checker_for(rules, df.columns)
+    exact_duplicates = None
+    if date_checker is not None:
+        date_checker.update(df)
+        subset = [c for c in (date_checker.group_column, rules.date_column) if c]
+        exact_duplicates = int(df.duplicated(subset=subset).sum())
+
+    return _finish_report(rules, moments, outliers, extra_missing, len(df.columns),
+                          date_checker, exact_duplicates)
+
+
+def validate_chunks(make_chunks: Callable[[], Iterable[pd.DataFrame]],
+                    rules: Optional[ValidationRules] = None) -> ValidationReport:
+    """
+    Validate data that does not fit in memory
+
+    Args:
+        make_chunks: Zero-argument callable returning a fresh iterator of
+            DataFrame chunks (e.g. lambda: pd.read_csv(path, chunksize=10**6)).
+            It is called twice: once for moments, once for outlier counts.
+        rules: Thresholds; defaults to ValidationRules()
+
+    Returns:
+        ValidationReport. Duplicate timestamps are counted between
+        consecutive rows of the same group, which is exact for sorted data.
+    """
+    rules = rules or ValidationRules()
+    moments = None
+    extra_missing = {}
+    date_checker = None
+    n_columns = 0
+
+    for chunk in make_chunks():
+        if moments is None:
+            numeric_cols = chunk.select_dtypes(include=[np.number]).columns.tolist()
+            other_cols = [c for c in chunk.columns if c not in numeric_cols]
+            moments = ColumnMoments(numeric_cols)
+            date_checker = _date_checker_for(rules, chunk.columns)
+            n_columns = len(chunk.columns)
+        block = chunk[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        moments.update(block)
+        for col, count in chunk[other_cols].isna().sum().items():
+            extra_missing[col] = extra_missing.get(col, 0) + int(count)
+        if date_checker is not None:
+            date_checker.update(chunk)
+
+    if moments is None:
+        return ValidationReport(n_rows=0, n_columns=0)
+
+    outliers = np.zeros(len(moments.columns), dtype=np.int64)
+    limit = _outlier_limit(rules, moments)
+    for chunk in make_chunks():
+        block = chunk[moments.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        outliers += _count_outliers(block, moments.mean, limit)
+
+    return _finish_report(rules, moments, outliers, extra_missing, n_columns, date_checker)
@@ -1,4 +1,4 @@
-import type { StockData, ChartDataPoint, PredictionData, NewsArticle, ComparisonData } from '@shared/schema';
+import type { StockData, BulkStockData, ChartDataPoint, PredictionData, NewsArticle, ComparisonData, MultiComparisonData } from '@shared/schema';
 
 // Flask backend URL - change to your deployed backend URL in production
 const BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5001/api';
@@ -9,6 +9,26 @@ export async function getStock(symbol: string): Promise<StockData> {
   return res.json();
 }
 
+export async function getStocks(symbols: string[]): Promise<BulkStockData> {
+  const res = await fetch(`${BASE_URL}/stocks?symbols=${encodeURIComponent(symbols.join(','))}`);
+  if (!res.ok) throw new Error('Failed to fetch stock data');
+  return res.json();
+}
+
+// Subscribe to pushed quote/prediction updates; returns an unsubscribe function
+export function subscribeStocks(
+  symbols: string[],
+  onQuote: (quote: StockData) => void,
+  onPrediction?: (prediction: PredictionData) => void,
+): () => void {
+  const source = new EventSource(`${BASE_URL}/stream?symbols=${encodeURIComponent(symbols.join(','))}`);
+  source.addEventListener('quote', (e) => onQuote(JSON.parse((e as MessageEvent).data)));
+  if (onPrediction) {
+    source.addEventListener('prediction', (e) => onPrediction(JSON.parse((e as MessageEvent).data)));
+  }
+  return () => source.close();
+}
+
 export async function getStockHistory(symbol: string, range: string = '1M'): Promise<ChartDataPoint[]> {
   const res = await fetch(`${BASE_URL}/stock/${symbol}/history?range=${range}`);
   if (!res.ok) throw new Error('Failed to fetch stock history');
@@ -32,3 +52,10 @@ export async function compareStocks(symbol1: string, symbol2: string): Promise<C
   if (!res.ok) throw new Error('Failed to compare stocks');
   return res.json();
 }
+
+export async function compareManyStocks(symbols: string[], range: string = '1M', window: number = 20): Promise<MultiComparisonData> {
+  const params = new URLSearchParams({ symbols: symbols.join(','), range, window: String(window) });
+  const res = await fetch(`${BASE_URL}/compare/multi?${params}`);
+  if (!res.ok) throw new Error('Failed to compare stocks');
+  return res.json();
+}
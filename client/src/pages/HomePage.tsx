@@ -8,7 +8,7 @@ import ChartContainer from "@/components/ChartContainer";
 import LoadingSpinner from "@/components/LoadingSpinner";
 import ErrorMessage from "@/components/ErrorMessage";
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from "recharts";
-import { getStock, getStockHistory } from "@/lib/api";
+import { getStock, getStocks, getStockHistory } from "@/lib/api";
 import type { StockData, ChartDataPoint } from "@shared/schema";
 
 // Default stocks to display
@@ -29,10 +29,8 @@ export default function HomePage() {
 
   const loadDefaultStocks = async () => {
     try {
-      const stocks = await Promise.all(
-        defaultStocks.map(sym => getStock(sym).catch(() => null))
-      );
-      setRecentStocks(stocks.filter(s => s !== null) as StockData[]);
+      const { quotes } = await getStocks(defaultStocks);
+      setRecentStocks(quotes);
     } catch (err) {
       console.error("Error loading default stocks:", err);
     }
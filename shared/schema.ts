@@ -1,5 +1,5 @@
 import { sql } from "drizzle-orm";
-import { pgTable, text, varchar, timestamp, jsonb, real, integer } from "drizzle-orm/pg-core";
+import { pgTable, text, varchar, timestamp, jsonb, real, integer, primaryKey } from "drizzle-orm/pg-core";
 import { createInsertSchema } from "drizzle-zod";
 import { z } from "zod";
 
@@ -47,6 +47,17 @@ export const insertMLModelSchema = createInsertSchema(mlModels).pick({
 export type InsertMLModel = z.infer<typeof insertMLModelSchema>;
 export type MLModel = typeof mlModels.$inferSelect;
 
+// One row per drifting model version whose retraining a serving worker started (backend/drift.py)
+export const modelRetrainClaims = pgTable("model_retrain_claims", {
+  modelType: text("model_type").notNull(),
+  modelVersion: text("model_version").notNull(),
+  claimedAt: timestamp("claimed_at", { withTimezone: true }).defaultNow().notNull(),
+}, (table) => [
+  primaryKey({ columns: [table.modelType, table.modelVersion] }),
+]);
+
+export type ModelRetrainClaim = typeof modelRetrainClaims.$inferSelect;
+
 // Stock data types
 export interface StockData {
   symbol: string;
@@ -63,6 +74,11 @@ export interface StockData {
   lastUpdated: string;
 }
 
+export interface BulkStockData {
+  quotes: StockData[];
+  errors: Record<string, string>;
+}
+
 export interface ChartDataPoint {
   date: string;
   price: number;
@@ -113,3 +129,29 @@ export interface ComparisonData {
     marketCapDiff: number;
   };
 }
+
+export interface MultiComparisonData {
+  symbols: string[];
+  benchmark: string;
+  range: string;
+  window: number;
+  dates: string[];
+  series: {
+    price: Record<string, (number | null)[]>;
+    normalized: Record<string, (number | null)[]>;
+    drawdown: Record<string, (number | null)[]>;
+    rollingCorrelation: Record<string, (number | null)[]>;
+    rollingBeta: Record<string, (number | null)[]>;
+  };
+  summary: Record<string, {
+    lastPrice: number | null;
+    totalReturn: number | null;
+    sevenDayChange: number | null;
+    volatility: number | null;
+    maxDrawdown: number | null;
+    correlation: number | null;
+    beta: number | null;
+    bars: number;
+  }>;
+  missing: string[];
+}